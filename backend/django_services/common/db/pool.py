@@ -0,0 +1,29 @@
+from django.db import connections
+
+
+def get_pool_stats(alias='default'):
+    """Devuelve métricas del pool de conexiones de la base de datos indicada"""
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    pool = getattr(connection, 'pool', None)
+
+    if pool is None:
+        return {
+            'alias': alias,
+            'pool_enabled': False,
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+            'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+        }
+
+    # get_stats() devuelve contadores acumulados (requests_num, connections_num, ...)
+    # y el estado actual (pool_size, pool_available, requests_waiting)
+    stats = pool.get_stats()
+    return {
+        'alias': alias,
+        'pool_enabled': True,
+        'min_size': pool.min_size,
+        'max_size': pool.max_size,
+        'max_lifetime': pool.max_lifetime,
+        'max_idle': pool.max_idle,
+        'stats': stats,
+    }
@@ -0,0 +1,190 @@
+"""Cola de correo saliente: los envíos se encolan en la petición y un worker los entrega por SMTP"""
+
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = 'mail:queue'
+FAILED_KEY = 'mail:queue:failed'
+
+
+class LocalMailQueue:
+    """Cola en memoria del proceso (desarrollo y tests)"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self.failed = []
+
+    def push(self, payload):
+        self._queue.put(payload)
+
+    def pop(self, timeout=1):
+        try:
+            if timeout:
+                return self._queue.get(timeout=timeout)
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def push_failed(self, payload):
+        self.failed.append(payload)
+
+
+class RedisMailQueue:
+    """Cola compartida en Redis: cualquier worker de cualquier proceso puede consumirla"""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def push(self, payload):
+        self.client.lpush(QUEUE_KEY, json.dumps(payload))
+
+    def pop(self, timeout=1):
+        if timeout:
+            item = self.client.brpop(QUEUE_KEY, timeout=timeout)
+            raw = item[1] if item else None
+        else:
+            raw = self.client.rpop(QUEUE_KEY)
+        return json.loads(raw) if raw else None
+
+    def push_failed(self, payload):
+        self.client.lpush(FAILED_KEY, json.dumps(payload))
+
+
+_mail_queue = None
+_worker = None
+_lock = threading.Lock()
+
+
+def get_mail_queue():
+    global _mail_queue
+    with _lock:
+        if _mail_queue is None:
+            if settings.MAIL_QUEUE_BACKEND == 'redis':
+                _mail_queue = RedisMailQueue(settings.MAIL_QUEUE_REDIS_URL)
+            else:
+                _mail_queue = LocalMailQueue()
+        return _mail_queue
+
+
+def reset_mail_queue():
+    """Descarta la cola actual (se vuelve a crear según settings en el siguiente uso)"""
+    global _mail_queue
+    with _lock:
+        _mail_queue = None
+
+
+def is_rate_limited(address):
+    """Limita el número de correos por dirección dentro de una ventana de tiempo"""
+    digest = hashlib.sha256(address.strip().lower().encode('utf-8')).hexdigest()
+    key = f"mail_rate_{digest}"
+    window = settings.MAIL_RATE_LIMIT_WINDOW
+
+    if cache.add(key, 1, timeout=window):
+        return False
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # La clave expiró entre add() e incr()
+        cache.set(key, 1, timeout=window)
+        return False
+    return count > settings.MAIL_RATE_LIMIT_PER_ADDRESS
+
+
+def enqueue_email(subject, message, recipient_list, html_message=None, from_email=None):
+    """
+    Encola un correo y vuelve de inmediato. Devuelve False si algún destinatario
+    ha superado el límite de envíos.
+    """
+    if any(is_rate_limited(address) for address in recipient_list):
+        logger.warning("Correo descartado por límite de envíos: %s", subject)
+        return False
+
+    get_mail_queue().push({
+        'subject': subject,
+        'message': message,
+        'html_message': html_message,
+        'from_email': from_email or settings.EMAIL_HOST_USER,
+        'recipient_list': list(recipient_list),
+        'attempts': 0,
+    })
+    ensure_worker()
+    return True
+
+
+def _send(payload):
+    email = EmailMultiAlternatives(
+        payload['subject'],
+        payload['message'],
+        payload['from_email'],
+        payload['recipient_list'],
+    )
+    if payload.get('html_message'):
+        email.attach_alternative(payload['html_message'], 'text/html')
+    email.send(fail_silently=False)
+
+
+def deliver(payload):
+    """Entrega un correo reintentando con backoff exponencial"""
+    max_retries = settings.MAIL_QUEUE_MAX_RETRIES
+    backoff = settings.MAIL_QUEUE_RETRY_BACKOFF
+
+    while True:
+        try:
+            _send(payload)
+            return True
+        except Exception as e:
+            payload['attempts'] = payload.get('attempts', 0) + 1
+            if payload['attempts'] > max_retries:
+                logger.error("No se pudo enviar el correo tras %s intentos: %s", payload['attempts'], e)
+                get_mail_queue().push_failed(payload)
+                return False
+            logger.warning("Error enviando correo (intento %s): %s", payload['attempts'], e)
+            time.sleep(backoff * (2 ** (payload['attempts'] - 1)))
+
+
+def process_next(timeout=1):
+    """Procesa un correo de la cola. Devuelve False si la cola estaba vacía"""
+    payload = get_mail_queue().pop(timeout=timeout)
+    if payload is None:
+        return False
+    deliver(payload)
+    return True
+
+
+def drain():
+    """Entrega todos los correos pendientes sin esperar (tests y comandos)"""
+    processed = 0
+    while process_next(timeout=0):
+        processed += 1
+    return processed
+
+
+def run_worker(stop_event=None):
+    while stop_event is None or not stop_event.is_set():
+        try:
+            process_next(timeout=1)
+        except Exception as e:
+            logger.error("Error en el worker de correo: %s", e)
+            time.sleep(1)
+
+
+def ensure_worker():
+    """Arranca (una vez por proceso) un worker en segundo plano si está habilitado"""
+    global _worker
+    if not settings.MAIL_QUEUE_START_WORKER:
+        return
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_worker, name='mail-queue-worker', daemon=True)
+            _worker.start()
@@ -1,9 +1,72 @@
 from html_sanitizer.django import get_sanitizer
 
+# Caracteres que pueden formar marcado HTML; sin ellos el sanitizador no tiene nada que limpiar
+MARKUP_CHARS = ('<', '>', '&')
+
+_sanitizer = None
+
+
+def _get_shared_sanitizer():
+    # Una única instancia por proceso (se crea al primer uso, cuando settings ya está cargado)
+    global _sanitizer
+    if _sanitizer is None:
+        _sanitizer = get_sanitizer()
+    return _sanitizer
+
+
+def has_markup(text):
+    return any(char in text for char in MARKUP_CHARS)
+
+
 def sanitize_input(input):
 
     if isinstance(input, str):
-        sanitizer = get_sanitizer()
-        return sanitizer.sanitize(input)
+        # Camino rápido: texto plano sin marcado se devuelve tal cual
+        if not has_markup(input):
+            return input
+        return _get_shared_sanitizer().sanitize(input)
     return input
 
+
+class SanitizedFieldsMixin:
+    """
+    Sanitiza en save() los campos listados en `sanitized_fields`.
+    Solo se procesan los campos que han cambiado desde que se cargaron de la base de datos
+    (y, si se indica update_fields, solo los que se van a escribir).
+    """
+    sanitized_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._sanitized_snapshot = {
+            name: value for name, value in zip(field_names, values)
+            if name in cls.sanitized_fields
+        }
+        return instance
+
+    def _fields_to_sanitize(self, update_fields=None):
+        if update_fields is None:
+            return list(self.sanitized_fields)
+        return [field for field in self.sanitized_fields if field in update_fields]
+
+    def sanitize_dirty_fields(self, update_fields=None):
+        snapshot = getattr(self, '_sanitized_snapshot', {})
+        for field in self._fields_to_sanitize(update_fields):
+            value = getattr(self, field)
+            if not value:
+                continue
+            if field in snapshot and snapshot[field] == value:
+                continue
+            setattr(self, field, sanitize_input(value))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        self.sanitize_dirty_fields(update_fields)
+        super().save(*args, **kwargs)
+
+        # Los valores guardados pasan a ser la referencia para el siguiente save()
+        snapshot = getattr(self, '_sanitized_snapshot', {})
+        for field in self._fields_to_sanitize(update_fields):
+            snapshot[field] = getattr(self, field)
+        self._sanitized_snapshot = snapshot
@@ -113,9 +113,30 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
+        # Verifica la conexión antes de reutilizarla (también la usa el pool como 'check')
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Pool de conexiones (psycopg3). Evita abrir una conexión nueva a Postgres en cada petición.
+DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'True') == 'True'
+
+if DB_POOL_ENABLED:
+    # Con pool, Django exige CONN_MAX_AGE = 0: la reutilización la gestiona el pool.
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        },
+    }
+else:
+    # Sin pool: conexiones persistentes por hilo con comprobación de salud
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -197,6 +218,16 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')  # tu dirección de correo electrónico
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')  # tu contraseña de correo electrónico
 
+# Cola de correo saliente ('redis' compartida entre procesos o 'local' en memoria)
+MAIL_QUEUE_BACKEND = os.getenv('MAIL_QUEUE_BACKEND', 'redis')
+MAIL_QUEUE_REDIS_URL = f"redis://{os.getenv('REDIS_HOST')}:{os.getenv('REDIS_PORT')}/{os.getenv('REDIS_DB1')}"
+# Worker en segundo plano dentro del proceso web (desactivar si se usa `manage.py run_mail_worker`)
+MAIL_QUEUE_START_WORKER = os.getenv('MAIL_QUEUE_START_WORKER', 'True') == 'True'
+MAIL_QUEUE_MAX_RETRIES = int(os.getenv('MAIL_QUEUE_MAX_RETRIES', '3'))
+MAIL_QUEUE_RETRY_BACKOFF = float(os.getenv('MAIL_QUEUE_RETRY_BACKOFF', '2'))
+MAIL_RATE_LIMIT_PER_ADDRESS = int(os.getenv('MAIL_RATE_LIMIT_PER_ADDRESS', '3'))
+MAIL_RATE_LIMIT_WINDOW = int(os.getenv('MAIL_RATE_LIMIT_WINDOW', '900'))
+
 FLASK_API_KEY = os.getenv('FLASK_API_KEY', os.getenv('DJANGO_SECRET_KEY', ''))
 
 if not DEBUG:
@@ -0,0 +1,50 @@
+from functools import lru_cache
+
+from django.template.loader import get_template
+
+from common.mail.queue import enqueue_email
+
+PASSWORD_RESET_SUBJECT = 'Código de verificación para restablecer tu contraseña'
+PASSWORD_RESET_VALID_TIME = '15 minutos'
+
+PASSWORD_RESET_PLAIN = """
+Hola {first_name},
+
+Has solicitado restablecer tu contraseña. Utiliza el siguiente código de verificación:
+
+{code}
+
+Este código es válido por {valid_time}.
+
+Si no has solicitado este cambio, ignora este mensaje.
+
+Saludos,
+El equipo de soporte
+"""
+
+
+@lru_cache(maxsize=None)
+def get_password_reset_template():
+    # Plantilla compilada una sola vez por proceso
+    return get_template('password_reset.html')
+
+
+def warm_templates():
+    get_password_reset_template()
+
+
+def send_password_reset_code(user, code):
+    """Encola el correo con el código de verificación. Devuelve False si se superó el límite de envíos"""
+    context = {'user': user, 'code': code, 'valid_time': PASSWORD_RESET_VALID_TIME}
+    html_message = get_password_reset_template().render(context)
+    plain_message = PASSWORD_RESET_PLAIN.format(
+        first_name=user.first_name,
+        code=code,
+        valid_time=PASSWORD_RESET_VALID_TIME,
+    )
+    return enqueue_email(
+        PASSWORD_RESET_SUBJECT,
+        plain_message,
+        [user.email],
+        html_message=html_message,
+    )
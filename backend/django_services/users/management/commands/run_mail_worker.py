@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from common.mail.queue import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de correo saliente (envío SMTP con reintentos)'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Worker de correo iniciado')
+        try:
+            run_worker()
+        except KeyboardInterrupt:
+            self.stdout.write('Worker de correo detenido')
@@ -1,11 +1,10 @@
 import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from common.security.utils import sanitize_input
+from common.security.utils import SanitizedFieldsMixin
 
-class User(AbstractUser):
+class User(SanitizedFieldsMixin, AbstractUser):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(_('email address'), unique=True)
     oauth_provider = models.CharField(max_length=50, blank=True, null=True)
@@ -32,6 +31,9 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    # Campos sensibles que se sanitizan antes de guardar
+    sanitized_fields = ('first_name', 'last_name', 'telefono', 'direccion', 'oauth_provider', 'oauth_uid')
+
     class Meta:
         verbose_name = _('usuario')
         verbose_name_plural = _('usuarios')
@@ -39,74 +41,62 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.email} ({self.get_tipo_display()})"
     
-    def check_profile_completion(self, **kwargs):
-        """Verifica si el perfil del usuario está completo según su tipo"""
+    def compute_profile_completion(self, patient=None, doctor=None):
+        """
+        Calcula en memoria si el perfil está completo según su tipo, sin guardar.
+        Se puede pasar el perfil de paciente/doctor ya cargado para evitar consultas.
+        """
         # Campos base que son requeridos para todos los tipos de usuarios
         base_fields = [self.first_name, self.last_name, self.fecha_nacimiento, self.telefono, self.direccion]
         
         if self.tipo == 'patient':
             # Para pacientes, solo verificamos que los campos base estén completos
             # y que el modelo Patient esté creado (los campos médicos pueden estar vacíos)
-            patient = getattr(self, 'patient', None)
+            patient = patient if patient is not None else getattr(self, 'patient', None)
             if all(base_fields) and patient is not None:
                 # La ocupación y alergias son los únicos campos requeridos inicialmente
-                if patient.ocupacion and patient.allergies:
-                    self.is_profile_completed = True
-                else:
-                    self.is_profile_completed = False
-            else:
-                self.is_profile_completed = False
+                return bool(patient.ocupacion and patient.allergies)
+            return False
                 
         elif self.tipo == 'doctor':
             # Para doctores, verificamos campos base y profesionales
-            doctor = getattr(self, 'doctor', None)
+            doctor = doctor if doctor is not None else getattr(self, 'doctor', None)
             if all(base_fields) and doctor is not None:
-                if doctor.especialidad and doctor.numero_licencia:
-                    self.is_profile_completed = True
-                else:
-                    self.is_profile_completed = False
-            else:
-                self.is_profile_completed = False
+                return bool(doctor.especialidad and doctor.numero_licencia)
+            return False
                 
         elif self.tipo == 'admin':
             # Para administradores, solo la información básica
-            if all(base_fields):
-                self.is_profile_completed = True
-            else:
-                self.is_profile_completed = False
+            return all(base_fields)
+
+        return self.is_profile_completed
+
+    def check_profile_completion(self, **kwargs):
+        """Verifica si el perfil del usuario está completo según su tipo"""
+        is_completed = self.compute_profile_completion()
+        changed = is_completed != self.is_profile_completed
+        self.is_profile_completed = is_completed
         
         # Guardar solo el campo actualizado para evitar modificar otros campos
         # si este método se llama como parte de otro proceso de guardado
         if 'update_fields' not in kwargs or kwargs['update_fields'] is None:
-            self.save(update_fields=['is_profile_completed'])
+            # Sin cambios no hace falta escribir en la base de datos
+            if changed:
+                self.save(update_fields=['is_profile_completed'])
         elif 'is_profile_completed' not in kwargs['update_fields']:
             kwargs['update_fields'].append('is_profile_completed')
             self.save(**kwargs)
         return self.is_profile_completed
-    
-    def save(self, *args, **kwargs):
-        # Sanitizar los campos sensibles antes de guardar
-        if self.first_name:
-            self.first_name = sanitize_input(self.first_name)
-        if self.last_name:
-            self.last_name = sanitize_input(self.last_name)
-        if self.telefono:
-            self.telefono = sanitize_input(self.telefono)
-        if self.direccion:
-            self.direccion = sanitize_input(self.direccion)
-        if self.oauth_provider:
-            self.oauth_provider = sanitize_input(self.oauth_provider)
-        if self.oauth_uid:
-            self.oauth_uid = sanitize_input(self.oauth_uid)
-        super().save(*args, **kwargs)
 
-class Doctor(models.Model):
+class Doctor(SanitizedFieldsMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='doctor')
 
     # Información profesional (si es médico)
     especialidad = models.CharField(max_length=100, blank=True, null=True)
     numero_licencia = models.CharField(max_length=50, blank=True, null=True)
+
+    sanitized_fields = ('especialidad', 'numero_licencia')
     
     class Meta:
         verbose_name = _('doctor')
@@ -121,13 +111,9 @@ class Doctor(models.Model):
             self.user.tipo = 'doctor'
             self.user.save(update_fields=['tipo'])
 
-        if self.especialidad:
-            self.especialidad = sanitize_input(self.especialidad)
-        if self.numero_licencia:
-            self.numero_licencia = sanitize_input(self.numero_licencia)
         super().save(*args, **kwargs)
 
-class Patient(models.Model):
+class Patient(SanitizedFieldsMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='patient')
     
@@ -148,6 +134,11 @@ class Patient(models.Model):
     
     # Campo para seguimiento del análisis del chatbot
     last_chatbot_analysis = models.DateTimeField(blank=True, null=True)
+
+    sanitized_fields = (
+        'triaje_level', 'ocupacion', 'medical_context',
+        'allergies', 'medications', 'medical_history'
+    )
     
     class Meta:
         verbose_name = _('paciente')
@@ -162,79 +153,15 @@ class Patient(models.Model):
             self.user.tipo = 'patient'
             self.user.save(update_fields=['tipo'])
 
-        # Sanitizar los campos proporcionados
-        if self.triaje_level:
-            self.triaje_level = sanitize_input(self.triaje_level)
-        if self.ocupacion:
-            self.ocupacion = sanitize_input(self.ocupacion)
-        if self.medical_context:
-            self.medical_context = sanitize_input(self.medical_context)
-        if self.allergies:
-            self.allergies = sanitize_input(self.allergies)
-        if self.medications:
-            self.medications = sanitize_input(self.medications)
-        if self.medical_history:
-            self.medical_history = sanitize_input(self.medical_history)
-
         super().save(*args, **kwargs)
 
     def update_from_chatbot_analysis(self, analysis_data, created_by=None):
-        # Campos que pueden ser actualizados desde el chatbot
-        chatbot_fields = [
-            'triaje_level', 'pain_scale', 'medical_context',
-            'allergies', 'medications', 'medical_history', 'ocupacion'
-        ]
-        
-        # Verificar si hay cambios reales en los datos
-        has_changes = False
-        for field in chatbot_fields:
-            if field in analysis_data and getattr(self, field) != analysis_data[field]:
-                has_changes = True
-                break
-        
-        if has_changes:
-            # Crear una entrada en el historial antes de actualizar los datos
-            history_data = {
-                'patient': self,
-                'source': 'chatbot',
-                'created_by': created_by,
-                'notes': 'Actualización automática desde análisis del chatbot'
-            }
-            
-            # Copiar los valores actuales al historial
-            for field in chatbot_fields:
-                history_data[field] = getattr(self, field)
-            
-            # Crear la entrada de historial
-            PatientHistoryEntry.objects.create(**history_data)
-            
-            # Actualizar los campos que vienen en el análisis
-            fields_updated = []
-            for field in chatbot_fields:
-                if field in analysis_data and analysis_data[field] is not None:
-                    setattr(self, field, analysis_data[field])
-                    fields_updated.append(field)
-            
-            # Registrar la fecha del análisis
-            self.last_chatbot_analysis = timezone.now()
-            fields_updated.append('last_chatbot_analysis')
-            
-            # Resetear validación médica cuando se actualizan datos por chatbot
-            self.is_data_validated = False
-            self.data_validated_by = None
-            self.data_validated_at = None
-            fields_updated.extend(['is_data_validated', 'data_validated_by', 'data_validated_at'])
-            
-            # Guardar cambios si hay algún campo actualizado
-            if fields_updated:
-                self.save(update_fields=fields_updated)
-                # Verificar si con estos cambios el perfil ahora está completo
-                self.user.check_profile_completion()
-                return True
-        
-        return False
+        """Aplica un análisis del chatbot. Devuelve True si hubo cambios"""
+        from .services import ingest_chatbot_analysis
 
-class DoctorPatientRelation(models.Model):
+        return ingest_chatbot_analysis(self, analysis_data, created_by=created_by).updated
+
+class DoctorPatientRelation(SanitizedFieldsMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     doctor = models.ForeignKey('Doctor', on_delete=models.CASCADE, related_name='patient_relations')
     patient = models.ForeignKey('Patient', on_delete=models.CASCADE, related_name='doctor_relations')
@@ -243,6 +170,8 @@ class DoctorPatientRelation(models.Model):
     end_date = models.DateField(null=True, blank=True)
     active = models.BooleanField(default=True)
     notes = models.TextField(blank=True, null=True)
+
+    sanitized_fields = ('notes',)
     
     class Meta:
         unique_together = ('doctor', 'patient', 'active')
@@ -251,13 +180,8 @@ class DoctorPatientRelation(models.Model):
         
     def __str__(self):
         return f"Dr. {self.doctor.user.last_name} - Paciente: {self.patient.user.last_name} ({self.start_date})"
-    
-    def save(self, *args, **kwargs):
-        if self.notes:
-            self.notes = sanitize_input(self.notes)
-        super().save(*args, **kwargs)
 
-class PatientHistoryEntry(models.Model):
+class PatientHistoryEntry(SanitizedFieldsMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='history_entries')
     
@@ -281,6 +205,11 @@ class PatientHistoryEntry(models.Model):
     ), default='chatbot')
     notes = models.TextField(blank=True, null=True, help_text="Notas o razón del cambio")
 
+    sanitized_fields = (
+        'notes', 'medical_context', 'allergies',
+        'medications', 'medical_history', 'ocupacion'
+    )
+
     class Meta:
         verbose_name = _('entrada de historial del paciente')
         verbose_name_plural = _('entradas de historial del paciente')
@@ -288,18 +217,3 @@ class PatientHistoryEntry(models.Model):
     
     def __str__(self):
         return f"Historial de {self.patient.user.last_name} - {self.created_at.strftime('%Y-%m-%d %H:%M')}"
-    
-    def save(self, *args, **kwargs):
-        if self.notes:
-            self.notes = sanitize_input(self.notes)
-        if self.medical_context:
-            self.medical_context = sanitize_input(self.medical_context)
-        if self.allergies:
-            self.allergies = sanitize_input(self.allergies)
-        if self.medications:
-            self.medications = sanitize_input(self.medications)
-        if self.medical_history:
-            self.medical_history = sanitize_input(self.medical_history)
-        if self.ocupacion:
-            self.ocupacion = sanitize_input(self.ocupacion)
-        super().save(*args, **kwargs)
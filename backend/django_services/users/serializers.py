@@ -99,7 +99,9 @@ class PatientSerializer(serializers.ModelSerializer):
         return None
     
     def get_history_count(self, obj):
-        return obj.history_entries.count()
+        # Anotado por get_patient_for_response; si no, una consulta por paciente
+        count = getattr(obj, 'history_count', None)
+        return count if count is not None else obj.history_entries.count()
 
 class DoctorSerializer(serializers.ModelSerializer):
     patients = PatientBasicSerializer(many=True, read_only=True)
@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from common.security.utils import sanitize_input
+from .models import Patient, PatientHistoryEntry
+
+# Campos que pueden ser actualizados desde el chatbot
+CHATBOT_FIELDS = (
+    'triaje_level', 'pain_scale', 'medical_context',
+    'allergies', 'medications', 'medical_history', 'ocupacion'
+)
+
+VALIDATION_FIELDS = ['is_data_validated', 'data_validated_by', 'data_validated_at']
+
+
+@dataclass
+class IngestionResult:
+    updated: bool
+    history_entry: Optional[PatientHistoryEntry] = None
+    changed_fields: tuple = ()
+    profile_complete: bool = False
+
+
+def _normalized_value(field, value):
+    # Comparamos contra el valor tal y como quedaría guardado (ya sanitizado)
+    if field in Patient.sanitized_fields:
+        return sanitize_input(value)
+    return value
+
+
+def get_chatbot_changes(patient, analysis_data):
+    """Devuelve {campo: valor} con los campos del análisis que cambian realmente"""
+    changes = {}
+    for field in CHATBOT_FIELDS:
+        if field not in analysis_data or analysis_data[field] is None:
+            continue
+        value = _normalized_value(field, analysis_data[field])
+        if getattr(patient, field) != value:
+            changes[field] = value
+    return changes
+
+
+def ingest_chatbot_analysis(patient, analysis_data, created_by=None):
+    """
+    Aplica un análisis del chatbot sobre el paciente en una única transacción:
+    una entrada de historial, como mucho un UPDATE de Patient y otro de User,
+    y ninguna escritura si el análisis no cambia nada.
+    """
+    user = patient.user
+    changes = get_chatbot_changes(patient, analysis_data)
+
+    if not changes:
+        return IngestionResult(updated=False, profile_complete=user.is_profile_completed)
+
+    with transaction.atomic():
+        # Copiar los valores actuales al historial antes de actualizar los datos
+        history_data = {field: getattr(patient, field) for field in CHATBOT_FIELDS}
+        history_entry = PatientHistoryEntry.objects.create(
+            patient=patient,
+            source='chatbot',
+            created_by=created_by,
+            notes='Actualización automática desde análisis del chatbot',
+            **history_data
+        )
+
+        for field, value in changes.items():
+            setattr(patient, field, value)
+
+        # Registrar la fecha del análisis
+        patient.last_chatbot_analysis = timezone.now()
+
+        # Resetear validación médica cuando se actualizan datos por chatbot
+        patient.is_data_validated = False
+        patient.data_validated_by = None
+        patient.data_validated_at = None
+
+        patient.save(update_fields=list(changes) + ['last_chatbot_analysis'] + VALIDATION_FIELDS)
+
+        # Completitud del perfil calculada en memoria; solo se escribe si cambia
+        profile_complete = user.compute_profile_completion(patient=patient)
+        if profile_complete != user.is_profile_completed:
+            user.is_profile_completed = profile_complete
+            user.save(update_fields=['is_profile_completed'])
+
+    return IngestionResult(
+        updated=True,
+        history_entry=history_entry,
+        changed_fields=tuple(changes),
+        profile_complete=profile_complete,
+    )
+
+
+def get_patient_for_response(patient_id):
+    """
+    Paciente con lo que lee PatientSerializer en una sola consulta: el médico validador con su
+    usuario (data_validator) y el número de entradas de historial (history_count).
+    """
+    return (
+        Patient.objects.select_related('data_validated_by__user')
+        .annotate(history_count=Count('history_entries'))
+        .get(pk=patient_id)
+    )
@@ -1,3 +1,154 @@
-from django.test import TestCase
+from datetime import date
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from common.mail import queue as mail_queue
+from .models import User, Doctor, Patient, PatientHistoryEntry
+from .serializers import PatientSerializer
+from .services import get_patient_for_response, ingest_chatbot_analysis
+
+
+class ChatbotIngestionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username='paciente',
+            email='paciente@example.com',
+            first_name='Ana',
+            last_name='López',
+            fecha_nacimiento=date(1990, 1, 1),
+            telefono='600000000',
+            direccion='Calle Mayor 1',
+            tipo='patient',
+        )
+        self.patient = Patient.objects.create(user=self.user, ocupacion='docente')
+
+    def test_no_changes_performs_no_queries(self):
+        self.patient.triaje_level = 'Leve'
+        with self.assertNumQueries(0):
+            result = ingest_chatbot_analysis(self.patient, {'triaje_level': 'Leve', 'allergies': None})
+
+        self.assertFalse(result.updated)
+        self.assertEqual(PatientHistoryEntry.objects.count(), 0)
+
+    def test_sanitized_value_is_not_a_change(self):
+        self.patient.allergies = 'polen &amp; ácaros'
+        with self.assertNumQueries(0):
+            result = ingest_chatbot_analysis(self.patient, {'allergies': 'polen & ácaros'})
+
+        self.assertFalse(result.updated)
+
+    def test_update_completing_profile_writes_once_per_table(self):
+        # SAVEPOINT + INSERT historial + UPDATE paciente + UPDATE usuario + RELEASE
+        with self.assertNumQueries(5):
+            result = ingest_chatbot_analysis(self.patient, {'allergies': 'penicilina', 'pain_scale': 4})
+
+        self.assertTrue(result.updated)
+        self.assertTrue(result.profile_complete)
+        self.assertEqual(set(result.changed_fields), {'allergies', 'pain_scale'})
+        self.assertIsNone(result.history_entry.allergies)
+
+        self.user.refresh_from_db()
+        self.patient.refresh_from_db()
+        self.assertTrue(self.user.is_profile_completed)
+        self.assertEqual(self.patient.allergies, 'penicilina')
+        self.assertEqual(self.patient.pain_scale, 4)
+        self.assertIsNotNone(self.patient.last_chatbot_analysis)
+
+    def test_update_without_profile_change_skips_user_write(self):
+        # SAVEPOINT + INSERT historial + UPDATE paciente + RELEASE
+        with self.assertNumQueries(4):
+            result = ingest_chatbot_analysis(self.patient, {'triaje_level': 'Moderado'})
+
+        self.assertTrue(result.updated)
+        self.assertFalse(result.profile_complete)
+
+    def test_response_patient_is_serialized_in_one_query(self):
+        doctor_user = User.objects.create(
+            username='medico', email='medico@example.com', first_name='Luis', last_name='Pérez', tipo='doctor'
+        )
+        ingest_chatbot_analysis(self.patient, {'triaje_level': 'Moderado'})
+        ingest_chatbot_analysis(self.patient, {'triaje_level': 'Leve'})
+        self.patient.data_validated_by = Doctor.objects.create(user=doctor_user)
+        self.patient.save()
+
+        with self.assertNumQueries(1):
+            data = PatientSerializer(get_patient_for_response(self.patient.pk)).data
+
+        self.assertEqual(data['history_count'], 2)
+        self.assertEqual(data['data_validator'], 'Dr. Luis Pérez')
+
+    def test_check_profile_completion_skips_save_when_unchanged(self):
+        self.user.patient = self.patient
+        with self.assertNumQueries(0):
+            self.assertFalse(self.user.check_profile_completion())
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    MAIL_QUEUE_BACKEND='local',
+    MAIL_QUEUE_START_WORKER=False,
+    MAIL_QUEUE_RETRY_BACKOFF=0,
+    MAIL_RATE_LIMIT_PER_ADDRESS=2,
+)
+class PasswordResetMailQueueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        mail_queue.reset_mail_queue()
+        self.user = User.objects.create(username='ana', email='ana@example.com', first_name='Ana')
+
+    def tearDown(self):
+        mail_queue.reset_mail_queue()
+
+    def _request_reset(self):
+        return self.client.post('/password/reset/request/', {'email': 'ana@example.com'})
+
+    def test_request_returns_before_sending(self):
+        response = self._request_reset()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(mail_queue.drain(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        code = cache.get(f"pwd_reset_{self.user.id}")
+        self.assertIn(code, mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+    def test_rate_limit_per_address_keeps_previous_code(self):
+        self._request_reset()
+        self._request_reset()
+        code = cache.get(f"pwd_reset_{self.user.id}")
+
+        response = self._request_reset()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail_queue.drain(), 2)
+        self.assertEqual(cache.get(f"pwd_reset_{self.user.id}"), code)
+
+    def test_failed_enqueue_leaves_no_active_code(self):
+        with patch('users.views.send_password_reset_code', side_effect=ConnectionError('cola caída')):
+            with self.assertRaises(ConnectionError):
+                self._request_reset()
+
+        self.assertIsNone(cache.get(f"pwd_reset_{self.user.id}"))
+
+    def test_failed_delivery_is_retried(self):
+        mail_queue.enqueue_email('asunto', 'cuerpo', ['ana@example.com'])
+        with patch.object(mail_queue, '_send', side_effect=[ConnectionError('smtp caído'), None]) as mock_send:
+            mail_queue.drain()
+
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual(mail_queue.get_mail_queue().failed, [])
+
+    @override_settings(MAIL_QUEUE_MAX_RETRIES=1)
+    def test_exhausted_retries_go_to_failed_queue(self):
+        mail_queue.enqueue_email('asunto', 'cuerpo', ['ana@example.com'])
+        with patch.object(mail_queue, '_send', side_effect=ConnectionError('smtp caído')):
+            mail_queue.drain()
+
+        failed = mail_queue.get_mail_queue().failed
+        self.assertEqual(len(failed), 1)
+        self.assertEqual(failed[0]['attempts'], 2)
@@ -8,7 +8,8 @@ from .views import (
     PasswordResetVerifyView, ChangePasswordView, AccountDeleteView, 
     PatientHistoryCreateView, PatientHistoryViewSet, PatientViewSet,
     DoctorViewSet, PatientMeView, 
-    PatientMeHistoryView, DoctorPatientRelationViewSet, PatientMedicalDataUpdateView, LoginView, LogoutView
+    PatientMeHistoryView, DoctorPatientRelationViewSet, PatientMedicalDataUpdateView, LoginView, LogoutView,
+    DatabasePoolStatsView
 )
 
 router = DefaultRouter()
@@ -52,6 +53,9 @@ urlpatterns = [
     # Actualización de datos médicos por Flask
     path('api/patients/medical_data_update/', PatientMedicalDataUpdateView.as_view(), name='medical_data_update'),
     
+    # Métricas del pool de conexiones a la base de datos
+    path('health/db-pool/', DatabasePoolStatsView.as_view(), name='db_pool_stats'),
+
     # ViewSets
     path('', include(router.urls)),
 ]
\ No newline at end of file
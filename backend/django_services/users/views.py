@@ -19,8 +19,6 @@ from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, Ou
 from social_django.utils import load_strategy, load_backend
 from social_core.exceptions import MissingBackend, AuthTokenError, AuthForbidden
 
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.utils.crypto import get_random_string
 from django.core.cache import cache
 
@@ -33,6 +31,9 @@ from .serializers import (
     DoctorPatientRelationSerializer
 )
 from .models import Patient, Doctor, PatientHistoryEntry, DoctorPatientRelation
+from .services import get_patient_for_response, ingest_chatbot_analysis
+from .emails import send_password_reset_code
+from common.db.pool import get_pool_stats
 
 User = get_user_model()
 
@@ -319,6 +320,13 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = UserProfileSerializerBasic(users, many=True)
         return Response(serializer.data)
     
+class DatabasePoolStatsView(APIView):
+    """Métricas del pool de conexiones a PostgreSQL (solo admin)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_pool_stats(), status=status.HTTP_200_OK)
+
 class PatientMedicalDataUpdateView(APIView):
     """
     Vista unificada para recibir y procesar datos médicos
@@ -384,6 +392,8 @@ class PatientMedicalDataUpdateView(APIView):
                 
             # Obtener o crear perfil de paciente
             patient, created = Patient.objects.get_or_create(user=user)
+            # Reutilizar el usuario ya cargado (evita consultas al guardar y calcular el perfil)
+            patient.user = user
             
         except User.DoesNotExist:
             return Response(
@@ -401,23 +411,19 @@ class PatientMedicalDataUpdateView(APIView):
             )
         
         # Actualizar información del paciente con los datos validados
-        updated = patient.update_from_chatbot_analysis(
+        # (la ingesta ya recalcula la completitud del perfil)
+        result = ingest_chatbot_analysis(
+            patient,
             serializer.validated_data,
             created_by=authenticated_user
         )
         
-        if updated:
-            # Obtener la última entrada de historial creada
-            latest_history = patient.history_entries.first()
-            
-            # Verificar si la actualización completó el perfil del usuario
-            user.check_profile_completion()
-            
+        if result.updated:
             return Response({
                 "message": "Información del paciente actualizada correctamente",
-                "patient": PatientSerializer(patient).data,
-                "profile_complete": user.is_profile_completed,
-                "history_entry": PatientHistoryEntrySerializer(latest_history).data if latest_history else None
+                "patient": PatientSerializer(get_patient_for_response(patient.pk)).data,
+                "profile_complete": result.profile_complete,
+                "history_entry": PatientHistoryEntrySerializer(result.history_entry).data
             }, status=status.HTTP_200_OK)
         else:
             return Response({
@@ -811,41 +817,27 @@ class PasswordResetRequestView(APIView):
                 # Generar un código de verificación de 6 dígitos
                 verification_code = get_random_string(6, '0123456789')
                 
-                # Guardar el código en caché con un tiempo de expiración (15 minutos)
+                # Guardar el código en caché antes de encolar el correo: el worker puede enviarlo
+                # en cuanto entra en la cola y el código ya debe ser válido (15 minutos)
                 cache_key = f"pwd_reset_{user.id}"
+                previous_code = cache.get(cache_key)
                 cache.set(cache_key, verification_code, timeout=900)  # 900 segundos = 15 minutos
-                
-                # Enviar correo con el código de verificación
-                subject = 'Código de verificación para restablecer tu contraseña'
-                html_message = render_to_string('password_reset.html', {
-                    'user': user,
-                    'code': verification_code,
-                    'valid_time': '15 minutos'
-                })
-                plain_message = f"""
-                Hola {user.first_name},
-                
-                Has solicitado restablecer tu contraseña. Utiliza el siguiente código de verificación:
-                
-                {verification_code}
-                
-                Este código es válido por 15 minutos.
-                
-                Si no has solicitado este cambio, ignora este mensaje.
-                
-                Saludos,
-                El equipo de soporte
-                """
-                
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.EMAIL_HOST_USER,
-                    [email],
-                    html_message=html_message,
-                    fail_silently=False,
-                )
-                
+
+                # Encolar el correo con el código (el envío SMTP lo hace el worker de correo)
+                try:
+                    queued = send_password_reset_code(user, verification_code)
+                except Exception:
+                    # No se pudo encolar: el código nuevo no debe quedar activo sin correo
+                    self._restore_code(cache_key, previous_code)
+                    raise
+                if not queued:
+                    # Límite de envíos superado: se mantiene el código anterior
+                    self._restore_code(cache_key, previous_code)
+                    return Response(
+                        {"message": "Si existe una cuenta con este correo, recibirás un código de verificación."},
+                        status=status.HTTP_200_OK
+                    )
+
                 return Response(
                     {
                         "message": "Se ha enviado un código de verificación a tu correo electrónico.",
@@ -859,9 +851,16 @@ class PasswordResetRequestView(APIView):
                     {"message": "Si existe una cuenta con este correo, recibirás un código de verificación."},
                     status=status.HTTP_200_OK
                 )
-                
+
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @staticmethod
+    def _restore_code(cache_key, previous_code):
+        if previous_code is None:
+            cache.delete(cache_key)
+        else:
+            cache.set(cache_key, previous_code, timeout=900)
+
 class PasswordResetVerifyView(APIView):
     """Vista para verificar el código y restablecer la contraseña"""
     permission_classes = [AllowAny]
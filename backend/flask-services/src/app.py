@@ -1,18 +1,33 @@
-from flask import Flask, request
+from services.io_engine import configure_io_engine
+
+if __name__ == '__main__':
+    # Antes de importar Flask, redis, pymongo o boto3: sus sockets tienen que ceder el hub
+    configure_io_engine()
+
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from config.config import Config
+from data.connect import check_readiness
+from data.schema import bootstrap_schema_in_background
 from routes import init_app, socketio
+from services.turn_metrics import render_metrics
 import logging
-from services.chatbot.input_validate import setup_nltk
+from services.chatbot.input_validate import verify_nltk_resources
 
 logger = logging.getLogger(__name__)
 
-setup_nltk()
-
 def create_app(config_class=Config):
     """Crear y configurar la aplicación Flask con mejor soporte para WebSockets"""
     app = Flask(__name__)
     app.config.from_object(config_class)
+
+    # Solo comprobación local: los recursos NLTK vienen instalados en la imagen
+    verify_nltk_resources()
+
+    # Índices de MongoDB: una vez por proceso y fuera del camino de las peticiones.
+    # En despliegues que ya ejecutan scripts.bootstrap_schema se puede desactivar.
+    if config_class.MONGO_SCHEMA_BOOTSTRAP_ON_STARTUP:
+        bootstrap_schema_in_background()
     
     # Configurar CORS con opciones más específicas
     CORS(app, resources={
@@ -36,6 +51,22 @@ def create_app(config_class=Config):
     except Exception as e:
         logger.error(f"Error al inicializar las rutas de Flask: {str(e)}")
     
+    @app.route('/health/live', methods=['GET'])
+    def health_live():
+        """El proceso está arriba (no toca dependencias externas)"""
+        return jsonify({"status": "ok"}), 200
+
+    @app.route('/health/ready', methods=['GET'])
+    def health_ready():
+        """MongoDB y Redis responden; 503 si alguno no está disponible"""
+        ready, checks = check_readiness()
+        return jsonify({"status": "ready" if ready else "unavailable", "checks": checks}), 200 if ready else 503
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Histogramas de latencia por etapa de los turnos de chat (formato de texto de Prometheus)"""
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
     # Añadir soporte para manejar errores de WebSocket
     @socketio.on_error()
     def handle_socket_error(e):
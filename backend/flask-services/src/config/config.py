@@ -31,6 +31,11 @@ class Config:
     MONGO_USER = os.getenv("MONGO_INITDB_ROOT_USERNAME")
     MONGO_PASS = os.getenv("MONGO_INITDB_ROOT_PASSWORD")
 
+    # Tiempo máximo de las comprobaciones de readiness (Mongo/Redis)
+    READINESS_TIMEOUT_SECONDS = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+    # Crear los índices de MongoDB al arrancar (en segundo plano) además de en el despliegue
+    MONGO_SCHEMA_BOOTSTRAP_ON_STARTUP = os.getenv("MONGO_SCHEMA_BOOTSTRAP_ON_STARTUP", "True") == "True"
+
     # Configuración Redis - usar nombres de host de Docker si estamos en contenedores
     REDIS_HOST = os.getenv("REDIS_HOST")
     REDIS_PORT = int(os.getenv("REDIS_PORT"))
@@ -44,11 +49,31 @@ class Config:
     CHAT_FORCE_PAIN_BY_TURN = int(os.getenv("CHAT_FORCE_PAIN_BY_TURN", "2"))
     CHAT_EXPERT_GUARD_MAX_QUESTIONS = int(os.getenv("CHAT_EXPERT_GUARD_MAX_QUESTIONS", "1"))
     CHAT_DECISION_LOG_FLAGS = os.getenv("CHAT_DECISION_LOG_FLAGS", "true").strip().lower() in {"1", "true", "yes", "on"}
+    # Motor de E/S: "eventlet" (por defecto, con monkey_patch al arrancar) o "threading"
+    CHAT_IO_ENGINE = os.getenv("CHAT_IO_ENGINE", "eventlet").strip().lower()
+    # URL de Redis para repartir los emits de Socket.IO entre procesos (vacío = un solo proceso)
+    CHAT_SOCKETIO_MESSAGE_QUEUE = os.getenv("CHAT_SOCKETIO_MESSAGE_QUEUE", "").strip() or None
+    # TTL de los mapas SID → usuario/conversación en Redis (se renueva en cada escritura)
+    CHAT_WS_SID_TTL_SECONDS = int(os.getenv("CHAT_WS_SID_TTL_SECONDS", str(60 * 60 * 24)))
+    # Turnos más lentos que esto (0 = nunca) se vuelcan con el desglose por etapa, en una muestra
+    CHAT_SLOW_TURN_SECONDS = float(os.getenv("CHAT_SLOW_TURN_SECONDS", "5"))
+    CHAT_SLOW_TURN_SAMPLE_RATE = float(os.getenv("CHAT_SLOW_TURN_SAMPLE_RATE", "0.1"))
+    # "regex" (por defecto, sin NLTK) o "nltk" (word_tokenize; requiere punkt instalado)
+    CHAT_TOKENIZER = os.getenv("CHAT_TOKENIZER", "regex").strip().lower()
+    # Caché Redis de entidades de Comprehend Medical por hash del texto (0 = desactivada)
+    CHAT_ENTITY_CACHE_TTL_SECONDS = int(os.getenv("CHAT_ENTITY_CACHE_TTL_SECONDS", str(60 * 60 * 24)))
+    # Extractor de entidades: "comprehend" (por defecto), "local" (diccionario, sin red) o "hybrid"
+    CHAT_ENTITY_EXTRACTOR = os.getenv("CHAT_ENTITY_EXTRACTOR", "comprehend").strip().lower()
+    # Trozos del ETL: tamaño máximo (Comprehend Medical admite 20.000 caracteres) y trozos en paralelo
+    CHAT_ENTITY_CHUNK_CHARS = int(os.getenv("CHAT_ENTITY_CHUNK_CHARS", "10000"))
+    CHAT_ENTITY_CHUNK_WORKERS = int(os.getenv("CHAT_ENTITY_CHUNK_WORKERS", "4"))
 
     # Usar la clave secreta de Django si está disponible
     JWT_SECRET =  SECRET_KEY
     JWT_SECRET_KEY = SECRET_KEY
     JWT_ALGORITHM =  os.getenv("JWT_ALGORITHM")
+    JWT_CACHE_MAX_SIZE = int(os.getenv("JWT_CACHE_MAX_SIZE", "4096"))
+    JWT_CACHE_TTL_SECONDS = int(os.getenv("JWT_CACHE_TTL_SECONDS", "300"))
     DJANGO_INTEGRATION = os.getenv("DJANGO_INTEGRATION", "False") == "True"
 
     # Configuraciones de logging
@@ -1,4 +1,15 @@
+"""Conexiones a MongoDB y Redis.
+
+Los clientes se crean de forma perezosa en el primer acceso (``from data.connect import mongo_db``
+sigue funcionando) y ninguna operación de red se ejecuta al importar el módulo.
+La comprobación de que los servicios responden se hace explícitamente con ``check_readiness()``.
+"""
+
+import threading
+import time
+
 from config.config import Config
+import pymongo
 from pymongo import MongoClient
 from bson.codec_options import CodecOptions
 from bson.binary import UuidRepresentation
@@ -7,35 +18,95 @@ import redis
 # Configurar el cliente MongoDB con UUID representation
 MONGO_URI = f"mongodb://{Config.MONGO_USER}:{Config.MONGO_PASS}@{Config.MONGO_HOST}:{Config.MONGO_PORT}/{Config.MONGO_DB}?authSource=admin"
 
-# Crear cliente con configuración de UUID
-mongo_client = MongoClient(MONGO_URI, uuidRepresentation='standard')
-
-# Configurar la base de datos con opciones de codec
-codec_options = CodecOptions(uuid_representation=UuidRepresentation.STANDARD)
-mongo_db = mongo_client[Config.MONGO_DB].with_options(codec_options=codec_options)
-
-redis_client = redis.Redis(host=Config.REDIS_HOST, port=Config.REDIS_PORT, db=Config.REDIS_DB)
-context_redis_client = redis.Redis(
-    host=Config.REDIS_HOST,
-    port=Config.REDIS_PORT,
-    db=Config.CHAT_REDIS_DB_CONTEXT,
-)
-
-# Verificar conexiones
-try:
-    mongo_client.server_info()  # Prueba la conexión a MongoDB
-    print("✅ Conexión exitosa a MongoDB")
-except Exception as e:
-    print(f"❌ Error conectando a MongoDB: {e}")
-
-try:
-    redis_client.ping()  # Prueba la conexión a Redis
-    print("✅ Conexión exitosa a Redis")
-except Exception as e:
-    print(f"❌ Error conectando a Redis: {e}")
-
-try:
-    context_redis_client.ping()  # Prueba la conexión a Redis para contexto
-    print("✅ Conexión exitosa a Redis (contexto)")
-except Exception as e:
-    print(f"❌ Error conectando a Redis de contexto: {e}")
+_lock = threading.RLock()
+_clients = {}
+
+
+def _get_or_create(name, factory):
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        if name not in _clients:
+            _clients[name] = factory()
+        return _clients[name]
+
+
+def get_mongo_client():
+    # MongoClient no abre conexiones hasta la primera operación
+    return _get_or_create("mongo_client", lambda: MongoClient(MONGO_URI, uuidRepresentation='standard'))
+
+
+def get_mongo_db():
+    # Configurar la base de datos con opciones de codec
+    codec_options = CodecOptions(uuid_representation=UuidRepresentation.STANDARD)
+    return _get_or_create(
+        "mongo_db",
+        lambda: get_mongo_client()[Config.MONGO_DB].with_options(codec_options=codec_options),
+    )
+
+
+def get_redis_client():
+    return _get_or_create(
+        "redis_client",
+        lambda: redis.Redis(host=Config.REDIS_HOST, port=Config.REDIS_PORT, db=Config.REDIS_DB),
+    )
+
+
+def get_context_redis_client():
+    return _get_or_create(
+        "context_redis_client",
+        lambda: redis.Redis(
+            host=Config.REDIS_HOST,
+            port=Config.REDIS_PORT,
+            db=Config.CHAT_REDIS_DB_CONTEXT,
+        ),
+    )
+
+
+_LAZY_ATTRIBUTES = {
+    "mongo_client": get_mongo_client,
+    "mongo_db": get_mongo_db,
+    "redis_client": get_redis_client,
+    "context_redis_client": get_context_redis_client,
+}
+
+
+def __getattr__(name):
+    # Compatibilidad con `from data.connect import mongo_db, redis_client`
+    factory = _LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
+
+
+def _timed_check(check):
+    started = time.perf_counter()
+    try:
+        check()
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+    except Exception as e:
+        return {
+            "ok": False,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "error": str(e),
+        }
+
+
+def _ping_mongo():
+    # Acota la espera de selección de servidor para que la sonda no bloquee 30 s
+    with pymongo.timeout(Config.READINESS_TIMEOUT_SECONDS):
+        get_mongo_client().admin.command("ping")
+
+
+def check_readiness():
+    """
+    Comprueba que MongoDB y las dos bases de Redis responden.
+    Devuelve (ready, detalle_por_servicio); pensado para sondas de readiness, no para el import.
+    """
+    checks = {
+        "mongo": _timed_check(_ping_mongo),
+        "redis": _timed_check(lambda: get_redis_client().ping()),
+        "redis_context": _timed_check(lambda: get_context_redis_client().ping()),
+    }
+    return all(result["ok"] for result in checks.values()), checks
@@ -0,0 +1,79 @@
+"""Esquema de MongoDB: definición única de los índices del servicio.
+
+Los índices se crean en un paso de bootstrap (despliegue o arranque), nunca desde
+constructores de servicios ni en el camino de una petición o de la ETL:
+
+    cd src && python -m scripts.bootstrap_schema
+"""
+
+import logging
+import threading
+
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+# colección -> [(claves, opciones de create_index)]
+MONGO_INDEXES = {
+    "conversations": [
+        ([("user_id", ASCENDING), ("lifecycle_status", ASCENDING), ("timestamp", DESCENDING)], {}),
+        ([("purge_after", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "conversation_embeddings": [
+        ([("user_id", ASCENDING), ("conversation_id", ASCENDING), ("timestamp", DESCENDING)], {}),
+        ([("user_id", ASCENDING), ("conversation_id", ASCENDING), ("source_turn_id", ASCENDING)], {}),
+    ],
+    "context_memory": [
+        ([("user_id", ASCENDING), ("timestamp", DESCENDING)], {}),
+        ([("user_id", ASCENDING), ("conversation_id", ASCENDING), ("timestamp", DESCENDING)], {}),
+        ([("user_id", ASCENDING), ("conversation_id", ASCENDING), ("source_turn_id", ASCENDING)], {}),
+    ],
+}
+
+_bootstrap_lock = threading.Lock()
+_bootstrapped = False
+
+
+def ensure_indexes(db=None, collections=None):
+    """
+    Crea (de forma idempotente) los índices declarados en MONGO_INDEXES.
+    Devuelve {colección: [nombres de índice]}.
+    """
+    if db is None:
+        from data.connect import get_mongo_db
+
+        db = get_mongo_db()
+
+    created = {}
+    for collection_name, indexes in MONGO_INDEXES.items():
+        if collections is not None and collection_name not in collections:
+            continue
+        collection = db[collection_name]
+        created[collection_name] = [collection.create_index(keys, **options) for keys, options in indexes]
+    return created
+
+
+def bootstrap_schema(db=None, force=False):
+    """Ejecuta ensure_indexes una sola vez por proceso (salvo force=True)."""
+    global _bootstrapped
+    with _bootstrap_lock:
+        if _bootstrapped and not force:
+            return False
+        created = ensure_indexes(db)
+        _bootstrapped = True
+    logger.info("Índices de MongoDB verificados: %s", {name: len(idx) for name, idx in created.items()})
+    return True
+
+
+def bootstrap_schema_in_background():
+    """Lanza el bootstrap sin bloquear el arranque; los errores solo se registran."""
+
+    def _run():
+        try:
+            bootstrap_schema()
+        except Exception as e:
+            logger.error("No se pudieron crear los índices de MongoDB: %s", e)
+
+    thread = threading.Thread(target=_run, name="mongo-schema-bootstrap", daemon=True)
+    thread.start()
+    return thread
@@ -5,6 +5,7 @@ import uuid
 from bson import Binary, ObjectId
 from bson.binary import UuidRepresentation
 from data.connect import mongo_db
+from data.schema import ensure_indexes
 import faiss
 import numpy as np
 import os
@@ -117,9 +118,7 @@ class ContextManagerMemory:
 
     def create_mongo_index(self):
         """Crea índices en MongoDB para acelerar las consultas por usuario y orden cronológico"""
-        self.collection.create_index([("user_id", 1), ("timestamp", -1)])
-        self.collection.create_index([("user_id", 1), ("conversation_id", 1), ("timestamp", -1)])
-        self.collection.create_index([("user_id", 1), ("conversation_id", 1), ("source_turn_id", 1)])
+        ensure_indexes(mongo_db, collections=["context_memory"])
         logger.info("Índice de MongoDB creado")
 
     def delete_context(self, user_id, doc_id):
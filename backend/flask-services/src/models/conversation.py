@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 import uuid
 from bson import Binary
 from bson.binary import UuidRepresentation
-from pymongo import ASCENDING, DESCENDING
+from pymongo import DESCENDING
 from data.connect import mongo_db, redis_client
 
 # Configurar logger
@@ -19,18 +19,14 @@ SOFT_DELETE_RETENTION_DAYS = 30
 class ConversationalDatasetManager:
     
     def __init__(self):
+        # Los índices se crean en el bootstrap de esquema (data/schema.py), no aquí
         try:
             self.collection = mongo_db['conversations']
-            self._ensure_indexes()
             logger.info("ConversationalDatasetManager inicializado correctamente")
         except Exception as e:
             logger.error(f"Error al inicializar ConversationalDatasetManager: {str(e)}")
             raise
 
-    def _ensure_indexes(self):
-        self.collection.create_index([("user_id", ASCENDING), ("lifecycle_status", ASCENDING), ("timestamp", DESCENDING)])
-        self.collection.create_index([("purge_after", ASCENDING)], expireAfterSeconds=0)
-
     def _normalize_lifecycle_status(self, conversation):
         if not isinstance(conversation, dict):
             return LIFECYCLE_ACTIVE
@@ -439,6 +435,18 @@ class ConversationalDatasetManager:
             logger.error(f"Error al sincronizar datos de Redis a MongoDB para el usuario {user_id}: {str(e)}")
             raise
 
+
+_shared_manager = None
+
+
+def get_conversational_dataset_manager():
+    """Instancia compartida del gestor (ETL, servicios de aplicación, procesado de datos)."""
+    global _shared_manager
+    if _shared_manager is None:
+        _shared_manager = ConversationalDatasetManager()
+    return _shared_manager
+
+
 class RedisCacheManager:
     # Constantes
     EXPIRATION_TIME = 60 * 60 * 24  # 24 horas en segundos
@@ -1,8 +1,16 @@
 from flask import Blueprint
 from flask_socketio import SocketIO
 
-# Inicializar SocketIO
-socketio = SocketIO(cors_allowed_origins="*")
+from config.config import Config
+from services.io_engine import socketio_async_mode
+
+# Inicializar SocketIO (modo según CHAT_IO_ENGINE). Con CHAT_SOCKETIO_MESSAGE_QUEUE los emits a
+# rooms y SIDs de otros procesos pasan por el pub/sub de Redis
+socketio = SocketIO(
+    cors_allowed_origins="*",
+    async_mode=socketio_async_mode(),
+    message_queue=Config.CHAT_SOCKETIO_MESSAGE_QUEUE,
+)
 
 bp = Blueprint('chat', __name__, url_prefix='/chat')
 
@@ -2,7 +2,9 @@ from flask import jsonify, request
 import logging
 from datetime import datetime
 from . import bp
-from routes.utils import extract_bearer_token, resolve_request_user_id, serialize_conversation_doc
+from services.auth.auth import get_token_cache_stats
+from services.chatbot.entity_detection_service import get_entity_detection_stats
+from routes.utils import extract_bearer_token, resolve_request_user_id, serialize_conversation_docs
 from services.chatbot.application.chat_turn_service import process_message_logic
 from services.chatbot.application.conversation_service import conversation_service
 from services.chatbot.application.medical_data_service import process_medical_data_for_conversation
@@ -46,7 +48,7 @@ def get_user_conversations():
     try:
         view = request.args.get("view", "active")
         conversations = conversation_service.list_conversations(user_id, view=view)
-        conversations = [serialize_conversation_doc(conv) for conv in conversations]
+        conversations = serialize_conversation_docs(conversations)
         
         return jsonify({"conversations": conversations})
     except Exception as e:
@@ -86,7 +88,7 @@ def get_conversation(conversation_id):
         if not conversation:
             return jsonify({"error": "Conversación no encontrada."}), 404
 
-        conversation = serialize_conversation_doc(conversation)
+        conversation = serialize_conversation_docs([conversation])[0]
         return jsonify({"conversation": conversation})
     except Exception as e:
         logger.error(f"Error al obtener conversación: {str(e)}")
@@ -206,3 +208,23 @@ def process_medical_data():
         logger.error(f"Error al procesar datos médicos: {str(e)}")
         return jsonify({"error": f"Error al procesar datos médicos: {str(e)}"}), 500
 
+
+
+@bp.route('/health/auth-cache', methods=['GET'])
+def auth_cache_stats():
+    user_id = resolve_request_user_id(request, allow_query_fallback=False, allow_body_fallback=False)
+
+    if not user_id:
+        return jsonify({"error": "Se requiere autenticación válida."}), 401
+
+    return jsonify(get_token_cache_stats()), 200
+
+
+@bp.route('/health/entity-cache', methods=['GET'])
+def entity_cache_stats():
+    user_id = resolve_request_user_id(request, allow_query_fallback=False, allow_body_fallback=False)
+
+    if not user_id:
+        return jsonify({"error": "Se requiere autenticación válida."}), 401
+
+    return jsonify(get_entity_detection_stats()), 200
@@ -3,6 +3,7 @@ import uuid
 from flask import request
 from flask_socketio import emit, join_room, leave_room
 from . import socketio
+from .ws_sessions import SidMap, release_disconnected_sid
 from .ws_utils import resolve_ws_leave_user_id, resolve_ws_user_id
 from services.chatbot.application.chat_turn_service import process_message_logic
 from services.chatbot.application.conversation_service import conversation_service
@@ -11,8 +12,9 @@ from services.process_data.etl_runner import clear_inactivity_timer, enqueue_etl
 
 # Configurar logger
 logger = logging.getLogger(__name__)
-AUTHENTICATED_USERS_BY_SID = {}
-ACTIVE_CONVERSATION_BY_SID = {}
+# Compartidos entre procesos a través de Redis (ver ws_sessions)
+AUTHENTICATED_USERS_BY_SID = SidMap("user")
+ACTIVE_CONVERSATION_BY_SID = SidMap("conversation")
 
 @socketio.on('connect')
 def handle_connect():
@@ -48,19 +50,19 @@ def handle_connect():
 @socketio.on('disconnect')
 def handle_disconnect(reason=None):
     sid = request.sid
-    user_id = AUTHENTICATED_USERS_BY_SID.get(sid)
-    conversation_id = ACTIVE_CONVERSATION_BY_SID.pop(sid, None)
-    if user_id and conversation_id:
+    released = release_disconnected_sid(sid, AUTHENTICATED_USERS_BY_SID, ACTIVE_CONVERSATION_BY_SID)
+    if released:
+        user_id, conversation_id = released
         run_id = str(uuid.uuid4())
         try:
             clear_inactivity_timer(user_id, conversation_id)
-            enqueue_etl_run(
+            run_id = enqueue_etl_run(
                 user_id=user_id,
                 conversation_id=conversation_id,
                 jwt_token=None,
                 reasons=["websocket_disconnect"],
                 run_id=run_id,
-            )
+            ) or run_id
             logger.info(
                 "ETL encolada por disconnect sid=%s user=%s conversation=%s run_id=%s",
                 sid,
@@ -76,7 +78,6 @@ def handle_disconnect(reason=None):
                 conversation_id,
                 str(e),
             )
-    AUTHENTICATED_USERS_BY_SID.pop(sid, None)
     logger.info(f"Cliente desconectado: {sid}. Razón: {reason}")
 
 
@@ -179,13 +180,13 @@ def on_leave_conversation(data):
             etl_run_id = str(uuid.uuid4())
             try:
                 clear_inactivity_timer(user_id, conversation_id_encrypted)
-                enqueue_etl_run(
+                etl_run_id = enqueue_etl_run(
                     user_id=user_id,
                     conversation_id=conversation_id_encrypted,
                     jwt_token=token_from_payload,
                     reasons=["websocket_room_closed"],
                     run_id=etl_run_id,
-                )
+                ) or etl_run_id
                 etl_enqueued = True
             except Exception as e:
                 logger.warning(
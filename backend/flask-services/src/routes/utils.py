@@ -9,6 +9,7 @@ from datetime import datetime
 from services.auth.auth import get_user_id_token
 from services.chatbot.application.chat_turn_service import process_message_logic
 from services.chatbot.application.conversation_service import conversational_dataset_manager
+from services.process_data.etl_state_store import with_live_etl_state
 
 
 def serialize_timestamp(value):
@@ -32,6 +33,11 @@ def serialize_conversation_doc(conversation):
     return serialized
 
 
+def serialize_conversation_docs(conversations):
+    """Serializa conversaciones con el estado ETL vigente (Redis sobre Mongo, en una sola consulta)."""
+    return [serialize_conversation_doc(conversation) for conversation in with_live_etl_state(list(conversations))]
+
+
 def extract_bearer_token(auth_header: str | None) -> str | None:
     if not auth_header:
         return None
@@ -63,5 +69,6 @@ __all__ = [
     "process_message_logic",
     "resolve_request_user_id",
     "serialize_conversation_doc",
+    "serialize_conversation_docs",
     "serialize_timestamp",
 ]
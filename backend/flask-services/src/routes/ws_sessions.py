@@ -0,0 +1,116 @@
+"""
+Estado de las conexiones WebSocket compartido entre procesos.
+
+Con varios procesos del servicio de chat detrás de nginx, un cliente puede reconectar en otro
+proceso. Por eso los mapas SID → user_id y SID → conversación no pueden ser diccionarios del
+módulo. Viven en Redis (`ws:sid:{nombre}:{sid}`) con TTL (CHAT_WS_SID_TTL_SECONDS). La TTL se
+renueva con cada escritura y limpia los SID de procesos que murieron sin recibir el disconnect.
+
+SidMap expone get/pop/asignación como un dict para que ws_utils no cambie. Si Redis no responde,
+el mapa sigue funcionando en memoria del proceso, como antes.
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from config.config import Config
+from data.connect import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Ventana en la que un solo proceso puede encolar la ETL por disconnect de una conversación
+_DISCONNECT_CLAIM_SECONDS = max(1, int(float(os.getenv("WS_DISCONNECT_CLAIM_SECONDS", "5"))))
+
+
+def _decode(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+class SidMap:
+    KEY_SID = "ws:sid:{name}:{sid}"
+
+    def __init__(self, name: str, ttl_seconds: Optional[int] = None, redis_client=None):
+        self.name = name
+        self.ttl_seconds = max(1, int(ttl_seconds if ttl_seconds is not None else Config.CHAT_WS_SID_TTL_SECONDS))
+        self._redis_client = redis_client
+        self._local: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _redis(self):
+        return self._redis_client if self._redis_client is not None else get_redis_client()
+
+    def _key(self, sid: str) -> str:
+        return self.KEY_SID.format(name=self.name, sid=sid)
+
+    def _warn(self, action: str, sid: str, error: Exception) -> None:
+        logger.warning("Mapa %s no disponible en Redis (%s %s): %s", self.name, action, sid, str(error))
+
+    def __setitem__(self, sid: str, value: str) -> None:
+        try:
+            self._redis().set(self._key(sid), value, ex=self.ttl_seconds)
+        except Exception as e:
+            self._warn("set", sid, e)
+            with self._lock:
+                self._local[sid] = value
+
+    def get(self, sid: str, default=None):
+        try:
+            value = _decode(self._redis().get(self._key(sid)))
+        except Exception as e:
+            self._warn("get", sid, e)
+            value = None
+        if value is None:
+            with self._lock:
+                value = self._local.get(sid)
+        return default if value is None else value
+
+    def pop(self, sid: str, default=None):
+        """Lee y borra de forma atómica (GETDEL): solo un llamador obtiene el valor."""
+        try:
+            value = _decode(self._redis().getdel(self._key(sid)))
+        except Exception as e:
+            self._warn("pop", sid, e)
+            value = None
+        with self._lock:
+            local = self._local.pop(sid, None)
+        if value is None:
+            value = local
+        return default if value is None else value
+
+
+def claim_disconnect_etl(user_id: str, conversation_id: str, redis_client=None) -> bool:
+    """
+    Reserva (SET NX con TTL) la ETL por disconnect de una conversación. Si el usuario tenía
+    varias conexiones en procesos distintos, solo el primero que se desconecte la encola dentro de
+    la ventana. El resto de disparos del mismo proceso ya los agrupa etl_runner. Sin Redis se
+    permite siempre.
+    """
+    key = f"ws:etl_claim:{user_id}:{conversation_id}"
+    try:
+        client = redis_client if redis_client is not None else get_redis_client()
+        return bool(client.set(key, "1", nx=True, ex=_DISCONNECT_CLAIM_SECONDS))
+    except Exception as e:
+        logger.warning("No se pudo reservar la ETL por disconnect de %s en Redis: %s", conversation_id, str(e))
+        return True
+
+
+def release_disconnected_sid(
+    sid: str, users: SidMap, conversations: SidMap, redis_client=None
+) -> Optional[Tuple[str, str]]:
+    """
+    Libera el SID al desconectarse. Devuelve (user_id, conversation_id) si a este proceso le
+    toca encolar la ETL de cierre, o None. El GETDEL garantiza que un disconnect repetido del
+    mismo SID no la encole dos veces.
+    """
+    conversation_id = conversations.pop(sid)
+    user_id = users.pop(sid)
+    if not user_id or not conversation_id:
+        return None
+    if not claim_disconnect_etl(user_id, conversation_id, redis_client=redis_client):
+        logger.info("ETL por disconnect de %s ya encolada por otro proceso", conversation_id)
+        return None
+    return user_id, conversation_id
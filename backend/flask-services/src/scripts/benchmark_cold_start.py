@@ -0,0 +1,95 @@
+"""Benchmark de arranque en frío del servicio Flask.
+
+Cada repetición lanza un intérprete nuevo y mide:
+  - import_ms: importar ``app`` (rutas, servicios, conexiones perezosas)
+  - create_app_ms: construir la aplicación
+  - first_request_ms: primera petición a ``/health/live``
+  - time_to_first_request_ms: total desde el arranque del proceso hijo
+
+Uso:
+    python src/scripts/benchmark_cold_start.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+_CHILD_CODE = """
+import json, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+flask_app = app_module.create_app()
+t2 = time.perf_counter()
+response = flask_app.test_client().get('/health/live')
+t3 = time.perf_counter()
+print(json.dumps({
+    "status_code": response.status_code,
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+}))
+"""
+
+PHASES = ("import_ms", "create_app_ms", "first_request_ms", "time_to_first_request_ms")
+
+
+def run_once(timeout: float) -> dict:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHILD_CODE],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        env=os.environ.copy(),
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip() or "El proceso hijo terminó con error")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    # Incluye el arranque del intérprete, no solo el import
+    result["time_to_first_request_ms"] = wall_ms
+    return result
+
+
+def summarize(results: list) -> dict:
+    summary = {}
+    for phase in PHASES:
+        values = [r[phase] for r in results]
+        summary[phase] = {
+            "median": round(statistics.median(values), 1),
+            "min": round(min(values), 1),
+            "max": round(max(values), 1),
+        }
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mide el tiempo hasta la primera petición del servicio Flask.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Segundos máximos por arranque")
+    parser.add_argument("--json", action="store_true", help="Imprime el resultado en JSON")
+    args = parser.parse_args(argv)
+
+    results = [run_once(args.timeout) for _ in range(max(1, args.runs))]
+    summary = summarize(results)
+
+    if args.json:
+        print(json.dumps({"runs": len(results), "summary": summary}, indent=2))
+        return 0
+
+    print(f"Arranques en frío: {len(results)}")
+    for phase, stats in summary.items():
+        print(f"  {phase:<26} mediana={stats['median']:>8} ms  min={stats['min']:>8} ms  max={stats['max']:>8} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Benchmark del detector de emergencias con el conjunto de reglas actual y ampliado (x10 por defecto).
+
+Compara el escaneo compilado (EmergencyMatcher) con la comprobación keyword a keyword.
+
+Uso:
+    cd src && python -m scripts.benchmark_emergency_guard --scale 10
+"""
+
+import argparse
+import copy
+import statistics
+import time
+
+from services.expert_system.emergency_guard import EmergencyMatcher
+from services.expert_system.loader import load_knowledge_base
+from services.expert_system.normalization import normalize_text
+
+MESSAGES = [
+    "Tengo dolor de cabeza desde ayer y algo de náuseas",
+    "Me siento muy ansioso, con palpitaciones y no duermo bien",
+    "Anoche bebí mucho y hoy tengo temblor en las manos",
+    "Tengo dolor de pecho y me cuesta respirar",
+    "No quiero vivir, ya no aguanto más",
+    "Me duele la rodilla al subir escaleras desde hace una semana",
+]
+
+
+def scale_rules(emergency_rules, factor):
+    """Replica cada regla `factor` veces con keywords distintas (mismo tamaño y forma)."""
+    scaled = copy.deepcopy(dict(emergency_rules))
+    for key in ("global_red_flags", "psychological_crisis_flags"):
+        items = emergency_rules.get(key, [])
+        scaled[key] = [
+            {**item, "rule_id": f"{item['rule_id']}_{i}", "keyword": f"{item['keyword']} {i}" if i else item["keyword"]}
+            for i in range(factor)
+            for item in items
+        ]
+    scaled["case_red_flags"] = {
+        case_id: [
+            {**item, "rule_id": f"{item['rule_id']}_{i}", "keyword": f"{item['keyword']} {i}" if i else item["keyword"]}
+            for i in range(factor)
+            for item in items
+        ]
+        for case_id, items in emergency_rules.get("case_red_flags", {}).items()
+    }
+    return scaled
+
+
+def naive_detect(text, emergency_rules, case_id=None):
+    matched = []
+    for item in emergency_rules.get("global_red_flags", []):
+        if normalize_text(item["keyword"]) in text:
+            matched.append(item["rule_id"])
+    for item in emergency_rules.get("case_red_flags", {}).get(case_id, []):
+        if normalize_text(item["keyword"]) in text:
+            matched.append(item["rule_id"])
+    for item in emergency_rules.get("psychological_crisis_flags", []):
+        if normalize_text(item["keyword"]) in text:
+            matched.append(item["rule_id"])
+    return matched
+
+
+def _time_per_message_us(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for message in MESSAGES:
+            fn(message)
+        samples.append((time.perf_counter() - started) / len(MESSAGES) * 1e6)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    base_rules = load_knowledge_base()["emergency"]
+    for factor in sorted({1, max(1, args.scale)}):
+        rules = scale_rules(base_rules, factor)
+        matcher = EmergencyMatcher(rules)
+        compiled_us = _time_per_message_us(
+            lambda m: matcher.match(normalize_text(m), case_id="headache_case"), args.rounds
+        )
+        naive_us = _time_per_message_us(
+            lambda m: naive_detect(normalize_text(m), rules, case_id="headache_case"), args.rounds
+        )
+        print(
+            f"x{factor:<3} reglas={matcher.rule_count:<4} compilado={compiled_us:8.1f} us/mensaje  "
+            f"keyword a keyword={naive_us:8.1f} us/mensaje"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Microbenchmarks del camino de reglas por turno del sistema experto.
+
+Mide detect_best_case, extract_case_fields, classify_triage_level, detect_emergency,
+extract_pain_scale y extract_duration_text con mensajes en español, con curvas de escala
+sobre el número de reglas (base de conocimiento replicada xN) y la longitud del mensaje.
+
+Los tiempos se guardan normalizados por una carga de calibración fija, de modo que una
+línea base generada en otra máquina sigue siendo comparable (con margen).
+
+Uso:
+    cd src && python -m scripts.benchmark_expert_system
+    cd src && python -m scripts.benchmark_expert_system --save             # actualiza la línea base
+    cd src && python -m scripts.benchmark_expert_system --compare          # falla (exit 1) si hay regresión
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from scripts.benchmark_emergency_guard import scale_rules
+from services.chatbot.duration_utils import _has_duration_clue
+from services.chatbot.pain_utils import _parse_pain_scales
+from services.expert_system.compiled_kb import CompiledKnowledgeBase, compile_knowledge_base
+from services.expert_system.emergency_guard import detect_emergency
+from services.expert_system.loader import read_rules
+from services.expert_system.rule_engine import classify_triage_level, detect_best_case, extract_case_fields
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "expert_system_benchmark.json")
+DEFAULT_SCALES = (1, 5, 20)
+DEFAULT_LENGTHS = (8, 32, 128, 512)
+DEFAULT_TOLERANCE = 0.30
+
+# Frases de pacientes (mezcla de casos, emergencias, dolor, duración y ruido)
+CORPUS = [
+    "Tengo dolor de cabeza desde hace tres días y me molesta la luz.",
+    "Empezó de repente anoche, el dolor es 8 de 10.",
+    "Me siento muy ansioso, con palpitaciones y no duermo bien desde hace semanas.",
+    "Anoche bebí bastante cerveza y hoy tengo temblor en las manos y náuseas.",
+    "El dolor es leve, como un 3, pero no se me quita.",
+    "Llevo dos semanas con migraña y vómitos de vez en cuando.",
+    "No puedo concentrarme en el trabajo por el estrés del examen.",
+    "Hace un mes que tomo alcohol casi todos los días, unas cuatro copas.",
+    "Tengo una presión en el pecho y me cuesta respirar al subir escaleras.",
+    "Desde ayer tengo mareo y la visión un poco borrosa.",
+    "A veces siento que no quiero vivir y que todo me supera.",
+    "Mi última bebida fue hoy por la mañana, y sudo mucho.",
+    "El dolor de cabeza aparece por las tardes, poco a poco, después de clase.",
+    "Me duele la rodilla al caminar, creo que es moderado.",
+    "Gracias por la ayuda, mañana te cuento cómo sigo.",
+]
+CASE_ID = "headache_case"
+
+
+def build_messages(length_words: int, count: int = len(CORPUS)) -> List[str]:
+    """Mensajes de aproximadamente `length_words` palabras encadenando frases del corpus."""
+    messages = []
+    for start in range(count):
+        words: List[str] = []
+        index = start
+        while len(words) < length_words:
+            words.extend(CORPUS[index % len(CORPUS)].split())
+            index += 1
+        messages.append(" ".join(words[:length_words]))
+    return messages
+
+
+def _suffixed(values: Sequence[Any], suffix: int) -> List[Any]:
+    return [f"{value} {suffix}" if suffix else value for value in values]
+
+
+def scale_knowledge_base(raw_kb: Dict[str, Any], factor: int) -> Dict[str, Any]:
+    """Replica casos, banderas rojas y marcadores de triaje `factor` veces con keywords distintas."""
+    cases = {}
+    for i in range(max(1, factor)):
+        for case_id, case_def in raw_kb["cases"].items():
+            scaled_id = f"{case_id}_{i}" if i else case_id
+            cases[scaled_id] = {
+                **case_def,
+                "case_id": scaled_id,
+                "intent_keywords": _suffixed(case_def.get("intent_keywords", []), i),
+            }
+    triage_policy = dict(raw_kb["triage_policy"])
+    for key in ("severe_markers", "moderate_markers"):
+        markers = raw_kb["triage_policy"].get(key, [])
+        triage_policy[key] = [m for i in range(max(1, factor)) for m in _suffixed(markers, i)]
+    return {
+        "cases": cases,
+        "emergency": scale_rules(raw_kb["emergency"], max(1, factor)),
+        "triage_policy": triage_policy,
+    }
+
+
+def benchmark_targets(kb: CompiledKnowledgeBase) -> Dict[str, Callable[[str], Any]]:
+    case_def = kb.cases[CASE_ID]
+    compiled_case = kb.compiled_cases[CASE_ID]
+    triage_policy = kb.triage_policy
+    emergency = kb.emergency
+    return {
+        "detect_best_case": lambda m: detect_best_case(m, kb.cases, matcher=kb.case_matcher),
+        "extract_case_fields": lambda m: extract_case_fields(case_def=case_def, user_message=m, compiled_case=compiled_case),
+        "classify_triage_level": lambda m: classify_triage_level(CASE_ID, 4, m, triage_policy),
+        "detect_emergency": lambda m: detect_emergency(m, emergency, case_id=CASE_ID, matcher=kb.emergency_matcher),
+        # Sin la memoización por texto: se mide el análisis, no el acierto de caché
+        "extract_pain_scale": lambda m: max(_parse_pain_scales.__wrapped__(m) or (0,)),
+        "extract_duration_text": lambda m: _has_duration_clue.__wrapped__(m.strip()),
+    }
+
+
+# Las funciones de texto no dependen del número de reglas: solo se miden con x1
+RULE_DEPENDENT = {"detect_best_case", "extract_case_fields", "classify_triage_level", "detect_emergency"}
+
+
+def time_per_call_us(fn: Callable[[str], Any], messages: List[str], rounds: int) -> float:
+    fn(messages[0])  # calentamiento (cachés de re, etc.)
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for message in messages:
+            fn(message)
+        samples.append((time.perf_counter() - started) / len(messages) * 1e6)
+    # Mínimo de las rondas (como timeit): lo menos afectado por el ruido del sistema
+    return min(samples)
+
+
+def calibration_us(rounds: int = 30) -> float:
+    """Carga fija (regex, normalización y dict) para comparar resultados entre máquinas."""
+    import re
+    import unicodedata
+
+    word_re = re.compile(r"[a-z]+")
+
+    def _workload(sentence):
+        counts: Dict[str, int] = {}
+        text = unicodedata.normalize("NFKD", sentence.lower())
+        for word in word_re.findall(text):
+            counts[word] = counts.get(word, 0) + 1
+        return sorted(counts.items())
+
+    return time_per_call_us(_workload, CORPUS, rounds)
+
+
+def run_suite(
+    scales: Sequence[int] = DEFAULT_SCALES,
+    lengths: Sequence[int] = DEFAULT_LENGTHS,
+    rounds: int = 30,
+    only: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    raw_kb = read_rules()
+    messages_by_length = {length: build_messages(length) for length in lengths}
+    results: Dict[str, Dict[str, float]] = {}
+    # La calibración se repite a lo largo de la ejecución para absorber cambios de frecuencia de CPU
+    calibrations = [calibration_us()]
+    for factor in scales:
+        kb = compile_knowledge_base(scale_knowledge_base(raw_kb, factor))
+        for name, fn in benchmark_targets(kb).items():
+            if only and name not in only:
+                continue
+            if factor != scales[0] and name not in RULE_DEPENDENT:
+                continue
+            for length, messages in messages_by_length.items():
+                results.setdefault(name, {})[f"x{factor}/w{length}"] = round(time_per_call_us(fn, messages, rounds), 3)
+        calibrations.append(calibration_us())
+    return {"calibration_us": round(min(calibrations), 3), "unit": "us/llamada", "results": results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """Mediciones que empeoran más de `tolerance` respecto a la línea base (tras normalizar por calibración)."""
+    machine_factor = current["calibration_us"] / baseline["calibration_us"] if baseline.get("calibration_us") else 1.0
+    regressions = []
+    for name, points in current["results"].items():
+        for point, value in points.items():
+            reference = baseline.get("results", {}).get(name, {}).get(point)
+            if not reference:
+                continue
+            ratio = value / (reference * machine_factor)
+            if ratio > 1.0 + tolerance:
+                regressions.append({"benchmark": name, "point": point, "baseline": reference, "current": value, "ratio": round(ratio, 2)})
+    return regressions
+
+
+def merge_reports(report: Dict[str, Any], rerun: Dict[str, Any]) -> Dict[str, Any]:
+    """Combina dos ejecuciones quedándose con el mejor tiempo de cada punto."""
+    results = {name: dict(points) for name, points in report["results"].items()}
+    for name, points in rerun["results"].items():
+        for point, value in points.items():
+            previous = results.setdefault(name, {}).get(point)
+            results[name][point] = value if previous is None else min(previous, value)
+    calibration = min(report["calibration_us"], rerun["calibration_us"])
+    return {**report, "calibration_us": calibration, "results": results}
+
+
+def _print_results(report: Dict[str, Any]) -> None:
+    print(f"calibración: {report['calibration_us']:.1f} us")
+    for name, points in report["results"].items():
+        print(name)
+        for point, value in points.items():
+            print(f"  {point:<10} {value:10.2f} us/llamada")
+
+
+def _parse_ints(raw: str) -> List[int]:
+    return [int(value) for value in raw.split(",") if value.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="Factores de réplica de reglas")
+    parser.add_argument("--lengths", default=",".join(map(str, DEFAULT_LENGTHS)), help="Longitudes de mensaje (palabras)")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--only", default="", help="Lista de benchmarks separada por comas")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="Guarda el resultado como línea base")
+    parser.add_argument("--compare", action="store_true", help="Compara con la línea base y falla si hay regresión")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--retries", type=int, default=2, help="Remediciones de los benchmarks que parecen regresar")
+    args = parser.parse_args(argv)
+
+    only = [name.strip() for name in args.only.split(",") if name.strip()] or None
+    report = run_suite(_parse_ints(args.scales), _parse_ints(args.lengths), args.rounds, only)
+    _print_results(report)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Línea base guardada en {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        # Una regresión solo cuenta si se repite: se vuelven a medir los benchmarks afectados
+        for _ in range(max(0, args.retries)):
+            if not regressions:
+                break
+            rerun = run_suite(
+                _parse_ints(args.scales),
+                _parse_ints(args.lengths),
+                args.rounds,
+                sorted({item["benchmark"] for item in regressions}),
+            )
+            report = merge_reports(report, rerun)
+            regressions = compare(report, baseline, args.tolerance)
+        for item in regressions:
+            print(
+                f"REGRESIÓN {item['benchmark']} {item['point']}: {item['baseline']:.2f} -> {item['current']:.2f} us "
+                f"(x{item['ratio']})"
+            )
+        if regressions:
+            return 1
+        print(f"Sin regresiones (tolerancia {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
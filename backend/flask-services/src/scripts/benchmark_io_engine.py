@@ -0,0 +1,197 @@
+"""Capacidad de conversaciones concurrentes por proceso según el motor de E/S.
+
+Levanta un servidor HTTP local que responde con una latencia fija, como Bedrock o Django. Para
+cada modo y nivel de concurrencia, un subproceso lanza N conversaciones a la vez. Cada turno hace
+una petición bloqueante con `requests`, como las llamadas reales, y un poco de cálculo.
+
+Modos:
+  - eventlet-unpatched: la configuración anterior (hub de eventlet con E/S bloqueante).
+  - eventlet: con eventlet.monkey_patch() (CHAT_IO_ENGINE=eventlet).
+  - threading: hilos del sistema (CHAT_IO_ENGINE=threading).
+
+Se muestran los turnos por segundo y el p95 de cada nivel. La capacidad de un modo es la mayor
+concurrencia con un p95 de hasta --slo-factor veces la latencia del servidor.
+
+Uso:
+    cd src && python -m scripts.benchmark_io_engine
+    cd src && python -m scripts.benchmark_io_engine --concurrency 1,25,100 --latency-ms 200
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence
+
+MODES = ("eventlet-unpatched", "eventlet", "threading")
+DEFAULT_CONCURRENCY = (1, 10, 50, 100)
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_stub_server(latency_ms: float) -> ThreadingHTTPServer:
+    """Servidor local que contesta cada POST tras `latency_ms` (como una llamada al modelo)."""
+    import threading
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(latency_ms / 1000.0)
+            body = b'{"completion": "ok"}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class _Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 1024
+
+    server = _Server(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _worker(mode: str, url: str, concurrency: int, turns: int, cpu_iterations: int) -> Dict[str, float]:
+    """Ejecuta la carga dentro de este proceso con el modo indicado y devuelve las métricas."""
+    if mode == "eventlet":
+        import eventlet
+
+        eventlet.monkey_patch()
+    # requests se importa después del parche, como hace app.py con los clientes de E/S
+    import requests
+
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    def conversation(index: int) -> None:
+        # La latencia de cada turno cuenta desde que la conversación está lista (el inicio de la
+        # carga o el fin del turno anterior), así incluye la espera si el proceso está bloqueado
+        ready = burst_started
+        session = requests.Session()
+        for turn in range(turns):
+            try:
+                session.post(url, json={"conversation": index, "turn": turn}, timeout=60).json()
+            except requests.RequestException as e:
+                errors.append(type(e).__name__)
+                continue
+            sum(i * i for i in range(cpu_iterations))
+            finished = time.perf_counter()
+            latencies.append(finished - ready)
+            ready = finished
+
+    burst_started = started = time.perf_counter()
+    if mode.startswith("eventlet"):
+        import eventlet
+
+        pool = eventlet.GreenPool(concurrency)
+        for index in range(concurrency):
+            pool.spawn(conversation, index)
+        pool.waitall()
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(conversation, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "turns_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "errors": len(errors),
+    }
+
+
+def measure(mode: str, url: str, concurrency: int, turns: int, cpu_iterations: int) -> Dict[str, float]:
+    """Lanza un subproceso por medición: el parche de eventlet es global al proceso."""
+    completed = subprocess.run(
+        [
+            sys.executable, "-m", "scripts.benchmark_io_engine", "--worker", mode, "--url", url,
+            "--concurrency", str(concurrency), "--turns", str(turns), "--cpu-iterations", str(cpu_iterations),
+        ],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Falló la medición {mode}/{concurrency}:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(
+    modes: Sequence[str] = MODES,
+    levels: Sequence[int] = DEFAULT_CONCURRENCY,
+    latency_ms: float = 100.0,
+    turns: int = 3,
+    cpu_iterations: int = 20000,
+    slo_factor: float = 2.0,
+):
+    server = start_stub_server(latency_ms)
+    url = f"http://127.0.0.1:{server.server_address[1]}/model/invoke"
+    try:
+        rows = []
+        for mode in modes:
+            for level in levels:
+                rows.append({"mode": mode, "concurrency": level, **measure(mode, url, level, turns, cpu_iterations)})
+    finally:
+        server.shutdown()
+    capacity = {
+        mode: max(
+            (
+                row["concurrency"]
+                for row in rows
+                if row["mode"] == mode and not row["errors"] and row["p95_ms"] <= slo_factor * latency_ms
+            ),
+            default=0,
+        )
+        for mode in modes
+    }
+    return rows, capacity
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)), help="Niveles de concurrencia")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Latencia del servidor simulado")
+    parser.add_argument("--turns", type=int, default=3, help="Turnos por conversación")
+    parser.add_argument("--cpu-iterations", type=int, default=20000, help="Cálculo por turno")
+    parser.add_argument("--slo-factor", type=float, default=2.0)
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(_worker(args.worker, args.url, int(args.concurrency), args.turns, args.cpu_iterations)))
+        return 0
+
+    modes = [mode for mode in args.modes.split(",") if mode]
+    levels = [int(value) for value in args.concurrency.split(",") if value.strip()]
+    rows, capacity = run(modes, levels, args.latency_ms, args.turns, args.cpu_iterations, args.slo_factor)
+    print(f"{'modo':>20} {'conc':>5} {'turnos/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errores':>8}")
+    for row in rows:
+        print(
+            f"{row['mode']:>20} {row['concurrency']:>5} {row['turns_per_s']:>9.1f} "
+            f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['errors']:>8}"
+        )
+    print(f"\nCapacidad (p95 <= {args.slo_factor:g} x {args.latency_ms:g} ms):")
+    for mode, level in capacity.items():
+        print(f"  {mode}: {level} conversaciones concurrentes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Compara el tokenizador regex del chatbot con `nltk.word_tokenize`.
+
+Tokeniza el corpus de mensajes del benchmark del sistema experto (plegado como en
+validate_input) con ambos tokenizadores, comprueba que el resultado es idéntico y muestra
+el tiempo por mensaje y la mejora.
+
+Si los datos de punkt no están instalados se usa Punkt sin entrenar + NLTKWordTokenizer,
+que es lo mismo que hace word_tokenize salvo el modelo de abreviaturas en inglés.
+
+Uso:
+    cd src && python -m scripts.benchmark_tokenizer
+    cd src && python -m scripts.benchmark_tokenizer --lengths 8,32,128 --rounds 50
+"""
+
+import argparse
+import sys
+from typing import Callable, List
+
+from scripts.benchmark_expert_system import build_messages, time_per_call_us
+from services.chatbot.input_validate import normalize_text
+from services.chatbot.tokenizer import regex_tokenize
+
+DEFAULT_LENGTHS = (4, 16, 64)
+
+
+def nltk_reference_tokenizer() -> Callable[[str], List[str]]:
+    """`word_tokenize` si punkt está instalado; si no, su reconstrucción con Punkt sin entrenar."""
+    from nltk.tokenize import NLTKWordTokenizer, word_tokenize
+    from nltk.tokenize.punkt import PunktSentenceTokenizer
+
+    try:
+        word_tokenize("hola.")
+        return word_tokenize
+    except LookupError:
+        sentences = PunktSentenceTokenizer()
+        words = NLTKWordTokenizer()
+        return lambda text: [token for sentence in sentences.tokenize(text) for token in words.tokenize(sentence)]
+
+
+def run(lengths=DEFAULT_LENGTHS, rounds: int = 30):
+    reference = nltk_reference_tokenizer()
+    rows = []
+    for length in lengths:
+        messages = [normalize_text(message) for message in build_messages(length)]
+        mismatches = sum(1 for message in messages if reference(message) != regex_tokenize(message))
+        nltk_us = time_per_call_us(reference, messages, rounds)
+        regex_us = time_per_call_us(regex_tokenize, messages, rounds)
+        rows.append(
+            {
+                "words": length,
+                "nltk_us": round(nltk_us, 2),
+                "regex_us": round(regex_us, 2),
+                "speedup": round(nltk_us / regex_us, 1),
+                "mismatches": mismatches,
+            }
+        )
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", default=",".join(map(str, DEFAULT_LENGTHS)), help="Longitudes de mensaje (palabras)")
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    lengths = [int(value) for value in args.lengths.split(",") if value.strip()]
+    rows = run(lengths, args.rounds)
+    print(f"{'palabras':>8} {'nltk us':>10} {'regex us':>10} {'mejora':>8} {'difs':>5}")
+    for row in rows:
+        print(
+            f"{row['words']:>8} {row['nltk_us']:>10.2f} {row['regex_us']:>10.2f} "
+            f"{row['speedup']:>7.1f}x {row['mismatches']:>5}"
+        )
+    return 1 if any(row["mismatches"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+import logging
+
+from data.schema import ensure_indexes
+
+
+logger = logging.getLogger(__name__)
+
+
+def run_bootstrap():
+    created = ensure_indexes()
+    for collection_name, index_names in created.items():
+        logger.info("Índices en %s: %s", collection_name, ", ".join(index_names))
+    print(f"OK schema bootstrap: {sum(len(names) for names in created.values())} índices verificados")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_bootstrap()
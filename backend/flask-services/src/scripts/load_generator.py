@@ -0,0 +1,313 @@
+"""Prueba de carga extremo a extremo del servicio de chat con pacientes sintéticos.
+
+Cada paciente reproduce una conversación de un corpus JSONL, con una línea por conversación:
+`{"id": ..., "context": {...}, "messages": ["...", ...]}` (por defecto scripts/load_corpus.jsonl).
+Los pacientes se envían por HTTP (`POST /chat/message`) o por Socket.IO (evento `chat_message`,
+con la respuesta en `chat_response`). Varios pacientes pueden reproducir la misma conversación.
+El informe da la latencia por turno (p50/p95/p99), los turnos por segundo y los errores.
+
+Con --spawn-app el script arranca todo sin AWS:
+  - los sustitutos locales de Bedrock, Comprehend Medical y Django (scripts.load_stubs), con sus
+    latencias configurables;
+  - el servicio (app.py) apuntando a ellos.
+Mongo y Redis son los del entorno (REDIS_HOST, MONGO_HOST...), p. ej. los contenedores de
+`docker compose up -d mongo redis`.
+
+Uso:
+    cd src && python -m scripts.load_generator --url http://localhost:5000 --patients 200
+    cd src && python -m scripts.load_generator --spawn-app --patients 2000 --transport socketio \\
+        --bedrock-latency lognormal:800,0.4 --json informe.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from scripts.benchmark_io_engine import percentile
+from scripts.load_stubs import DEFAULT_LATENCIES, stub_environment
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = os.path.join(SRC_DIR, "scripts", "load_corpus.jsonl")
+TRANSPORTS = ("http", "socketio")
+ENGINES = ("eventlet", "threading")
+APP_PORT = 5000
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    conversations = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            messages = [m for m in record.get("messages") or [] if isinstance(m, str) and m.strip()]
+            if not messages:
+                raise ValueError(f"{path}:{line_number}: la conversación no tiene mensajes")
+            conversations.append(
+                {"id": str(record.get("id") or line_number), "context": record.get("context") or {}, "messages": messages}
+            )
+    if not conversations:
+        raise ValueError(f"{path}: corpus vacío")
+    return conversations
+
+
+class LoadRecorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.completed_conversations = 0
+
+    def turn(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def error(self, kind: str) -> None:
+        with self._lock:
+            self.errors[kind] += 1
+
+    def conversation_done(self) -> None:
+        with self._lock:
+            self.completed_conversations += 1
+
+    def report(self, elapsed: float, patients: int) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self.latencies)
+            errors = dict(self.errors)
+            completed = self.completed_conversations
+        return {
+            "patients": patients,
+            "conversations_completed": completed,
+            "turns": len(latencies),
+            "errors": errors,
+            "elapsed_s": round(elapsed, 3),
+            "turns_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        }
+
+
+def _http_patient(base_url: str, user_id: str, conversation: Dict[str, Any], recorder: LoadRecorder, think: float, timeout: float):
+    import requests
+
+    session = requests.Session()
+    conversation_id = None
+    for message in conversation["messages"]:
+        payload = {"message": message, "user_id": user_id, "context": conversation["context"]}
+        if conversation_id:
+            payload["conversation_id"] = conversation_id
+        started = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}/chat/message", json=payload, timeout=timeout)
+        except requests.RequestException as e:
+            recorder.error(type(e).__name__)
+            return
+        if response.status_code != 200:
+            recorder.error(f"http_{response.status_code}")
+            return
+        recorder.turn(time.perf_counter() - started)
+        conversation_id = response.json().get("conversation_id") or conversation_id
+        if think:
+            time.sleep(think)
+    recorder.conversation_done()
+
+
+def _socketio_patient(base_url: str, user_id: str, conversation: Dict[str, Any], recorder: LoadRecorder, think: float, timeout: float):
+    import socketio
+
+    client = socketio.Client(reconnection=False)
+    replies: Dict[str, Any] = {}
+    answered = threading.Event()
+
+    @client.on("chat_response")
+    def _on_response(data):
+        replies["data"] = data
+        answered.set()
+
+    @client.on("error")
+    def _on_error(data):
+        replies["error"] = data
+        answered.set()
+
+    try:
+        # Transportes por defecto: polling y upgrade a WebSocket si websocket-client está instalado
+        client.connect(base_url, wait_timeout=timeout)
+    except Exception as e:
+        recorder.error(f"connect_{type(e).__name__}")
+        return
+    conversation_id = None
+    try:
+        for message in conversation["messages"]:
+            replies.clear()
+            answered.clear()
+            payload = {"message": message, "user_id": user_id, "context": conversation["context"]}
+            if conversation_id:
+                payload["conversation_id"] = conversation_id
+            started = time.perf_counter()
+            client.emit("chat_message", payload)
+            if not answered.wait(timeout):
+                recorder.error("timeout")
+                return
+            if "error" in replies:
+                recorder.error("socket_error")
+                return
+            recorder.turn(time.perf_counter() - started)
+            conversation_id = (replies.get("data") or {}).get("conversation_id") or conversation_id
+            if think:
+                time.sleep(think)
+        recorder.conversation_done()
+    finally:
+        client.disconnect()
+
+
+def run_load(
+    base_url: str,
+    corpus: List[Dict[str, Any]],
+    patients: int,
+    transport: str = "http",
+    engine: str = "threading",
+    ramp_seconds: float = 0.0,
+    think_ms: float = 0.0,
+    timeout: float = 60.0,
+) -> Dict[str, Any]:
+    """Lanza `patients` pacientes concurrentes (repartiendo su inicio en `ramp_seconds`) y devuelve el informe."""
+    recorder = LoadRecorder()
+    run_tag = uuid.uuid4().hex[:8]
+    patient_fn = _socketio_patient if transport == "socketio" else _http_patient
+    base_url = base_url.rstrip("/")
+
+    def patient(index: int) -> None:
+        if ramp_seconds and patients > 1:
+            time.sleep(ramp_seconds * index / patients)
+        try:
+            patient_fn(base_url, f"load-{run_tag}-{index}", corpus[index % len(corpus)], recorder, think_ms / 1000.0, timeout)
+        except Exception as e:
+            recorder.error(type(e).__name__)
+
+    started = time.perf_counter()
+    if engine == "eventlet":
+        import eventlet
+
+        pool = eventlet.GreenPool(patients)
+        for index in range(patients):
+            pool.spawn(patient, index)
+        pool.waitall()
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=patients) as executor:
+            list(executor.map(patient, range(patients)))
+    report = recorder.report(time.perf_counter() - started, patients)
+    report.update({"transport": transport, "engine": engine})
+    return report
+
+
+def _wait_until_live(url: str, timeout: float) -> None:
+    import requests
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/health/live", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"El servicio no respondió en {url} tras {timeout:g} s")
+
+
+def spawn_stack(latencies: Dict[str, str], app_env: Optional[Dict[str, str]] = None):
+    """Arranca los sustitutos y app.py. Devuelve (url del servicio, procesos)."""
+    stub_args = [sys.executable, "-m", "scripts.load_stubs", "--port", "0"]
+    for name, spec in latencies.items():
+        stub_args += [f"--{name}-latency", spec]
+    stubs = subprocess.Popen(stub_args, cwd=SRC_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    stub_url = stubs.stdout.readline().strip()
+    if not stub_url:
+        stubs.kill()
+        raise RuntimeError("No arrancaron los sustitutos (scripts.load_stubs)")
+    env = {**os.environ, **stub_environment(stub_url), **(app_env or {})}
+    app = subprocess.Popen([sys.executable, "app.py"], cwd=SRC_DIR, env=env)
+    url = f"http://127.0.0.1:{APP_PORT}"
+    try:
+        _wait_until_live(url, timeout=90)
+    except Exception:
+        app.kill()
+        stubs.kill()
+        raise
+    return url, [app, stubs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=f"http://localhost:{APP_PORT}", help="Servicio de chat ya arrancado")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--patients", type=int, default=100, help="Pacientes concurrentes")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="http")
+    parser.add_argument("--engine", choices=ENGINES, default="eventlet", help="Concurrencia del generador")
+    parser.add_argument("--ramp-seconds", type=float, default=5.0, help="Reparto del inicio de los pacientes")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pausa entre turnos de un paciente")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Tiempo máximo por turno")
+    parser.add_argument("--spawn-app", action="store_true", help="Arrancar sustitutos y app.py")
+    for name, spec in DEFAULT_LATENCIES.items():
+        parser.add_argument(f"--{name}-latency", default=spec, help=f"Con --spawn-app (por defecto {spec})")
+    parser.add_argument("--json", help="Guardar el informe en este fichero")
+    args = parser.parse_args(argv)
+
+    if args.engine == "eventlet":
+        # Antes de importar requests y socketio, como app.py (CHAT_IO_ENGINE)
+        import eventlet
+
+        eventlet.monkey_patch()
+
+    corpus = load_corpus(args.corpus)
+    processes = []
+    url = args.url
+    if args.spawn_app:
+        latencies = {name: getattr(args, f"{name}_latency") for name in DEFAULT_LATENCIES}
+        url, processes = spawn_stack(latencies)
+    try:
+        report = run_load(
+            url,
+            corpus,
+            args.patients,
+            transport=args.transport,
+            engine=args.engine,
+            ramp_seconds=args.ramp_seconds,
+            think_ms=args.think_ms,
+            timeout=args.timeout,
+        )
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print(
+        f"{report['patients']} pacientes por {report['transport']}: {report['turns']} turnos en "
+        f"{report['elapsed_s']:.1f} s ({report['turns_per_s']:.1f} turnos/s), "
+        f"{report['conversations_completed']} conversaciones completas"
+    )
+    print(f"Latencia por turno: p50 {report['p50_ms']:.0f} ms, p95 {report['p95_ms']:.0f} ms, p99 {report['p99_ms']:.0f} ms")
+    if report["errors"]:
+        print("Errores: " + ", ".join(f"{kind}={count}" for kind, count in sorted(report["errors"].items())))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Servidor local que sustituye a Bedrock, Comprehend Medical y la API de Django en pruebas de carga.
+
+Un solo puerto atiende las tres APIs con su formato real, así el servicio de chat no cambia:
+  - Bedrock Runtime: POST /model/{modelId}/invoke. Los embeddings (`inputText`) devuelven un
+    vector determinista y los mensajes de Claude un texto de triaje breve.
+  - Comprehend Medical: POST / con X-Amz-Target DetectEntities o DetectEntitiesV2. Las entidades
+    las produce el NER local en español (entity_extractors).
+  - Django: GET patients/me/ y patients/me/history/. Cualquier POST (envío de la ETL) devuelve 201.
+
+El servicio se dirige al servidor con las variables de `stub_environment(url)`:
+AWS_ENDPOINT_URL_BEDROCK_RUNTIME, AWS_ENDPOINT_URL_COMPREHENDMEDICAL y DJANGO_API_URL.
+
+Cada API tiene su latencia simulada: un número fijo en ms, `uniform:MIN-MAX` o
+`lognormal:MEDIANA,SIGMA`.
+
+Uso:
+    cd src && python -m scripts.load_stubs --port 9100 --bedrock-latency lognormal:800,0.4
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+DEFAULT_LATENCIES = {"bedrock": "lognormal:600,0.4", "embeddings": "uniform:30-80", "comprehend": "uniform:80-200", "django": "uniform:10-40"}
+CLAUDE_REPLY = (
+    "Entiendo, gracias por contármelo. Para orientarte mejor: ¿desde cuándo tienes estos síntomas "
+    "y qué intensidad tienen del 0 al 10?"
+)
+STUB_PROFILE = {"id": "stub", "age": 42, "gender": "F", "allergies": [], "chronic_conditions": []}
+
+
+def parse_latency(spec) -> Callable[[], float]:
+    """Convierte una especificación de latencia en una función que devuelve segundos."""
+    text = str(spec if spec is not None else "0").strip().lower()
+    if ":" not in text:
+        fixed = max(0.0, float(text)) / 1000.0
+        return lambda: fixed
+    kind, params = text.split(":", 1)
+    if kind == "uniform":
+        low, high = (float(value) / 1000.0 for value in params.split("-", 1))
+        return lambda: random.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = (float(value) for value in params.split(",", 1))
+        mu = math.log(max(median, 0.001) / 1000.0)
+        return lambda: random.lognormvariate(mu, sigma)
+    raise ValueError(f"Latencia no reconocida: {spec}")
+
+
+def stub_embedding(text: str, dimensions: int) -> list:
+    """Vector determinista por texto, para que la similitud semántica sea estable entre ejecuciones."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    return [rng.uniform(-1.0, 1.0) for _ in range(dimensions)]
+
+
+class StubServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latencies: Optional[Dict[str, object]] = None,
+        embedding_dim: int = 256,
+    ):
+        specs = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.latency = {name: parse_latency(spec) for name, spec in specs.items()}
+        self.embedding_dim = embedding_dim
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {name: 0 for name in specs}
+        self._extractor = None
+        self._httpd = self._build_server(host, port)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.requests[name] += 1
+
+    def _entities(self, text: str) -> list:
+        if self._extractor is None:
+            from services.chatbot.entity_extractors import LocalMedicalNerExtractor
+
+            self._extractor = LocalMedicalNerExtractor()
+        entities = []
+        for index, entity in enumerate(self._extractor.extract(text)):
+            entities.append({**entity, "Id": index, "Attributes": [], "Traits": entity.get("Traits", [])})
+        return entities
+
+    def handle(self, method: str, path: str, headers, body: bytes):
+        """Devuelve (status, payload) y la API que ha atendido la petición."""
+        if method == "POST" and path.startswith("/model/"):
+            request = json.loads(body or b"{}")
+            if "inputText" in request:
+                return "embeddings", 200, {
+                    "embedding": stub_embedding(request["inputText"], self.embedding_dim),
+                    "inputTextTokenCount": len(request["inputText"].split()),
+                }
+            return "bedrock", 200, {
+                "id": "msg_stub",
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "text", "text": CLAUDE_REPLY}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": len(body or b"") // 4, "output_tokens": len(CLAUDE_REPLY) // 4},
+            }
+        target = headers.get("X-Amz-Target") or ""
+        if method == "POST" and target.startswith("ComprehendMedical"):
+            request = json.loads(body or b"{}")
+            return "comprehend", 200, {"Entities": self._entities(request.get("Text", "")), "ModelVersion": "stub"}
+        if method == "GET" and "patients/me/history" in path:
+            return "django", 200, {"results": []}
+        if method == "GET" and "patients/me" in path:
+            return "django", 200, STUB_PROFILE
+        if method == "POST":
+            return "django", 201, {"status": "ok"}
+        return "django", 404, {"error": "no encontrado"}
+
+    def _build_server(self, host: str, port: int) -> ThreadingHTTPServer:
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self, method: str):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                api, status, payload = stub.handle(method, self.path, self.headers, body)
+                stub._count(api)
+                time.sleep(stub.latency[api]())
+                content_type = "application/x-amz-json-1.1" if api == "comprehend" else "application/json"
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+            def log_message(self, *args):
+                pass
+
+        class _Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 4096
+
+        return _Server((host, port), _Handler)
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.requests)
+
+
+def stub_environment(url: str, region: str = "eu-west-1") -> Dict[str, str]:
+    """Variables de entorno para que el servicio de chat use el servidor de `url`."""
+    return {
+        "AWS_ENDPOINT_URL_BEDROCK_RUNTIME": url,
+        "AWS_ENDPOINT_URL_COMPREHENDMEDICAL": url,
+        "AWS_ACCESS_KEY_ID": "stub",
+        "AWS_SECRET_ACCESS_KEY": "stub",
+        "AWS_REGION": region,
+        "AWS_DEFAULT_REGION": region,
+        "BEDROCK_CLAUDE_MODEL_ID": "stub.claude",
+        "BEDROCK_EMBEDDING_MODEL_ID": "stub.embeddings",
+        "DJANGO_API_URL": f"{url}/api",
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100, help="0 = puerto libre")
+    parser.add_argument("--embedding-dim", type=int, default=256)
+    for name, spec in DEFAULT_LATENCIES.items():
+        parser.add_argument(f"--{name}-latency", default=spec, help=f"Latencia de {name} (por defecto {spec})")
+    args = parser.parse_args(argv)
+
+    latencies = {name: getattr(args, f"{name}_latency") for name in DEFAULT_LATENCIES}
+    server = StubServer(args.host, args.port, latencies=latencies, embedding_dim=args.embedding_dim).start()
+    # La primera línea es la URL, para quien lance este proceso (scripts.load_generator)
+    print(server.url, flush=True)
+    for key, value in stub_environment(server.url).items():
+        print(f"{key}={value}", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import logging
-from pymongo import ASCENDING, DESCENDING
 
 from data.connect import mongo_db
+from data.schema import ensure_indexes
 
 
 logger = logging.getLogger(__name__)
@@ -34,8 +34,7 @@ def run_migration():
         },
     )
 
-    collection.create_index([("user_id", ASCENDING), ("lifecycle_status", ASCENDING), ("timestamp", DESCENDING)])
-    collection.create_index([("purge_after", ASCENDING)], expireAfterSeconds=0)
+    ensure_indexes(mongo_db, collections=["conversations"])
 
     logger.info(
         "Migration finished: archived_backfill=%s active_backfill=%s",
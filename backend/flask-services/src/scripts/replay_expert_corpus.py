@@ -0,0 +1,190 @@
+"""Reproduce un corpus JSONL contra el sistema experto y compara dos versiones de las reglas.
+
+Cada línea del corpus es un objeto JSON con el mensaje del paciente en `message`
+(también se aceptan `user_message`, `text` o `body`) y, opcionalmente:
+  - `conversation_id`: las líneas de una misma conversación se evalúan en orden,
+    encadenando el estado experto que devuelve cada turno;
+  - `prior_expert_state`: estado de partida explícito para ese turno;
+  - `id` / `turn_id` / `request_id`: identificador para el informe de diferencias.
+
+Los turnos se evalúan por oleadas con ExpertOrchestrator.evaluate_many: la oleada k contiene
+el turno k de cada conversación (las líneas sin conversación forman parte de la primera). Con
+--processes > 1 todas las oleadas comparten un mismo pool de procesos.
+
+Uso:
+    cd src && python -m scripts.replay_expert_corpus corpus.jsonl
+    cd src && python -m scripts.replay_expert_corpus corpus.jsonl --candidate-rules /ruta/a/rules --processes 4
+"""
+
+import argparse
+import json
+import sys
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.expert_system.loader import compile_rules
+from services.expert_system.orchestrator import ExpertOrchestrator
+
+MESSAGE_KEYS = ("message", "user_message", "text", "body")
+ID_KEYS = ("id", "turn_id", "request_id")
+# Campos de la decisión que se comparan entre versiones
+DIFF_FIELDS = ("action", "case_id", "triage_level", "emergency_triggered", "fallback_reason", "rule_ids_applied", "active_node_id")
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    turns = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            message = next((record[key] for key in MESSAGE_KEYS if isinstance(record.get(key), str)), None)
+            if message is None:
+                continue
+            turn_id = next((record[key] for key in ID_KEYS if record.get(key) is not None), f"line-{line_number}")
+            turns.append(
+                {
+                    "id": str(turn_id),
+                    "conversation_id": record.get("conversation_id"),
+                    "message": message,
+                    "prior_expert_state": record.get("prior_expert_state"),
+                }
+            )
+    return turns
+
+
+def build_waves(turns: List[Dict[str, Any]]) -> List[List[int]]:
+    """Agrupa los índices de turno en oleadas que se pueden evaluar como un lote."""
+    position: Dict[Any, int] = {}
+    waves: List[List[int]] = []
+    for index, turn in enumerate(turns):
+        conversation_id = turn["conversation_id"]
+        wave = 0
+        if conversation_id is not None:
+            wave = position.get(conversation_id, 0)
+            position[conversation_id] = wave + 1
+        while len(waves) <= wave:
+            waves.append([])
+        waves[wave].append(index)
+    return waves
+
+
+def next_prior_state(decision) -> Dict[str, Any]:
+    # Mismo contenido que guarda el chat (chat_turn_helpers._expert_state_payload)
+    state = decision.state
+    return {
+        "active_case_id": state.active_case_id,
+        "active_node_id": state.active_node_id,
+        "required_fields_status": state.required_fields_status,
+        "confidence": state.confidence,
+        "last_rule_ids": state.last_rule_ids,
+        "fallback_reason": state.fallback_reason,
+        "emergency_triggered": state.emergency_triggered,
+        "collected_fields": state.collected_fields,
+        "pain_scale": decision.pain_scale,
+        "triage_level": state.triage_level,
+    }
+
+
+def decision_summary(decision) -> Dict[str, Any]:
+    return {
+        "action": decision.action,
+        "case_id": decision.case_id,
+        "triage_level": decision.triage_level,
+        "emergency_triggered": decision.emergency_triggered,
+        "fallback_reason": decision.fallback_reason,
+        "rule_ids_applied": list(decision.rule_ids_applied),
+        "active_node_id": decision.state.active_node_id,
+    }
+
+
+def replay(
+    orchestrator: ExpertOrchestrator,
+    turns: List[Dict[str, Any]],
+    processes: int = 1,
+    batch_size: int = 0,
+) -> Tuple[List[Dict[str, Any]], float]:
+    """Devuelve el resumen de la decisión de cada turno (en el orden del corpus) y los segundos empleados."""
+    summaries: List[Optional[Dict[str, Any]]] = [None] * len(turns)
+    conversation_state: Dict[Any, Dict[str, Any]] = {}
+    started = time.perf_counter()
+    # Un solo pool para todas las oleadas: la base se compila una vez por proceso
+    with orchestrator.worker_pool(processes) if processes > 1 else nullcontext() as pool:
+        for wave in build_waves(turns):
+            batches = [wave[i:i + batch_size] for i in range(0, len(wave), batch_size)] if batch_size > 0 else [wave]
+            for batch in batches:
+                states = []
+                for index in batch:
+                    turn = turns[index]
+                    state = turn["prior_expert_state"]
+                    if state is None and turn["conversation_id"] is not None:
+                        state = conversation_state.get(turn["conversation_id"])
+                    states.append(state)
+                decisions = orchestrator.evaluate_many([turns[index]["message"] for index in batch], states, pool=pool)
+                for index, decision in zip(batch, decisions):
+                    summaries[index] = decision_summary(decision)
+                    if turns[index]["conversation_id"] is not None:
+                        conversation_state[turns[index]["conversation_id"]] = next_prior_state(decision)
+    return summaries, time.perf_counter() - started
+
+
+def diff_decisions(
+    turns: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    candidate: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    diffs = []
+    for turn, before, after in zip(turns, baseline, candidate):
+        changed = {field: (before[field], after[field]) for field in DIFF_FIELDS if before[field] != after[field]}
+        if changed:
+            diffs.append({"id": turn["id"], "message": turn["message"], "changed": changed})
+    return diffs
+
+
+def _print_run(label: str, version: str, turns: int, elapsed: float) -> None:
+    rate = turns / elapsed if elapsed > 0 else float("inf")
+    print(f"{label:<10} kb={version:<12} turnos={turns:<6} {elapsed:8.3f} s  {rate:10.1f} turnos/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", help="Fichero JSONL con un turno por línea")
+    parser.add_argument("--baseline-rules", default=None, help="Directorio de reglas base (por defecto, el del servicio)")
+    parser.add_argument("--candidate-rules", default=None, help="Directorio de reglas a comparar con la base")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=0, help="Tamaño máximo de lote (0 = oleada completa)")
+    parser.add_argument("--max-diffs", type=int, default=20, help="Diferencias a mostrar")
+    parser.add_argument("--diff-output", default=None, help="Escribe todas las diferencias en este fichero JSONL")
+    args = parser.parse_args(argv)
+
+    turns = load_corpus(args.corpus)
+    if not turns:
+        print("El corpus no contiene turnos con mensaje", file=sys.stderr)
+        return 1
+
+    baseline_kb = compile_rules(args.baseline_rules)
+    baseline, elapsed = replay(ExpertOrchestrator(knowledge_base=baseline_kb), turns, args.processes, args.batch_size)
+    _print_run("base", baseline_kb.version, len(turns), elapsed)
+    if not args.candidate_rules:
+        return 0
+
+    candidate_kb = compile_rules(args.candidate_rules)
+    candidate, elapsed = replay(ExpertOrchestrator(knowledge_base=candidate_kb), turns, args.processes, args.batch_size)
+    _print_run("candidata", candidate_kb.version, len(turns), elapsed)
+
+    diffs = diff_decisions(turns, baseline, candidate)
+    print(f"Decisiones distintas: {len(diffs)} de {len(turns)} turnos")
+    for diff in diffs[: max(0, args.max_diffs)]:
+        changes = ", ".join(f"{field}: {before!r} -> {after!r}" for field, (before, after) in diff["changed"].items())
+        print(f"  [{diff['id']}] {diff['message'][:60]!r}: {changes}")
+    if args.diff_output:
+        with open(args.diff_output, "w", encoding="utf-8") as f:
+            for diff in diffs:
+                f.write(json.dumps(diff, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,105 @@
+import hashlib
 import jwt
 import logging
+import threading
+import time
+from collections import OrderedDict
 from config.config import Config
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
+
+class TokenVerificationCache:
+    """
+    LRU acotado de tokens ya verificados: sha256(token) -> (user_id, expira_en).
+    Solo se guardan tokens válidos y cada entrada caduca con el claim `exp`
+    (o tras `ttl_seconds` si es antes), de modo que un acierto equivale a verificar de nuevo.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max(0, int(max_size))
+        self.ttl_seconds = max(0, int(ttl_seconds))
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str, now: float | None = None) -> str | None:
+        if self.max_size == 0:
+            return None
+        now = time.time() if now is None else now
+        key = self.key_for(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            user_id, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user_id
+
+    def put(self, token: str, user_id: str, exp: float | None, now: float | None = None) -> None:
+        if self.max_size == 0:
+            return
+        now = time.time() if now is None else now
+        expires_at = now + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+        key = self.key_for(token)
+        with self._lock:
+            self._entries[key] = (user_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.expired = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+token_cache = TokenVerificationCache(Config.JWT_CACHE_MAX_SIZE, Config.JWT_CACHE_TTL_SECONDS)
+
+
+def get_token_cache_stats() -> dict:
+    """Métricas del caché de verificación de tokens (aciertos, fallos, tasa de acierto)."""
+    return token_cache.stats()
+
+
 def get_user_id_from_token(token: str) -> str | None:
     """
     Decodifica un token JWT para extraer el ID de usuario.
     Devuelve user_id si el token es válido, None en caso contrario.
+    Los tokens ya verificados se resuelven desde el caché hasta su `exp`.
     """
     if not token:
         logger.debug("get_user_id_from_token: Token está vacío o es None.")
@@ -18,6 +109,10 @@ def get_user_id_from_token(token: str) -> str | None:
         logger.warning(f"get_user_id_from_token: Tipo de token inválido recibido: {type(token)}. Se esperaba un string.")
         return None
 
+    cached_user_id = token_cache.get(token)
+    if cached_user_id is not None:
+        return cached_user_id
+
     try:
         # IMPORTANTE: Usar la misma SECRET_KEY que Django
         secret_key = Config.JWT_SECRET
@@ -45,7 +140,9 @@ def get_user_id_from_token(token: str) -> str | None:
             logger.debug(f"get_user_id_from_token: Campos disponibles en payload: {list(payload.keys())}")
             return None
         
-        return str(user_id)  # Convertir a string por consistencia
+        user_id = str(user_id)  # Convertir a string por consistencia
+        token_cache.put(token, user_id, payload.get('exp'))
+        return user_id
 
     except jwt.ExpiredSignatureError:
         logger.warning("get_user_id_from_token: Token expirado.")
@@ -24,8 +24,11 @@ from services.chatbot.application.finalization_service import detect_finalizatio
 from services.chatbot.application.pain_policy_service import apply_pain_question_policy, resolve_pain_state
 from services.chatbot.application.turn_persistence_service import persist_turn_data
 from services.chatbot.application.turn_postprocess_service import handle_turn_postprocess
+from services.chatbot.turn_text import TurnText
 from services.expert_system.fallback_adapter import FallbackModelAdapter
 from services.expert_system.orchestrator import ExpertOrchestrator
+from services.process_data.etl_state_store import get_etl_state_store
+from services.turn_metrics import current_turn, span, turn_timer
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -81,13 +84,20 @@ INITIAL_PROMPT = """Eres Hipo, un asistente virtual especializado exclusivamente
                 Recuerda que tu propósito es orientar hacia la atención médica adecuada, no sustituirla.
                 """
 def process_message_logic(user_id, user_message, user_data, conversation_id, jwt_token=None):
+    # Latencia por etapa: histogramas en /metrics, timings_ms en chat_hybrid_turn y volcado de turnos lentos
+    with turn_timer(user_id=user_id, conversation_id=conversation_id):
+        return _process_message_logic(user_id, user_message, user_data, conversation_id, jwt_token=jwt_token)
+
+
+def _process_message_logic(user_id, user_message, user_data, conversation_id, jwt_token=None):
     if not user_message.strip():
         return {"error": "El mensaje no puede estar vacío."}, 400
 
     incoming_context = user_data or {}
     postgres_context = {}
     if jwt_token:
-        postgres_context = get_patient_global_context(jwt_token=jwt_token)
+        with span("django_context"):
+            postgres_context = get_patient_global_context(jwt_token=jwt_token)
         profile = postgres_context.get("profile", {}) if isinstance(postgres_context, dict) else {}
         if isinstance(profile, dict):
             incoming_context = {**incoming_context, "patient_profile": profile}
@@ -95,9 +105,10 @@ def process_message_logic(user_id, user_message, user_data, conversation_id, jwt
     current_conversation = None
     if conversation_id:
         try:
-            current_conversation = conversational_dataset_manager.get_conversation(
-                user_id, conversation_id, include_deleted=True
-            )
+            with span("mongo_read"):
+                current_conversation = conversational_dataset_manager.get_conversation(
+                    user_id, conversation_id, include_deleted=True
+                )
         except Exception:
             current_conversation = None
 
@@ -137,24 +148,30 @@ def process_message_logic(user_id, user_message, user_data, conversation_id, jwt
     existing_context = _hydrate_profile_demographics({**prior_context, **incoming_context}, postgres_context)
     turn_number = _extract_turn_number(current_conversation)
 
-    expert_decision = expert_orchestrator.evaluate(
-        user_message=user_message,
-        prior_expert_state=prior_expert_state,
-    )
+    # Normalización, tokens, dolor y duración del mensaje: una vez por turno
+    turn_text = TurnText(user_message)
+    with span("expert_evaluate"):
+        expert_decision = expert_orchestrator.evaluate(
+            user_message=user_message,
+            prior_expert_state=prior_expert_state,
+            turn_text=turn_text,
+        )
     expert_state = _expert_state_payload(expert_decision)
     expert_response_data = _build_expert_response_data(expert_decision, existing_context, expert_state)
 
     llm_response_data = None
     try:
-        llm_candidate = fallback_model_adapter.respond(
-            user_message=user_message,
-            user_data=user_data,
-            initial_prompt=INITIAL_PROMPT,
-            user_id=user_id,
-            conversation_id=conversation_id,
-            existing_context=existing_context,
-            postgres_context=postgres_context,
-        )
+        with span("llm_candidate"):
+            llm_candidate = fallback_model_adapter.respond(
+                user_message=user_message,
+                user_data=user_data,
+                initial_prompt=INITIAL_PROMPT,
+                user_id=user_id,
+                conversation_id=conversation_id,
+                existing_context=existing_context,
+                postgres_context=postgres_context,
+                turn_text=turn_text,
+            )
         if isinstance(llm_candidate, dict) and "error" not in llm_candidate:
             llm_response_data = llm_candidate
         elif isinstance(llm_candidate, dict) and llm_candidate.get("error"):
@@ -186,6 +203,7 @@ def process_message_logic(user_id, user_message, user_data, conversation_id, jwt
         prior_pain=prior_pain,
         expert_response_data=expert_response_data,
         llm_response_data=llm_response_data,
+        turn_text=turn_text,
     )
 
     context_base = existing_context if isinstance(existing_context, dict) else {}
@@ -314,34 +332,32 @@ def process_message_logic(user_id, user_message, user_data, conversation_id, jwt
             "timestamp": datetime.utcnow().isoformat(),
         },
     }
+    # El turno vuelve a guardar hybrid_state: el estado ETL va con lo último de Redis (queued/running)
     prior_etl_state = prior_hybrid_state.get("etl")
-    if isinstance(prior_etl_state, dict):
+    if conversation_id:
+        prior_etl_state = get_etl_state_store().current(user_id, conversation_id, prior_etl_state)
+    if prior_etl_state:
         hybrid_state["etl"] = prior_etl_state
 
-    logger.info(
-        "chat_hybrid_turn %s",
-        json.dumps(
-            {
-                "conversation_id": conversation_id,
-                "response_source": response_source,
-                "case_id": expert_decision.case_id,
-                "controller_mode_prev": prior_controller_mode,
-                "controller_mode_next": controller_mode,
-                "active_case_locked": False,
-                "fallback_reason": expert_decision.fallback_reason,
-                "takeover_reason": "emergency_detected" if controller_mode == "emergency_combined" else None,
-                "handoff_reason": None,
-                "expert_non_match_streak": 0,
-                "pain_prev": prior_pain,
-                "pain_new": pain_scale,
-                "triaje_experto": triage_expert,
-                "triaje_llm": triage_llm if llm_response_data else None,
-                "triaje_final": triage_final,
-                "questions_selected_final": questions_selected,
-            },
-            ensure_ascii=False,
-        ),
-    )
+    # Se registra al final del turno, con el desglose de latencias
+    hybrid_turn_log = {
+        "conversation_id": conversation_id,
+        "response_source": response_source,
+        "case_id": expert_decision.case_id,
+        "controller_mode_prev": prior_controller_mode,
+        "controller_mode_next": controller_mode,
+        "active_case_locked": False,
+        "fallback_reason": expert_decision.fallback_reason,
+        "takeover_reason": "emergency_detected" if controller_mode == "emergency_combined" else None,
+        "handoff_reason": None,
+        "expert_non_match_streak": 0,
+        "pain_prev": prior_pain,
+        "pain_new": pain_scale,
+        "triaje_experto": triage_expert,
+        "triaje_llm": triage_llm if llm_response_data else None,
+        "triaje_final": triage_final,
+        "questions_selected_final": questions_selected,
+    }
     if Config.CHAT_DECISION_LOG_FLAGS:
         logger.info(
             "chat_decision_turn %s",
@@ -409,33 +425,40 @@ def process_message_logic(user_id, user_message, user_data, conversation_id, jwt
         controller_mode=controller_mode,
         expert_decision=expert_decision,
         expert_cases=expert_orchestrator.cases,
+        turn_text=turn_text,
     )
-    conversation_id = persist_turn_data(
-        user_id=user_id,
-        conversation_id=conversation_id,
-        current_conversation=current_conversation,
-        user_message=user_message,
-        bot_response=response_data["response"],
-        response_data=response_data,
-        expert_state=expert_state,
-        expert_meta=expert_meta,
-        hybrid_state=hybrid_state,
-    )
-    etl_payload = handle_turn_postprocess(
-        user_id=user_id,
-        conversation_id=conversation_id,
-        jwt_token=jwt_token,
-        etl_triggered=etl_triggered,
-        etl_reasons=etl_reasons,
-        current_conversation=current_conversation,
-        user_message=user_message,
-        response_data=response_data,
-        questions_selected=questions_selected,
-        response_source=response_source,
-        expert_meta=expert_meta,
-        hybrid_state=hybrid_state,
-        decision_flags=decision_flags,
-    )
+    with span("persistence"):
+        conversation_id = persist_turn_data(
+            user_id=user_id,
+            conversation_id=conversation_id,
+            current_conversation=current_conversation,
+            user_message=user_message,
+            bot_response=response_data["response"],
+            response_data=response_data,
+            expert_state=expert_state,
+            expert_meta=expert_meta,
+            hybrid_state=hybrid_state,
+        )
+    with span("postprocess"):
+        etl_payload = handle_turn_postprocess(
+            user_id=user_id,
+            conversation_id=conversation_id,
+            jwt_token=jwt_token,
+            etl_triggered=etl_triggered,
+            etl_reasons=etl_reasons,
+            current_conversation=current_conversation,
+            user_message=user_message,
+            response_data=response_data,
+            questions_selected=questions_selected,
+            response_source=response_source,
+            expert_meta=expert_meta,
+            hybrid_state=hybrid_state,
+            decision_flags=decision_flags,
+        )
+    timer = current_turn()
+    if timer is not None:
+        hybrid_turn_log["timings_ms"] = timer.timings_ms()
+    logger.info("chat_hybrid_turn %s", json.dumps(hybrid_turn_log, ensure_ascii=False))
 
     return {
         "user_message": user_message,
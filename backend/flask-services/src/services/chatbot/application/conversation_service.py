@@ -1,4 +1,4 @@
-from models.conversation import ConversationalDatasetManager
+from models.conversation import ConversationalDatasetManager, get_conversational_dataset_manager
 
 
 class ConversationService:
@@ -30,5 +30,5 @@ class ConversationService:
         return self._manager.update_conversation_etl_state(user_id, conversation_id, state)
 
 
-conversational_dataset_manager = ConversationalDatasetManager()
+conversational_dataset_manager = get_conversational_dataset_manager()
 conversation_service = ConversationService(conversational_dataset_manager)
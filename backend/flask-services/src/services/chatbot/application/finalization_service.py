@@ -3,6 +3,7 @@ import unicodedata
 from typing import Any, Dict, List, Tuple
 
 from services.chatbot.application.chat_turn_helpers import _normalize_triage
+from services.chatbot.turn_text import TurnText
 
 EXPLICIT_CLOSE_PHRASES = (
     "eso es todo",
@@ -87,6 +88,7 @@ def detect_finalization(
     controller_mode: str,
     expert_decision: Any = None,
     expert_cases: Dict[str, Any] | None = None,
+    turn_text: TurnText | None = None,
 ) -> Tuple[bool, List[str]]:
     reasons: List[str] = []
 
@@ -97,7 +99,7 @@ def detect_finalization(
     if _normalize_triage(triage_level) == "Severo" or str(controller_mode).strip().lower() == "emergency_combined":
         reasons.append("emergency")
 
-    normalized_message = _normalize_user_text(user_message)
+    normalized_message = turn_text.plain if turn_text is not None else _normalize_user_text(user_message)
     if normalized_message:
         if any(phrase in normalized_message for phrase in EXPLICIT_CLOSE_PHRASES):
             reasons.append("explicit_close_phrase")
@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime
 
-from services.chatbot.application.conversation_service import conversation_service
-from services.process_data.etl_runner import execute_etl_once
+from services.process_data.etl_runner import execute_etl_once, success_etl_state
+from services.process_data.etl_state_store import get_etl_state_store
 
 
 def process_medical_data_for_conversation(
@@ -13,20 +13,23 @@ def process_medical_data_for_conversation(
 ):
     run_id = str(uuid.uuid4())
     reasons = ["manual_endpoint"]
+    # queued y running se quedan en Redis; Mongo solo recibe el estado final de la ejecución
+    state_store = get_etl_state_store()
     queued_time = datetime.utcnow().isoformat()
-    conversation_service.update_etl_state(
+    state_store.transition(
         user_id,
         conversation_id,
         {
             "last_status": "queued",
             "attempts": 0,
             "last_run_id": run_id,
+            "merged_run_ids": [],
             "last_reasons": reasons,
             "last_error": "",
             "last_attempt_at": queued_time,
         },
     )
-    conversation_service.update_etl_state(
+    state_store.transition(
         user_id,
         conversation_id,
         {
@@ -49,8 +52,22 @@ def process_medical_data_for_conversation(
     medical_data = etl_result.get("medical_data")
     django_response = etl_result.get("django_response")
 
+    if etl_result.get("skipped"):
+        state_store.transition(
+            user_id,
+            conversation_id,
+            success_etl_state(etl_result, attempts=1, last_run_id=run_id, last_reasons=reasons),
+        )
+        return {
+            "success": True,
+            "skipped": True,
+            "message": "Sin mensajes nuevos desde el último procesamiento correcto.",
+            "medical_data": None,
+            "django_response": None,
+        }, 200
+
     if not medical_data or (isinstance(medical_data, dict) and medical_data.get("error")):
-        conversation_service.update_etl_state(
+        state_store.transition(
             user_id,
             conversation_id,
             {
@@ -65,22 +82,13 @@ def process_medical_data_for_conversation(
         return medical_data or {"error": "No se pudo procesar la conversación."}, 400
 
     if success:
-        success_time = datetime.utcnow().isoformat()
-        conversation_service.update_etl_state(
+        state_store.transition(
             user_id,
             conversation_id,
-            {
-                "last_status": "success",
-                "attempts": 1,
-                "last_run_id": run_id,
-                "last_reasons": reasons,
-                "last_error": "",
-                "last_attempt_at": success_time,
-                "last_success_at": success_time,
-            },
+            success_etl_state(etl_result, attempts=1, last_run_id=run_id, last_reasons=reasons),
         )
     else:
-        conversation_service.update_etl_state(
+        state_store.transition(
             user_id,
             conversation_id,
             {
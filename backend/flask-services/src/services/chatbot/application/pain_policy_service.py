@@ -3,7 +3,7 @@ from typing import Any, Dict, List, Tuple
 from config.config import Config
 from services.chatbot.application.chat_turn_helpers import _merge_questions, _safe_int_0_10
 from services.chatbot.context_manager import PAIN_SCALE_QUESTION, has_explicit_pain_report, is_pain_scale_question
-from services.chatbot.pain_utils import extract_pain_scale
+from services.chatbot.turn_text import TurnText, as_turn_text
 
 
 def resolve_pain_state(
@@ -12,8 +12,9 @@ def resolve_pain_state(
     prior_pain: int | None,
     expert_response_data: Dict[str, Any],
     llm_response_data: Dict[str, Any] | None,
+    turn_text: TurnText | None = None,
 ) -> Tuple[int, int | None, int | None, bool]:
-    explicit_pain = extract_pain_scale(user_message)
+    explicit_pain = (turn_text or as_turn_text(user_message)).pain_scale
     prior_reported_pain = _safe_int_0_10(existing_context.get("pain_level_reported"))
     pain_reported = bool(explicit_pain is not None or has_explicit_pain_report(existing_context))
     if explicit_pain is not None:
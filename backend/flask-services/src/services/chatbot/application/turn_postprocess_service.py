@@ -2,11 +2,11 @@ import logging
 import uuid
 from typing import Any, Dict, List
 
-from services.chatbot.conversation_context_service import ConversationContextService
+from services.chatbot.conversation_context_service import get_conversation_context_service
 from services.process_data.etl_runner import clear_inactivity_timer, enqueue_etl_run, schedule_inactivity_etl
 
 logger = logging.getLogger(__name__)
-conversation_context_service = ConversationContextService()
+conversation_context_service = get_conversation_context_service()
 
 
 def _handle_etl(
@@ -27,13 +27,13 @@ def _handle_etl(
         run_id = str(uuid.uuid4())
         try:
             clear_inactivity_timer(user_id, conversation_id)
-            enqueue_etl_run(
+            run_id = enqueue_etl_run(
                 user_id=user_id,
                 conversation_id=conversation_id,
                 jwt_token=jwt_token,
                 reasons=etl_reasons,
                 run_id=run_id,
-            )
+            ) or run_id
             etl_payload = {
                 "triggered": True,
                 "status": "queued",
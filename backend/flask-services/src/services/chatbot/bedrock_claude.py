@@ -1,6 +1,7 @@
 import boto3
 from botocore.exceptions import ClientError
 from config.config import Config
+from services.turn_metrics import span
 import json
 import logging
 
@@ -46,14 +47,15 @@ def call_claude(prompt, triage_level=None, max_tokens=500, temperature=0.1, init
     })
 
     try:
-        response = client.invoke_model(
-            modelId=model_id,
-            body=body,
-            contentType="application/json"
-        )
-
-        # Process response
-        result = json.loads(response['body'].read())
+        with span("claude"):
+            response = client.invoke_model(
+                modelId=model_id,
+                body=body,
+                contentType="application/json"
+            )
+
+            # Process response
+            result = json.loads(response['body'].read())
         return result['content'][0]['text']
     
     except ClientError as e:
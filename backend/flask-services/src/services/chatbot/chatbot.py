@@ -1,11 +1,11 @@
 import logging
 from services.chatbot.context_manager import init_context
-from services.chatbot.comprehend_medical import detect_entities
+from services.chatbot.entity_detection_service import get_entity_detection_service
 from services.chatbot.input_validate import analyze_message, generate_response
 from services.chatbot.triaje_classification import TriageClassification
 from services.chatbot.bedrock_claude import call_claude
-from services.chatbot.conversation_context_service import ConversationContextService
-from services.chatbot.pain_utils import extract_pain_scale
+from services.chatbot.conversation_context_service import get_conversation_context_service
+from services.chatbot.turn_text import as_turn_text
 
 logging.basicConfig(level=logging.INFO)
 
@@ -19,8 +19,11 @@ class Chatbot:
         conversation_id=None,
         existing_context=None,
         postgres_context=None,
+        turn_text=None,
     ):
         self.user_input = user_input
+        # Análisis del mensaje compartido con el resto del turno (validación, dolor...)
+        self.turn_text = turn_text if turn_text is not None else as_turn_text(user_input)
         self.user_data = user_data
         self.initial_prompt = initial_prompt
         self.user_id = user_id
@@ -30,14 +33,16 @@ class Chatbot:
         self.context = {}
         self.triage = None
         self.entities = None
+        # Memo de entidades del turno (una llamada a Comprehend por texto distinto)
+        self.entity_memo = {}
         self.response = None
-        self.context_service = ConversationContextService()
+        self.context_service = get_conversation_context_service()
         self.max_questions_per_turn = 2
 
     def initialize_conversation(self):
         try:
             # Validar el mensaje del usuario
-            analysis_result = analyze_message(self.user_input)
+            analysis_result = analyze_message(self.turn_text)
             
             # Fix: analyze_message returns a tuple, handle it correctly
             if isinstance(analysis_result, tuple):
@@ -53,7 +58,7 @@ class Chatbot:
             
             # Handle greeting messages with a direct response
             if analysis_type == "greeting":
-                greeting_response = generate_response(self.user_input)
+                greeting_response = generate_response(self.turn_text)
                 return {
                     "context": self.user_data or {},
                     "triaje_level": "info",
@@ -75,11 +80,16 @@ class Chatbot:
                 }
             
             # Detectar entidades médicas
-            self.entities = detect_entities(self.user_input)
+            self.entities = get_entity_detection_service().detect(self.user_input, memo=self.entity_memo)
             
             # Fix: init_context expects text, not user_data object
-            # Pass the user_input as text for entity extraction
-            context_result = init_context(self.user_input, user_data=self.user_data, existing_context=self.existing_context)
+            # Se pasan las entidades ya detectadas para no volver a llamar a Comprehend
+            context_result = init_context(
+                self.user_input,
+                user_data=self.user_data,
+                existing_context=self.existing_context,
+                entities=self.entities,
+            )
             
             # Extract context from the result
             if isinstance(context_result, dict):
@@ -204,7 +214,7 @@ class Chatbot:
     
     def _extract_pain_level_from_context(self):
         """Extract pain from current message; keep previous value when no new evidence."""
-        explicit_pain = extract_pain_scale(self.user_input)
+        explicit_pain = self.turn_text.pain_scale
         if explicit_pain is not None:
             return explicit_pain
 
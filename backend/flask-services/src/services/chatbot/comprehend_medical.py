@@ -27,30 +27,39 @@ def detect_medical_context(messages):
         logging.error(f"Error analyzing medical context: {e}")
         return "No se pudo analizar el contexto médico"
 
-def detect_entities(text, context=None):
-    try:
-        client = boto3.client(service_name='comprehendmedical', region_name=Config.AWS_REGION)
+def fetch_entities(text):
+    """Llama a Comprehend Medical y devuelve las entidades; a diferencia de detect_entities, propaga los errores."""
+    client = boto3.client(service_name='comprehendmedical', region_name=Config.AWS_REGION)
 
-        result = client.detect_entities(Text=text)
+    result = client.detect_entities(Text=text)
 
-        entities = []
-        for entity in result.get('Entities', []):
-            entity_data = {
-               'Text': entity.get('Text', ''),
-               'Category': entity.get('Category', ''),
-               'Type': entity.get('Type', ''),
-               'Score': entity.get('Score', 0.0)
-            }
+    entities = []
+    for entity in result.get('Entities', []):
+        entity_data = {
+           'Text': entity.get('Text', ''),
+           'Category': entity.get('Category', ''),
+           'Type': entity.get('Type', ''),
+           'Score': entity.get('Score', 0.0),
+           'BeginOffset': entity.get('BeginOffset'),
+           'EndOffset': entity.get('EndOffset')
+        }
+        if entity.get('Traits'):
+            entity_data['Traits'] = [{'Name': trait.get('Name', ''), 'Score': trait.get('Score', 0.0)} for trait in entity['Traits']]
 
-            # Safely handle SNOMED CT concepts
-            if 'SNOMEDCTConcepts' in entity:
-                entity_data["snomed"] = [
-                    {"code": concept.get('Code', ''), 
-                     "description": concept.get('Description', '')}
-                    for concept in entity['SNOMEDCTConcepts']
-                ]
+        # Safely handle SNOMED CT concepts
+        if 'SNOMEDCTConcepts' in entity:
+            entity_data["snomed"] = [
+                {"code": concept.get('Code', ''), 
+                 "description": concept.get('Description', '')}
+                for concept in entity['SNOMEDCTConcepts']
+            ]
 
-            entities.append(entity_data)
+        entities.append(entity_data)
+    return entities
+
+def detect_entities(text, context=None):
+    try:
+        entities = fetch_entities(text)
 
         # If additional context is provided, enhance entity detection
         if context:
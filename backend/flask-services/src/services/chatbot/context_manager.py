@@ -1,5 +1,5 @@
-from services.chatbot.comprehend_medical import detect_entities
 from services.chatbot.duration_utils import extract_duration_text
+from services.chatbot.entity_detection_service import get_entity_detection_service
 from services.chatbot.pain_utils import extract_pain_scale
 import re
 
@@ -81,8 +81,10 @@ def _hydrate_profile_demographics(context, user_data):
             context["age"] = age_value
 
 
-def init_context(text, user_data=None, existing_context=None):
-    entities = detect_entities(text)
+def init_context(text, user_data=None, existing_context=None, entities=None):
+    # Quien ya detectó las entidades del turno las pasa para no repetir la llamada a Comprehend
+    if entities is None:
+        entities = get_entity_detection_service().detect(text)
 
     context = existing_context.copy() if isinstance(existing_context, dict) else {
         "name": None,
@@ -8,6 +8,8 @@ import numpy as np
 
 from config.config import Config
 from data.connect import context_redis_client, mongo_db
+from services.io_engine import run_cpu_bound
+from services.turn_metrics import span
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +26,7 @@ class ConversationContextService:
         self.embedding_model_id = Config.BEDROCK_EMBEDDING_MODEL_ID
         self.embedding_collection = mongo_db["conversation_embeddings"]
         self.conversation_collection = mongo_db["conversations"]
-        self.embedding_collection.create_index([("user_id", 1), ("conversation_id", 1), ("timestamp", -1)])
-        self.embedding_collection.create_index([("user_id", 1), ("conversation_id", 1), ("source_turn_id", 1)])
+        # Los índices de conversation_embeddings se crean en data/schema.py
 
     def _ctx_key(self, user_id: str, conversation_id: str) -> str:
         return self.KEY_CTX.format(user_id=user_id, conversation_id=conversation_id)
@@ -41,13 +42,14 @@ class ConversationContextService:
             return []
         client = boto3.client("bedrock-runtime", region_name=Config.AWS_REGION)
         body = json.dumps({"inputText": text})
-        response = client.invoke_model(
-            modelId=self.embedding_model_id,
-            body=body,
-            contentType="application/json",
-            accept="application/json",
-        )
-        payload = json.loads(response["body"].read())
+        with span("embeddings"):
+            response = client.invoke_model(
+                modelId=self.embedding_model_id,
+                body=body,
+                contentType="application/json",
+                accept="application/json",
+            )
+            payload = json.loads(response["body"].read())
         return payload.get("embedding", [])
 
     @staticmethod
@@ -61,6 +63,24 @@ class ConversationContextService:
             return 0.0
         return float(np.dot(va, vb) / denom)
 
+    @staticmethod
+    def _similarities(query_embedding: List[float], docs: List[Dict[str, Any]]) -> List[float]:
+        """Coseno de la consulta con cada documento en una sola operación matricial (0.0 si no encaja)."""
+        scores = [0.0] * len(docs)
+        if not query_embedding:
+            return scores
+        query = np.asarray(query_embedding, dtype="float32")
+        query_norm = np.linalg.norm(query)
+        rows = [i for i, d in enumerate(docs) if len(d.get("embedding") or []) == query.shape[0]]
+        if query_norm == 0.0 or not rows:
+            return scores
+        matrix = np.asarray([docs[i]["embedding"] for i in rows], dtype="float32")
+        norms = np.linalg.norm(matrix, axis=1) * query_norm
+        dots = matrix @ query
+        for i, dot, denom in zip(rows, dots.tolist(), norms.tolist()):
+            scores[i] = dot / denom if denom else 0.0
+        return scores
+
     def append_turn(self, user_id: str, conversation_id: str, user_msg: str, bot_msg: str, metadata: Dict[str, Any]):
         key = self._ctx_key(user_id, conversation_id)
         turn = {
@@ -119,8 +139,8 @@ class ConversationContextService:
             ).sort("timestamp", -1).limit(100)
         )
         scored = []
-        for d in docs:
-            score = self._cosine(query_embedding, d.get("embedding", []))
+        # Fuera del hub: con 100-200 embeddings el cálculo ya se nota en los demás sockets
+        for d, score in zip(docs, run_cpu_bound(self._similarities, query_embedding, docs)):
             if score > 0:
                 scored.append({"score": score, "text": d.get("text", ""), "metadata": d.get("metadata", {}), "source_turn_id": d.get("source_turn_id")})
         scored.sort(key=lambda x: x["score"], reverse=True)
@@ -139,8 +159,7 @@ class ConversationContextService:
             ).sort("timestamp", -1).limit(200)
         )
         scored = []
-        for d in docs:
-            score = self._cosine(query_embedding, d.get("embedding", []))
+        for d, score in zip(docs, run_cpu_bound(self._similarities, query_embedding, docs)):
             if score > 0:
                 scored.append(
                     {
@@ -254,3 +273,14 @@ class ConversationContextService:
             "max_questions_per_turn": 2,
             "intro_mode": "brief_context_plus_one_question",
         }
+
+
+_shared_service = None
+
+
+def get_conversation_context_service() -> ConversationContextService:
+    """Instancia compartida entre turnos (evita reconstruir el servicio por cada Chatbot)."""
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = ConversationContextService()
+    return _shared_service
@@ -1,14 +1,67 @@
 import re
 import unicodedata
+from functools import lru_cache
 from typing import Optional
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Explicit temporal anchors.
+_TEMPORAL_ANCHORS = (
+    r"\bdesde\b",
+    r"\bhace\b",
+    r"\bdurante\b",
+    r"\bpor\b",
+    r"\bayer\b",
+    r"\banoche\b",
+    r"\bhoy\b",
+    r"\besta (?:manana|tarde|noche)\b",
+    r"\bmedia hora\b",
+    r"\bun rato\b",
+)
+
+# Numeric + duration units with optional spaces (e.g. "2 horas", "48h", "3d", "2 sem").
+_UNIT_PATTERN = (
+    r"\b\d+\s*("
+    r"seg(?:undo)?s?|"
+    r"min(?:uto)?s?|"
+    r"h(?:ora)?s?|hr?s?|"
+    r"d(?:ia)?s?|"
+    r"sem(?:ana)?s?|"
+    r"mes(?:es)?|"
+    r"a(?:n|ñ)o?s?"
+    r")\b"
+)
+
+# Compact formats frequently used in chat (e.g. 24h, 7d, 2sem, 3mes).
+_COMPACT_PATTERN = r"\b\d+(?:h|hr|hrs|d|sem|mes|ano|anos|año|años)\b"
+
+# Qualitative quantities with units (e.g. "varios dias", "unas semanas").
+_QUALITATIVE_PATTERN = (
+    r"\b(?:varios|varias|unos|unas|algunos|algunas)\s+"
+    r"(?:dias|horas|minutos|semanas|meses|anos|años)\b"
+)
+
+# Todas las pistas en una única regex: basta con que alguna aparezca
+_DURATION_CLUE_RE = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in (*_TEMPORAL_ANCHORS, _UNIT_PATTERN, _COMPACT_PATTERN, _QUALITATIVE_PATTERN))
+)
+
+_CACHE_SIZE = 1024
+
+
 def _normalize_text(text: str) -> str:
     lowered = (text or "").strip().lower()
     no_accents = "".join(
         ch for ch in unicodedata.normalize("NFKD", lowered) if unicodedata.category(ch) != "Mn"
     )
-    return re.sub(r"\s+", " ", no_accents).strip()
+    return _WHITESPACE_RE.sub(" ", no_accents).strip()
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _has_duration_clue(original: str) -> bool:
+    # Memoizado por texto: el mismo mensaje se consulta varias veces en un turno
+    return _DURATION_CLUE_RE.search(_normalize_text(original)) is not None
 
 
 def extract_duration_text(text: str) -> Optional[str]:
@@ -20,50 +73,4 @@ def extract_duration_text(text: str) -> Optional[str]:
         return None
 
     original = text.strip()
-    normalized = _normalize_text(original)
-
-    # Explicit temporal anchors.
-    temporal_anchors = [
-        r"\bdesde\b",
-        r"\bhace\b",
-        r"\bdurante\b",
-        r"\bpor\b",
-        r"\bayer\b",
-        r"\banoche\b",
-        r"\bhoy\b",
-        r"\besta (?:manana|tarde|noche)\b",
-        r"\bmedia hora\b",
-        r"\bun rato\b",
-    ]
-    if any(re.search(pattern, normalized) for pattern in temporal_anchors):
-        return original
-
-    # Numeric + duration units with optional spaces (e.g. "2 horas", "48h", "3d", "2 sem").
-    unit_pattern = (
-        r"\b\d+\s*("
-        r"seg(?:undo)?s?|"
-        r"min(?:uto)?s?|"
-        r"h(?:ora)?s?|hr?s?|"
-        r"d(?:ia)?s?|"
-        r"sem(?:ana)?s?|"
-        r"mes(?:es)?|"
-        r"a(?:n|ñ)o?s?"
-        r")\b"
-    )
-    if re.search(unit_pattern, normalized):
-        return original
-
-    # Compact formats frequently used in chat (e.g. 24h, 7d, 2sem, 3mes).
-    compact_pattern = r"\b\d+(?:h|hr|hrs|d|sem|mes|ano|anos|año|años)\b"
-    if re.search(compact_pattern, normalized):
-        return original
-
-    # Qualitative quantities with units (e.g. "varios dias", "unas semanas").
-    qualitative_pattern = (
-        r"\b(?:varios|varias|unos|unas|algunos|algunas)\s+"
-        r"(?:dias|horas|minutos|semanas|meses|anos|años)\b"
-    )
-    if re.search(qualitative_pattern, normalized):
-        return original
-
-    return None
+    return original if _has_duration_clue(original) else None
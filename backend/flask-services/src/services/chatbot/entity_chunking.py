@@ -0,0 +1,162 @@
+"""
+Extracción de entidades por trozos para textos largos (transcripciones del ETL).
+
+Comprehend Medical rechaza textos de más de 20.000 caracteres y una conversación larga los supera.
+Por eso el texto se corta en fronteras de frase, en trozos de hasta CHAT_ENTITY_CHUNK_CHARS
+caracteres. Los trozos se analizan en paralelo a través de EntityDetectionService, que cachea cada
+trozo en Redis por hash. Después se unen las entidades, con los offsets llevados al texto
+completo, y se quitan los duplicados.
+
+El ETL usa extract_segments con los mensajes del usuario: cada mensaje es un trozo propio (o
+varios, si es muy largo). Así, relanzar el ETL solo analiza los mensajes nuevos, y los mensajes
+que ya pasaron por el chat salen de la caché que llenó el turno, que usa la misma clave.
+
+Si falla el análisis de algún trozo se propaga el error: unas entidades parciales se guardarían en
+el punto de control incremental de la ETL como si el texto ya estuviera analizado.
+"""
+
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.config import Config
+from services.chatbot.entity_detection_service import EntityDetectionService, get_entity_detection_service
+from services.chatbot.entity_extractors import EntityExtractor
+
+logger = logging.getLogger(__name__)
+
+# Fin de frase: puntuación final (y comillas/paréntesis de cierre) seguida de espacio, o salto de línea
+_SENTENCE_END_RE = re.compile(r"[.!?…]+[\"')\]»]*\s+|\n+")
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """Spans (inicio, fin) de las frases de `text`; cada frase incluye el espacio que la sigue."""
+    spans = []
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        spans.append((start, match.end()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def _split_long_span(text: str, start: int, end: int, max_chars: int) -> List[Tuple[int, int]]:
+    """Parte una frase más larga que max_chars por el último espacio disponible (o en seco)."""
+    pieces = []
+    while end - start > max_chars:
+        cut = text.rfind(" ", start + 1, start + max_chars + 1)
+        cut = cut + 1 if cut > start else start + max_chars
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def plan_chunks(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """Agrupa frases consecutivas en trozos de hasta max_chars caracteres (de forma determinista)."""
+    chunks: List[Tuple[int, int]] = []
+    chunk_start: Optional[int] = None
+    chunk_end = 0
+    for start, end in split_sentences(text):
+        for piece_start, piece_end in _split_long_span(text, start, end, max_chars):
+            if chunk_start is not None and piece_end - chunk_start > max_chars:
+                chunks.append((chunk_start, chunk_end))
+                chunk_start = None
+            if chunk_start is None:
+                chunk_start = piece_start
+            chunk_end = piece_end
+    if chunk_start is not None:
+        chunks.append((chunk_start, chunk_end))
+    return chunks
+
+
+def merge_chunk_entities(chunk_results: List[Tuple[int, List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Une las entidades de cada trozo, sumando a los offsets el inicio del trozo. Quita los
+    duplicados (misma categoría, tipo, texto sin distinguir mayúsculas y mismos Traits): se queda
+    la primera aparición, con la puntuación más alta. Una mención negada y otra afirmada del mismo
+    término se conservan las dos ("no tengo fiebre" ... "ahora sí tengo fiebre").
+    """
+    merged: Dict[Tuple[str, str, str, Tuple[str, ...]], Dict[str, Any]] = {}
+    for chunk_start, entities in chunk_results:
+        for entity in entities:
+            remapped = dict(entity)
+            for key in ("BeginOffset", "EndOffset"):
+                if isinstance(remapped.get(key), int):
+                    remapped[key] += chunk_start
+            identity = (
+                remapped.get("Category", ""),
+                remapped.get("Type", ""),
+                " ".join(str(remapped.get("Text", "")).lower().split()),
+                tuple(sorted({str(trait.get("Name", "")) for trait in remapped.get("Traits") or []})),
+            )
+            current = merged.get(identity)
+            if current is None:
+                merged[identity] = remapped
+            elif remapped.get("Score", 0.0) > current.get("Score", 0.0):
+                current["Score"] = remapped["Score"]
+    return list(merged.values())
+
+
+class ChunkedEntityExtractor(EntityExtractor):
+    """Extractor para textos largos: trozos por frases, en paralelo y cacheados por trozo."""
+
+    name = "chunked"
+
+    def __init__(
+        self,
+        service: Optional[EntityDetectionService] = None,
+        max_chars: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ):
+        self._service = service
+        self.max_chars = max(1, int(max_chars or Config.CHAT_ENTITY_CHUNK_CHARS))
+        self.max_workers = max(1, int(max_workers or Config.CHAT_ENTITY_CHUNK_WORKERS))
+
+    @property
+    def service(self) -> EntityDetectionService:
+        return self._service or get_entity_detection_service()
+
+    def _analyze(self, pieces: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+        service = self.service
+        if len(pieces) <= 1 or self.max_workers == 1:
+            results = [service.detect(piece, raise_errors=True) for _, piece in pieces]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pieces))) as pool:
+                results = list(pool.map(lambda item: service.detect(item[1], raise_errors=True), pieces))
+        logger.debug("Entidades extraídas en %d trozos", len(pieces))
+        return merge_chunk_entities([(offset, entities) for (offset, _), entities in zip(pieces, results)])
+
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        if not isinstance(text, str) or not text.strip():
+            return []
+        return self._analyze([(start, text[start:end]) for start, end in plan_chunks(text, self.max_chars)])
+
+    def extract_segments(self, segments: List[str], separator: str = " ") -> List[Dict[str, Any]]:
+        """
+        Entidades de separator.join(segments) analizando cada segmento por separado (partido por
+        frases si supera max_chars). Los offsets son relativos al texto unido.
+        """
+        pieces: List[Tuple[int, str]] = []
+        offset = 0
+        for segment in segments:
+            if isinstance(segment, str) and segment.strip():
+                if len(segment) <= self.max_chars:
+                    pieces.append((offset, segment))
+                else:
+                    pieces.extend((offset + start, segment[start:end]) for start, end in plan_chunks(segment, self.max_chars))
+            offset += len(segment or "") + len(separator)
+        return self._analyze(pieces)
+
+
+_shared_extractor: Optional[ChunkedEntityExtractor] = None
+
+
+def get_chunked_entity_extractor() -> ChunkedEntityExtractor:
+    """Extractor por trozos compartido por las ejecuciones del ETL del proceso."""
+    global _shared_extractor
+    if _shared_extractor is None:
+        _shared_extractor = ChunkedEntityExtractor()
+    return _shared_extractor
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from config.config import Config
+from data.connect import get_context_redis_client
+from services.chatbot.entity_extractors import get_entity_extractor
+from services.turn_metrics import span
+
+logger = logging.getLogger(__name__)
+
+
+class EntityDetectionService:
+    """
+    Detección de entidades médicas (extractor configurado, ver entity_extractors) sin llamadas repetidas:
+      - memo del turno: dict que aporta quien llama (p. ej. el Chatbot) y que vive lo que dura el turno;
+      - caché compartida en Redis: backend + sha256(texto) -> entidades, con TTL, común a todos los procesos.
+    Solo se guardan respuestas correctas: si el extractor falla se devuelve [] (o se propaga el error
+    con raise_errors) y se reintenta en el siguiente turno. Los contadores permiten comprobar que hay una llamada por texto distinto.
+    """
+
+    KEY_ENTITIES = "chat:entities:{backend}:{digest}"
+
+    def __init__(
+        self,
+        detector: Optional[Callable[[str], List[Dict[str, Any]]]] = None,
+        redis_client=None,
+        ttl_seconds: Optional[int] = None,
+        backend: Optional[str] = None,
+    ):
+        if detector is None:
+            extractor = get_entity_extractor()
+            detector = extractor.extract
+            backend = backend or extractor.name
+        self._detector = detector
+        # Cada backend tiene su propia caché: las entidades locales no sustituyen a las de Comprehend
+        self.backend = backend or Config.CHAT_ENTITY_EXTRACTOR
+        self._redis_client = redis_client
+        self.ttl_seconds = Config.CHAT_ENTITY_CACHE_TTL_SECONDS if ttl_seconds is None else int(ttl_seconds)
+        self._lock = threading.Lock()
+        self._calls_by_digest: Counter = Counter()
+        self.requests = 0
+        self.memo_hits = 0
+        self.cache_hits = 0
+        self.api_calls = 0
+        self.errors = 0
+
+    @staticmethod
+    def key_for(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _redis(self):
+        return self._redis_client if self._redis_client is not None else get_context_redis_client()
+
+    def _cache_get(self, digest: str) -> Optional[List[Dict[str, Any]]]:
+        if self.ttl_seconds <= 0:
+            return None
+        try:
+            raw = self._redis().get(self.KEY_ENTITIES.format(backend=self.backend, digest=digest))
+        except Exception as e:
+            logger.warning("Caché de entidades no disponible: %s", e)
+            return None
+        if raw is None:
+            return None
+        try:
+            entities = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        return entities if isinstance(entities, list) else None
+
+    def _cache_set(self, digest: str, entities: List[Dict[str, Any]]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        try:
+            self._redis().set(
+                self.KEY_ENTITIES.format(backend=self.backend, digest=digest),
+                json.dumps(entities, ensure_ascii=False),
+                ex=self.ttl_seconds,
+            )
+        except Exception as e:
+            logger.warning("No se pudieron cachear las entidades: %s", e)
+
+    def detect(
+        self, text: str, memo: Optional[Dict[str, Any]] = None, raise_errors: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Entidades de `text`: memo del turno, después Redis y, solo si no están, el extractor.
+        Con raise_errors el fallo del extractor se propaga en vez de devolver [] (p. ej. la ETL, que
+        no puede distinguir "sin entidades" de "no se pudo analizar").
+        """
+        if not isinstance(text, str) or not text.strip():
+            return []
+        digest = self.key_for(text)
+        with self._lock:
+            self.requests += 1
+            if memo is not None and digest in memo:
+                self.memo_hits += 1
+                return memo[digest]
+
+        entities = self._cache_get(digest)
+        if entities is not None:
+            with self._lock:
+                self.cache_hits += 1
+        else:
+            with self._lock:
+                self.api_calls += 1
+                self._calls_by_digest[digest] += 1
+            try:
+                with span("entities"):
+                    entities = self._detector(text)
+            except Exception as e:
+                logger.error(f"Error detecting medical entities: {e}")
+                with self._lock:
+                    self.errors += 1
+                if raise_errors:
+                    raise
+                entities = []
+            else:
+                self._cache_set(digest, entities)
+
+        if memo is not None:
+            # También los fallos: no se reintenta dentro del mismo turno
+            memo[digest] = entities
+        return entities
+
+    def calls_for(self, text: str) -> int:
+        """Llamadas al extractor hechas por este proceso para `text`."""
+        with self._lock:
+            return self._calls_by_digest.get(self.key_for(text), 0)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._calls_by_digest.clear()
+            self.requests = self.memo_hits = self.cache_hits = self.api_calls = self.errors = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "requests": self.requests,
+                "memo_hits": self.memo_hits,
+                "cache_hits": self.cache_hits,
+                "api_calls": self.api_calls,
+                "errors": self.errors,
+                "unique_texts": len(self._calls_by_digest),
+                "max_calls_per_text": max(self._calls_by_digest.values(), default=0),
+            }
+
+
+_shared_service: Optional[EntityDetectionService] = None
+
+
+def get_entity_detection_service() -> EntityDetectionService:
+    """Instancia compartida por los turnos del proceso (los contadores son del proceso)."""
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = EntityDetectionService()
+    return _shared_service
+
+
+def get_entity_detection_stats() -> dict:
+    """Métricas de la detección de entidades (aciertos de memo/Redis y llamadas al extractor)."""
+    return get_entity_detection_service().stats()
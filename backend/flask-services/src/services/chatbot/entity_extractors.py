@@ -0,0 +1,260 @@
+"""
+Extractores de entidades médicas intercambiables.
+
+Todos devuelven la misma forma que Comprehend Medical (lista de dicts con Text, Category,
+Type, Score, Traits y los offsets BeginOffset/EndOffset sobre el texto original):
+
+  - ComprehendMedicalExtractor: Comprehend Medical (red, coste por carácter, límite de tamaño).
+  - LocalMedicalNerExtractor: reglas y diccionario en español, sin red. El vocabulario sale de
+    TriageClassification (COMMON_SYMPTOMS y TRIAGE_CRITERIA) y de la base de conocimiento del
+    sistema experto (banderas rojas y marcadores de triaje), más anatomía y medicamentos comunes.
+  - HybridEntityExtractor: usa el local y solo llama a Comprehend si el local no encuentra
+    ninguna condición médica (los turnos sencillos no salen a la red).
+
+El backend se elige con CHAT_ENTITY_EXTRACTOR (comprehend | local | hybrid).
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.config import Config
+from services.chatbot import comprehend_medical
+
+logger = logging.getLogger(__name__)
+
+LOCAL_MATCH_SCORE = 0.8
+
+ANATOMY_TERMS = (
+    "cabeza", "cuello", "espalda", "pecho", "torax", "abdomen", "estomago", "barriga", "garganta",
+    "ojo", "ojos", "oido", "oidos", "nariz", "boca", "muela", "diente", "dientes", "brazo", "brazos",
+    "pierna", "piernas", "rodilla", "rodillas", "tobillo", "pie", "pies", "mano", "manos", "muneca",
+    "munecas", "hombro", "hombros", "cadera", "columna", "lumbar", "corazon", "pulmon", "pulmones",
+    "piel", "riñon", "rinon", "higado",
+)
+MEDICATION_TERMS = (
+    "paracetamol", "ibuprofeno", "aspirina", "acido acetilsalicilico", "metamizol", "nolotil",
+    "naproxeno", "dexketoprofeno", "enantyum", "omeprazol", "amoxicilina", "azitromicina",
+    "diazepam", "lorazepam", "alprazolam", "orfidal", "sertralina", "fluoxetina", "escitalopram",
+    "loratadina", "cetirizina", "ebastina", "salbutamol", "ventolin", "insulina", "metformina",
+    "enalapril", "losartan", "atorvastatina", "levotiroxina", "sumatriptan", "antihistaminico",
+    "antibiotico", "analgesico", "antiinflamatorio",
+)
+EXTRA_CONDITION_TERMS = (
+    "dolor", "fiebre", "mareo", "mareos", "vomitos", "vomito", "diarrea", "estrenimiento",
+    "cefalea", "migrana", "jaqueca", "palpitaciones", "temblor", "temblores", "sudoracion",
+    "escalofrios", "nauseas", "tos seca", "mocos", "picor", "sarpullido", "hinchazon",
+    "desmayo", "vision borrosa", "hormigueo", "entumecimiento", "ataque de panico", "angustia",
+    "alucinaciones", "rigidez de cuello", "duele la cabeza", "duele el pecho", "duele la espalda",
+    "duele el estomago", "duele la garganta", "duele la barriga", "duelen las piernas",
+)
+# "tengo 35 años" / "35 años de edad"; no "hace 3 años" ni "desde hace 2 años"
+_AGE_RE = re.compile(
+    r"\b(?:tengo|con|de)\s+(\d{1,3}\s+anos)\b(?!\s+(?:de\s+)?(?:evolucion|con|que|sin))"
+    r"|\b(\d{1,3}\s+anos)\s+de\s+edad\b"
+)
+
+# Negación al estilo NegEx: una clave de negación pocas palabras antes del término, en la misma
+# proposición ("no tengo dolor en el pecho", "sin fiebre", "ni tos ni mocos")
+NEGATION_CUES = frozenset(("no", "sin", "niego", "niega", "nunca", "jamas", "ni", "tampoco", "ningun", "ninguna"))
+NEGATION_WINDOW_TOKENS = 4
+NEGATABLE_CATEGORIES = ("MEDICAL_CONDITION", "MEDICATION")
+_CLAUSE_BREAK_RE = re.compile(r"[.,;:!?¿¡()\n]|\b(?:pero|aunque|sino|sin embargo)\b")
+_WORD_RE = re.compile(r"\w+")
+
+
+def _is_negated(folded: str, start: int) -> bool:
+    """True si hay una clave de negación en las NEGATION_WINDOW_TOKENS palabras anteriores a `start`."""
+    window = folded[:start]
+    boundaries = list(_CLAUSE_BREAK_RE.finditer(window))
+    if boundaries:
+        window = window[boundaries[-1].end():]
+    return any(word in NEGATION_CUES for word in _WORD_RE.findall(window)[-NEGATION_WINDOW_TOKENS:])
+
+
+def _fold_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """Texto en minúsculas y sin tildes, con el índice original de cada carácter resultante."""
+    folded: List[str] = []
+    offsets: List[int] = []
+    for index, char in enumerate(text):
+        for out in unicodedata.normalize("NFKD", char.lower()):
+            if unicodedata.category(out) != "Mn":
+                folded.append(out)
+                offsets.append(index)
+    return "".join(folded), offsets
+
+
+def _fold_term(term: str) -> str:
+    folded, _ = _fold_with_offsets(str(term).strip())
+    return " ".join(folded.split())
+
+
+class EntityExtractor(ABC):
+    """Interfaz mínima: extract(texto) y extract_batch(textos) con la forma de Comprehend Medical."""
+
+    name = "base"
+
+    @abstractmethod
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        """Entidades del texto con la forma de Comprehend Medical."""
+
+    def extract_batch(self, texts: Iterable[str]) -> List[List[Dict[str, Any]]]:
+        return [self.extract(text) for text in texts]
+
+
+class ComprehendMedicalExtractor(EntityExtractor):
+    name = "comprehend"
+
+    def __init__(self, fetch: Optional[Callable[[str], List[Dict[str, Any]]]] = None):
+        self._fetch = fetch or comprehend_medical.fetch_entities
+
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        # Propaga los errores: quien cachea decide qué hacer con un fallo
+        return self._fetch(text)
+
+
+class LocalMedicalNerExtractor(EntityExtractor):
+    """
+    NER por diccionario: una sola regex (alternancia de términos, el más largo primero) sobre el
+    texto plegado, con los offsets devueltos sobre el texto original. El vocabulario se reconstruye
+    si cambia la versión de la base de conocimiento (recarga en caliente).
+    """
+
+    name = "local"
+
+    def __init__(self, kb_provider: Optional[Callable[[], Any]] = None):
+        self._kb_provider = kb_provider
+        self._lock = threading.Lock()
+        self._kb_version: Optional[str] = None
+        self._pattern: Optional[re.Pattern] = None
+        self._labels: Dict[str, Tuple[str, str]] = {}
+
+    def _knowledge_base(self):
+        if self._kb_provider is not None:
+            return self._kb_provider()
+        # Importación diferida: el sistema experto importa módulos de services.chatbot
+        from services.expert_system.loader import get_compiled_knowledge_base
+
+        return get_compiled_knowledge_base()
+
+    @staticmethod
+    def _condition_terms(kb) -> List[str]:
+        from services.chatbot.triaje_classification import TriageClassification
+
+        terms = [s for symptoms in TriageClassification.COMMON_SYMPTOMS.values() for s in symptoms]
+        for criteria in TriageClassification.TRIAGE_CRITERIA.values():
+            for key in ("urgent_symptoms", "concerning_symptoms", "minor_symptoms"):
+                terms.extend(criteria.get(key, []))
+        emergency = kb.emergency if kb is not None else {}
+        terms.extend(flag.get("keyword", "") for flag in emergency.get("global_red_flags", []) or [])
+        for flags in (emergency.get("case_red_flags", {}) or {}).values():
+            terms.extend(flag.get("keyword", "") for flag in flags or [])
+        policy = kb.triage_policy if kb is not None else {}
+        terms.extend(policy.get("severe_markers", []) or [])
+        terms.extend(policy.get("moderate_markers", []) or [])
+        terms.extend(EXTRA_CONDITION_TERMS)
+        return terms
+
+    def _vocabulary(self) -> Tuple[Optional[re.Pattern], Dict[str, Tuple[str, str]]]:
+        kb = self._knowledge_base()
+        version = getattr(kb, "version", "")
+        if self._pattern is not None and version == self._kb_version:
+            return self._pattern, self._labels
+        with self._lock:
+            if self._pattern is None or version != self._kb_version:
+                labels: Dict[str, Tuple[str, str]] = {}
+                # Orden de prioridad ante un mismo término: condición > medicamento > anatomía
+                for terms, label in (
+                    (ANATOMY_TERMS, ("ANATOMY", "SYSTEM_ORGAN_SITE")),
+                    (MEDICATION_TERMS, ("MEDICATION", "GENERIC_NAME")),
+                    (self._condition_terms(kb), ("MEDICAL_CONDITION", "DX_NAME")),
+                ):
+                    for term in terms:
+                        folded = _fold_term(term)
+                        if folded:
+                            labels[folded] = label
+                alternation = "|".join(
+                    re.escape(term).replace(r"\ ", r"\s+") for term in sorted(labels, key=len, reverse=True)
+                )
+                self._pattern = re.compile(rf"\b(?:{alternation})\b") if labels else None
+                self._labels = labels
+                self._kb_version = version
+        return self._pattern, self._labels
+
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        if not isinstance(text, str) or not text.strip():
+            return []
+        pattern, labels = self._vocabulary()
+        folded, offsets = _fold_with_offsets(text)
+
+        spans: List[Tuple[int, int, str, str]] = []
+        if pattern is not None:
+            for match in pattern.finditer(folded):
+                category, entity_type = labels[" ".join(match.group().split())]
+                spans.append((match.start(), match.end(), category, entity_type))
+        for match in _AGE_RE.finditer(folded):
+            group = 1 if match.group(1) else 2
+            spans.append((match.start(group), match.end(group), "PROTECTED_HEALTH_INFORMATION", "AGE"))
+
+        entities = []
+        for start, end, category, entity_type in sorted(spans):
+            begin = offsets[start]
+            finish = offsets[end - 1] + 1
+            traits = []
+            if category in NEGATABLE_CATEGORIES and _is_negated(folded, start):
+                traits.append({"Name": "NEGATION", "Score": LOCAL_MATCH_SCORE})
+            entities.append(
+                {
+                    "Text": text[begin:finish],
+                    "Category": category,
+                    "Type": entity_type,
+                    "Score": LOCAL_MATCH_SCORE,
+                    "BeginOffset": begin,
+                    "EndOffset": finish,
+                    "Traits": traits,
+                }
+            )
+        return entities
+
+
+class HybridEntityExtractor(EntityExtractor):
+    """Local primero; Comprehend solo cuando el diccionario no reconoce ninguna condición médica."""
+
+    name = "hybrid"
+
+    def __init__(self, local: Optional[EntityExtractor] = None, remote: Optional[EntityExtractor] = None):
+        self.local = local or LocalMedicalNerExtractor()
+        self.remote = remote or ComprehendMedicalExtractor()
+
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        entities = self.local.extract(text)
+        if any(entity.get("Category") == "MEDICAL_CONDITION" for entity in entities):
+            return entities
+        return self.remote.extract(text)
+
+
+_EXTRACTORS = {
+    "comprehend": ComprehendMedicalExtractor,
+    "local": LocalMedicalNerExtractor,
+    "hybrid": HybridEntityExtractor,
+}
+_shared_extractor: Optional[EntityExtractor] = None
+
+
+def build_entity_extractor(name: Optional[str] = None) -> EntityExtractor:
+    key = str(name or Config.CHAT_ENTITY_EXTRACTOR or "comprehend").strip().lower()
+    if key not in _EXTRACTORS:
+        logger.warning("CHAT_ENTITY_EXTRACTOR desconocido (%s); se usa comprehend", key)
+        key = "comprehend"
+    return _EXTRACTORS[key]()
+
+
+def get_entity_extractor() -> EntityExtractor:
+    """Extractor configurado, compartido por el proceso."""
+    global _shared_extractor
+    if _shared_extractor is None:
+        _shared_extractor = build_entity_extractor()
+    return _shared_extractor
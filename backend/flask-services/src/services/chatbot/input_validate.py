@@ -1,20 +1,101 @@
+import logging
 import re
 import unicodedata
-from nltk.tokenize import word_tokenize
-import nltk
-from nltk.corpus import stopwords
 
-def setup_nltk():
-    nltk.download('punkt')
-    nltk.download('wordnet')
-    nltk.download('stopwords')
-    nltk.download('punkt_tab')
+from config.config import Config
+from services.chatbot.tokenizer import regex_tokenize
+from services.chatbot.turn_text import as_turn_text
 
+# NLTK es opcional: el tokenizador por defecto es regex_tokenize; NLTK solo aporta el corpus
+# de stopwords y el modo CHAT_TOKENIZER=nltk.
 try:
-    stop_words = set(stopwords.words('spanish'))
-except LookupError:
-    nltk.download('stopwords')
-    stop_words = set(stopwords.words('spanish'))
+    import nltk
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize
+except ImportError:  # pragma: no cover - depende del entorno
+    nltk = None
+    stopwords = None
+    word_tokenize = None
+
+logger = logging.getLogger(__name__)
+
+# Recursos NLTK que usa el servicio. Se instalan en la imagen (ver Dockerfile);
+# en tiempo de ejecución solo se comprueban, nunca se descargan.
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "stopwords": "corpora/stopwords",
+}
+TOKENIZER_MODE = Config.CHAT_TOKENIZER
+
+# Respaldo mínimo si el corpus de stopwords no está instalado
+FALLBACK_SPANISH_STOPWORDS = {
+    "a", "al", "algo", "ante", "con", "como", "de", "del", "desde", "donde", "el", "ella",
+    "en", "entre", "era", "es", "esa", "ese", "esta", "este", "esto", "fue", "ha", "hay",
+    "la", "las", "le", "les", "lo", "los", "mas", "me", "mi", "mis", "muy", "ni", "no",
+    "nos", "o", "para", "pero", "por", "que", "se", "sin", "sobre", "son", "su", "sus",
+    "tambien", "te", "ti", "tu", "tus", "un", "una", "uno", "unos", "y", "ya", "yo",
+}
+
+
+def verify_nltk_resources():
+    """Devuelve la lista de recursos NLTK que faltan en local (sin descargar nada)."""
+    # punkt solo hace falta con CHAT_TOKENIZER=nltk
+    required = {
+        name: path for name, path in NLTK_RESOURCES.items()
+        if TOKENIZER_MODE == "nltk" or not name.startswith("punkt")
+    }
+    if nltk is None:
+        logger.warning("NLTK no está instalado: se usan las stopwords y el tokenizador locales.")
+        return list(required)
+    missing = []
+    for name, path in required.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(name)
+    if missing:
+        logger.warning(
+            "Recursos NLTK no instalados: %s. Se usarán los respaldos locales "
+            "(instálalos con `python -m nltk.downloader %s`).",
+            ", ".join(missing),
+            " ".join(missing),
+        )
+    return missing
+
+
+def setup_nltk():
+    """Compatibilidad: antes descargaba los recursos; ahora solo los verifica."""
+    return verify_nltk_resources()
+
+
+def _load_stop_words():
+    if stopwords is None:
+        return set(FALLBACK_SPANISH_STOPWORDS)
+    try:
+        return set(stopwords.words('spanish'))
+    except LookupError:
+        return set(FALLBACK_SPANISH_STOPWORDS)
+
+
+stop_words = _load_stop_words()
+
+
+_punkt_available = None
+
+
+def tokenize(text):
+    """Tokeniza con regex_tokenize (mismo resultado que word_tokenize) o, si se pide, con NLTK."""
+    global _punkt_available
+    if TOKENIZER_MODE == "nltk" and word_tokenize is not None and _punkt_available is not False:
+        try:
+            tokens = word_tokenize(text)
+            _punkt_available = True
+            return tokens
+        except LookupError:
+            # Se comprueba una sola vez; no se vuelve a buscar el recurso en cada mensaje
+            _punkt_available = False
+    return regex_tokenize(text)
 
 # Palabras de saludo que deben permitirse aunque sean "stopwords"
 greeting_words = {"hola", "buenas", "buenos", "saludos", "hey", "hi", "hello"}
@@ -31,6 +112,8 @@ HARMFUL_PATTERNS = [
     r'\b(select|drop|union|insert|delete)\b',  # Prevenir inyección SQL
     r'[^\w\s\u00C0-\u00FF.?!,áéíóúüñ¿¡]'  # Permitir caracteres en español
 ]
+_HARMFUL_RES = [re.compile(pattern, re.IGNORECASE) for pattern in HARMFUL_PATTERNS]
+_REPEATED_CHAR_RE = re.compile(r'(.)\1{4,}')
 
 def normalize_text(text):
     """Normaliza texto eliminando acentos y convirtiendo a minúsculas."""
@@ -40,9 +123,8 @@ def normalize_text(text):
     ).lower()
 
 def is_greeting_message(text):
-    """Verifica si el mensaje es un saludo simple."""
-    normalized = normalize_text(text.strip())
-    tokens = word_tokenize(normalized)
+    """Verifica si el mensaje es un saludo simple. Acepta texto o TurnText."""
+    tokens = as_turn_text(text).tokens
     
     # Si el mensaje tiene 1-3 palabras y contiene palabras de saludo
     if len(tokens) <= 3:
@@ -50,32 +132,35 @@ def is_greeting_message(text):
     return False
 
 def validate_input(user_message):
-    """Valida la entrada del usuario con múltiples capas de verificación."""
+    """Valida la entrada del usuario con múltiples capas de verificación. Acepta texto o TurnText."""
+    turn = as_turn_text(user_message)
+    user_message = turn.text
+
     # Verificar mensaje vacío o solo espacios
     if not user_message or user_message.isspace():
         return False, "El mensaje no puede estar vacío."
     
-    # Normalizar y limpiar el texto
-    normalized_message = normalize_text(user_message)
+    # Normalizar y limpiar el texto (una vez por turno, compartido vía TurnText)
+    normalized_message = turn.folded
     
     # Verificar longitud máxima
     if len(user_message) > 500:
         return False, "El mensaje es demasiado largo. Límite máximo: 500 caracteres."
     
     # Verificar patrones dañinos con regex
-    for pattern in HARMFUL_PATTERNS:
-        if re.search(pattern, normalized_message, re.IGNORECASE):
+    for pattern in _HARMFUL_RES:
+        if pattern.search(normalized_message):
             return False, "Entrada no válida: se detectaron caracteres o patrones potencialmente dañinos."
     
     # Análisis de tokens
-    tokens = word_tokenize(normalized_message)
+    tokens = turn.tokens
     
     # Verificar si es un saludo simple - permitir sin validación adicional
-    if is_greeting_message(user_message):
+    if is_greeting_message(turn):
         return True, ""
     
     # Remover stopwords para mensajes no-saludo
-    filtered_tokens = [token for token in tokens if token not in stop_words]
+    filtered_tokens = turn.content_tokens
     
     # Verificar densidad de palabras significativas (más flexible)
     if len(filtered_tokens) == 0 and len(tokens) > 3:
@@ -90,22 +175,22 @@ def validate_input(user_message):
         return False, "El mensaje debe contener al menos una palabra significativa."
     
     # Verificar repetición excesiva de caracteres
-    if re.search(r'(.)\1{4,}', user_message):  # Cambiado de 3 a 4 para ser menos restrictivo
+    if _REPEATED_CHAR_RE.search(user_message):  # Cambiado de 3 a 4 para ser menos restrictivo
         return False, "No se permiten repeticiones excesivas de caracteres."
     
     return True, ""
 
 def analyze_message(user_message):
-    """Analiza el mensaje después de la validación."""
-    is_valid, error_message = validate_input(user_message)
+    """Analiza el mensaje después de la validación. Acepta texto o TurnText."""
+    turn = as_turn_text(user_message)
+    is_valid, error_message = validate_input(turn)
     if not is_valid:
         return ("input_error", error_message)
     
-    normalized_message = normalize_text(user_message)
-    tokens = word_tokenize(normalized_message)
+    normalized_message = turn.folded
     
     # Verificar si es un saludo
-    if is_greeting_message(user_message):
+    if is_greeting_message(turn):
         return ("greeting", "")
     
     if any(keyword in normalized_message for keyword in diagnosis_keywords):
@@ -1,5 +1,6 @@
 import re
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 
 PAIN_KEYWORD_SCORES = {
@@ -28,55 +29,64 @@ def _dedupe_keep_order(values: List[int]) -> List[int]:
     return ordered
 
 
-def extract_pain_scales(text: str) -> List[int]:
-    """Extract all explicit/implicit pain levels from natural language text."""
-    normalized = (text or "").strip().lower()
-    if not normalized:
-        return []
+# Patrones compilados una sola vez al importar el módulo
+_CONTEXTUAL_PAIN_RE = re.compile(
+    r"(?:dolor|intensidad|escala|nivel|ahora|ahorita|actualmente|reposo|ejercicio|esfuerzo)[^\d]{0,18}(10|[0-9])"
+)
+_DIRECT_PAIN_RE = re.compile(r"(?:un|una)?\s*(10|[0-9])")
+_SHORT_REPLY_PAIN_RE = re.compile(
+    r"(?:es|sera|seria|como|aprox(?:imadamente)?|mas o menos|ahora es|ahorita es)?\s*(?:un|una)?\s*(10|[0-9])"
+)
+_NUMERIC_TOKEN_RE = re.compile(r"\b(10|[0-9])\b")
+_SCALE_MARKERS = ("dolor", "escala", "intensidad", "ahora", "ahorita", "ejercicio", "esfuerzo")
+
+# Un mismo mensaje se consulta varias veces por turno (sistema experto, contexto, política de dolor):
+# el resultado se memoiza por texto y solo se analiza la primera vez.
+_CACHE_SIZE = 1024
+
 
-    values: List[int] = []
+@lru_cache(maxsize=_CACHE_SIZE)
+def _parse_pain_scales(text: str) -> Tuple[int, ...]:
+    normalized = text.strip().lower()
+    if not normalized:
+        return ()
 
-    contextual_matches = re.finditer(
-        r"(?:dolor|intensidad|escala|nivel|ahora|ahorita|actualmente|reposo|ejercicio|esfuerzo)[^\d]{0,18}(10|[0-9])",
-        normalized,
-    )
-    for match in contextual_matches:
-        values.append(int(match.group(1)))
+    values: List[int] = [int(match.group(1)) for match in _CONTEXTUAL_PAIN_RE.finditer(normalized)]
 
-    direct = re.fullmatch(r"(?:un|una)?\s*(10|[0-9])", normalized)
+    direct = _DIRECT_PAIN_RE.fullmatch(normalized)
     if direct:
         values.append(int(direct.group(1)))
 
     # Accept short free-form replies like "es un 4" or "como 6" when the message is brief.
-    short_reply = re.fullmatch(
-        r"(?:es|sera|seria|como|aprox(?:imadamente)?|mas o menos|ahora es|ahorita es)?\s*(?:un|una)?\s*(10|[0-9])",
-        normalized,
-    )
+    short_reply = _SHORT_REPLY_PAIN_RE.fullmatch(normalized)
     if short_reply:
         values.append(int(short_reply.group(1)))
 
     if not values:
         # Secondary pass for short messages that mention multiple scale values in one sentence.
-        numeric_tokens = [int(raw) for raw in re.findall(r"\b(10|[0-9])\b", normalized)]
-        if 1 <= len(numeric_tokens) <= 3 and any(
-            marker in normalized for marker in ("dolor", "escala", "intensidad", "ahora", "ahorita", "ejercicio", "esfuerzo")
-        ):
+        numeric_tokens = [int(raw) for raw in _NUMERIC_TOKEN_RE.findall(normalized)]
+        if 1 <= len(numeric_tokens) <= 3 and any(marker in normalized for marker in _SCALE_MARKERS):
             values.extend(numeric_tokens)
 
     values = _dedupe_keep_order(values)
     if values:
-        return values
+        return tuple(values)
 
     for keyword, score in PAIN_KEYWORD_SCORES.items():
         if keyword in normalized:
-            return [score]
+            return (score,)
+
+    return ()
+
 
-    return []
+def extract_pain_scales(text: str) -> List[int]:
+    """Extract all explicit/implicit pain levels from natural language text."""
+    return list(_parse_pain_scales(text or ""))
 
 
 def extract_pain_scale(text: str) -> Optional[int]:
     """Extract pain scale using the most severe value when multiple are reported."""
-    values = extract_pain_scales(text)
+    values = _parse_pain_scales(text or "")
     if not values:
         return None
     return max(values)
@@ -0,0 +1,134 @@
+"""
+Tokenizador por expresiones regulares compiladas, equivalente a `nltk.word_tokenize`.
+
+`word_tokenize` divide primero en oraciones con Punkt y después aplica NLTKWordTokenizer a
+cada oración. Aquí se reproduce lo mismo sin cargar modelos:
+
+  - Las reglas de NLTKWordTokenizer son locales (comas, puntos suspensivos, ?/!, contracciones),
+    así que se aplican una sola vez sobre el texto completo.
+  - La única regla que depende de las oraciones es la del punto final: un punto se separa
+    de la palabra solo si Punkt cierra ahí una oración. Esa decisión se toma con el mismo
+    algoritmo de Punkt (contexto de la palabra anterior y heurística de números/iniciales)
+    y solo para los puntos seguidos de espacio o de puntuación, que son los candidatos.
+
+La equivalencia está comprobada para el alfabeto que acepta `validate_input` (texto plegado:
+letras, dígitos, espacios y .,?!¿¡). Punkt sin entrenar no conoce abreviaturas: en inglés el
+modelo entrenado no corta tras "dr." o "etc.", este tokenizador sí.
+"""
+
+import re
+from typing import Iterator, List, Optional, Tuple
+
+# --- Punkt: candidatos a fin de oración y tokens de contexto -------------------------------
+_NON_WORD = r"(?:[)\";}\]\*:@\'\({\[?!])"
+_MULTI_CHAR = r"(?:\-{2,}|\.{2,}|(?:\.\s){2,}\.)"
+_PUNKT_WORD_RE = re.compile(
+    rf"""(
+        {_MULTI_CHAR}
+        |
+        (?=[^\(\"\`{{\[:;&\#\*@\)}}\]\-,])\S+?
+        (?=\s|$|{_NON_WORD}|{_MULTI_CHAR}|,(?=$|\s|{_NON_WORD}|{_MULTI_CHAR}))
+        |
+        \S
+    )""",
+    re.UNICODE | re.VERBOSE,
+)
+_END_CONTEXT_RE = re.compile(rf"[.?!](?=(?P<after_tok>{_NON_WORD}|\s+(?P<next_tok>\S+)))", re.UNICODE)
+_ASCII_WHITESPACE = " \t\n\r\x0b\x0c"
+_SENT_END_TOKENS = frozenset(".?!")
+_INTERNAL_PUNCTUATION = frozenset(";:,.!?")
+_ELLIPSIS_RE = re.compile(r"\.\.+$")
+# Atajo del caso habitual: palabra de 2+ letras, punto y otra palabra -> siempre cierra oración
+_PLAIN_BREAK_RE = re.compile(r"[^\W\d]{2,}\.\s")
+_NUMERIC_RE = re.compile(r"^-?[\.,]?\d[\d,\.-]*\.?$")
+_INITIAL_RE = re.compile(r"[^\W\d]\.$", re.UNICODE)
+
+# --- NLTKWordTokenizer: reglas locales en el mismo orden ---------------------------------
+_COMMA_RE = re.compile(r"([:,])([^\d])")
+_COMMA_END_RE = re.compile(r"([:,])$")
+# Puntos suspensivos, ?/!, ;@#$%&*, paréntesis y "--": todos se rodean de espacios
+_PAD_RE = re.compile(r"\.{2,}|--|[;@#$%&?!*\]\[(){}<>]")
+_CONTRACTION_HINT_RE = re.compile(r"(?i)cannot|d'ye|gimme|gonna|gotta|lemme|more'n|wanna")
+_CONTRACTION_RE = re.compile(
+    r"(?i)\b(?=[cdglmw])(?:(can)(not)\b|(d)('ye)\b|(gim)(me)\b|(gon)(na)\b|(got)(ta)\b|(lem)(me)\b"
+    r"|(more)('n)\b|(wan)(na)(?!\S))"
+)
+
+
+def _end_contexts(text: str) -> Iterator[Tuple[re.Match, str]]:
+    """Candidatos a fin de oración con su contexto (PunktSentenceTokenizer._match_potential_end_contexts)."""
+    previous_slice = slice(0, 0)
+    previous_match = None
+    for match in _END_CONTEXT_RE.finditer(text):
+        before_text = text[previous_slice.stop:match.start()]
+        last_space = max(before_text.rfind(char) for char in _ASCII_WHITESPACE)
+        # Igual que Punkt: un espacio en la posición 0 (o ninguno) no cuenta como separador
+        start = last_space + previous_slice.stop + 1 if last_space > 0 else previous_slice.start
+        word_slice = slice(start, match.start())
+        if previous_match and previous_slice.stop <= word_slice.start:
+            yield previous_match, text[previous_slice] + previous_match.group() + previous_match.group("after_tok")
+        previous_match = match
+        previous_slice = word_slice
+    if previous_match:
+        yield previous_match, text[previous_slice] + previous_match.group() + previous_match.group("after_tok")
+
+
+def _is_sentbreak(token: str, next_token: Optional[str]) -> bool:
+    if token in _SENT_END_TOKENS:
+        return True
+    if not token.endswith(".") or token.endswith("..") or _ELLIPSIS_RE.match(token):
+        return False
+    # Números e iniciales no cierran oración si lo siguiente empieza en minúscula o es puntuación
+    if next_token is not None and (_INITIAL_RE.match(token) or _NUMERIC_RE.match(token.lower())):
+        if next_token in _INTERNAL_PUNCTUATION or next_token[0].islower():
+            return False
+    return True
+
+
+def _contains_sentbreak(context: str) -> bool:
+    if _PLAIN_BREAK_RE.match(context):
+        return True
+    tokens = [token for line in context.split("\n") for token in _PUNKT_WORD_RE.findall(line)]
+    # Como Punkt: el último token no cuenta (no hay nada detrás que empiece otra oración)
+    return any(_is_sentbreak(tokens[i], tokens[i + 1]) for i in range(len(tokens) - 1))
+
+
+def _sentence_final_periods(text: str) -> List[int]:
+    """Posiciones de los puntos que cierran oración y deben separarse de la palabra anterior."""
+    positions = []
+    for match, context in _end_contexts(text):
+        index = match.start()
+        if text[index] == "." and index > 0 and text[index - 1] != "." and _contains_sentbreak(context):
+            positions.append(index)
+    stripped_end = len(text.rstrip())
+    if stripped_end > 1 and text[stripped_end - 1] == "." and text[stripped_end - 2] != ".":
+        positions.append(stripped_end - 1)
+    return positions
+
+
+def _split_contraction(match: re.Match) -> str:
+    # Cada contracción son dos grupos consecutivos; lastindex apunta al segundo
+    return f" {match.group(match.lastindex - 1)} {match.group(match.lastindex)} "
+
+
+def regex_tokenize(text: str) -> List[str]:
+    """Tokeniza como `nltk.word_tokenize(text)` usando solo expresiones regulares compiladas."""
+    if "." in text:
+        positions = _sentence_final_periods(text)
+        if positions:
+            pieces = []
+            last = 0
+            for index in positions:
+                pieces.append(text[last:index])
+                pieces.append(" . ")
+                last = index + 1
+            pieces.append(text[last:])
+            text = "".join(pieces)
+    if "," in text or ":" in text:
+        text = _COMMA_RE.sub(r" \1 \2", text)
+        if text.rstrip("\n")[-1:] in (",", ":"):
+            text = _COMMA_END_RE.sub(r" \1 ", text)
+    text = _PAD_RE.sub(r" \g<0> ", text)
+    if _CONTRACTION_HINT_RE.search(text):
+        text = _CONTRACTION_RE.sub(_split_contraction, text)
+    return text.split()
@@ -0,0 +1,90 @@
+import re
+from functools import cached_property
+from typing import Optional, Tuple
+
+from services.chatbot.duration_utils import extract_duration_text
+from services.chatbot.pain_utils import extract_pain_scales
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+class TurnText:
+    """
+    Análisis del mensaje del usuario compartido por todo el turno.
+
+    Cada forma se calcula la primera vez que se pide y se reutiliza después, de modo que
+    validación, sistema experto, política de dolor y finalización no vuelven a normalizar
+    ni a tokenizar el mismo texto:
+      - lower:      sin espacios en los extremos y en minúsculas;
+      - folded:     además sin tildes (conserva signos y espacios);
+      - compact:    folded con los espacios colapsados;
+      - plain:      folded sin signos de puntuación y con los espacios colapsados;
+      - normalized: forma del sistema experto (solo [a-z0-9] y alias coloquiales);
+      - tokens / content_tokens: tokens de folded, con y sin stopwords.
+    """
+
+    def __init__(self, text: Optional[str]):
+        self.text = text or ""
+
+    def __repr__(self) -> str:
+        return f"TurnText({self.text!r})"
+
+    @cached_property
+    def stripped(self) -> str:
+        return self.text.strip()
+
+    @cached_property
+    def lower(self) -> str:
+        return self.stripped.lower()
+
+    @cached_property
+    def folded(self) -> str:
+        # Importaciones diferidas: services.expert_system importa este módulo desde el orquestador
+        from services.expert_system.normalization import fold_text
+
+        return fold_text(self.text)
+
+    @cached_property
+    def compact(self) -> str:
+        return _WHITESPACE_RE.sub(" ", self.folded).strip()
+
+    @cached_property
+    def plain(self) -> str:
+        return _WHITESPACE_RE.sub(" ", _PUNCTUATION_RE.sub(" ", self.folded)).strip()
+
+    @cached_property
+    def normalized(self) -> str:
+        from services.expert_system.normalization import normalize_folded
+
+        return normalize_folded(self.folded)
+
+    @cached_property
+    def tokens(self) -> Tuple[str, ...]:
+        # Importación diferida: el sistema experto usa TurnText sin necesitar el tokenizador
+        from services.chatbot.input_validate import tokenize
+
+        return tuple(tokenize(self.folded))
+
+    @cached_property
+    def content_tokens(self) -> Tuple[str, ...]:
+        from services.chatbot.input_validate import stop_words
+
+        return tuple(token for token in self.tokens if token not in stop_words)
+
+    @cached_property
+    def pain_scales(self) -> Tuple[int, ...]:
+        return tuple(extract_pain_scales(self.text))
+
+    @property
+    def pain_scale(self) -> Optional[int]:
+        return max(self.pain_scales) if self.pain_scales else None
+
+    @cached_property
+    def duration_text(self) -> Optional[str]:
+        return extract_duration_text(self.text)
+
+
+def as_turn_text(value) -> TurnText:
+    """Acepta un TurnText o un texto plano (para las llamadas que aún pasan str)."""
+    return value if isinstance(value, TurnText) else TurnText(value)
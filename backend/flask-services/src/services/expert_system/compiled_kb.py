@@ -0,0 +1,154 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from services.expert_system.emergency_guard import EmergencyMatcher
+from services.expert_system.keyword_matcher import CaseKeywordMatcher
+from services.expert_system.normalization import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CompiledExtractor:
+    """Extractor de `field_extractors` listo para usar: regex compiladas y keywords normalizadas."""
+
+    field_name: str
+    type: str = ""
+    categories: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+    patterns: Tuple[re.Pattern, ...] = ()
+    group: int = 0
+    value_type: str = "text"
+    keywords: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class CompiledCase:
+    case_id: str
+    definition: Mapping[str, Any]
+    required_fields: Tuple[str, ...]
+    tree: Tuple[Mapping[str, Any], ...]
+    nodes_by_id: Mapping[str, Mapping[str, Any]]
+    extractors: Mapping[str, CompiledExtractor]
+
+    def node(self, node_id: Optional[str]) -> Optional[Mapping[str, Any]]:
+        if not node_id:
+            return None
+        return self.nodes_by_id.get(node_id)
+
+    def extractor_for(self, field_name: str) -> CompiledExtractor:
+        return self.extractors.get(field_name) or CompiledExtractor(field_name=field_name)
+
+
+@dataclass(frozen=True)
+class CompiledKnowledgeBase:
+    """
+    Modelo inmutable de la base de conocimiento en tiempo de ejecución.
+    `cases`, `emergency` y `triage_policy` conservan las definiciones originales
+    para el código que las consume como diccionarios.
+    """
+
+    cases: Mapping[str, Dict[str, Any]]
+    compiled_cases: Mapping[str, CompiledCase]
+    emergency: Mapping[str, Any]
+    triage_policy: Mapping[str, Any]
+    case_matcher: CaseKeywordMatcher
+    emergency_matcher: EmergencyMatcher
+    version: str = ""
+    source: Mapping[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        # Vistas de solo lectura: mismo objeto en cada llamada para una versión dada
+        return {
+            "cases": self.cases,
+            "emergency": self.emergency,
+            "triage_policy": self.triage_policy,
+        }
+
+
+def _normalized_keywords(raw_keywords: Any) -> Tuple[str, ...]:
+    keywords = [normalize_text(str(k)) for k in (raw_keywords or []) if str(k).strip()]
+    return tuple(dict.fromkeys(k for k in keywords if k))
+
+
+def compile_extractor(case_id: str, field_name: str, rule: Any) -> CompiledExtractor:
+    if not isinstance(rule, dict):
+        return CompiledExtractor(field_name=field_name)
+
+    extractor_type = str(rule.get("type", "")).strip().lower()
+
+    categories = rule.get("categories", {})
+    compiled_categories = ()
+    if isinstance(categories, dict):
+        compiled_categories = tuple(
+            (str(category), _normalized_keywords(keywords)) for category, keywords in categories.items()
+        )
+
+    patterns = []
+    for raw_pattern in rule.get("patterns", []) or []:
+        try:
+            patterns.append(re.compile(str(raw_pattern), re.IGNORECASE))
+        except re.error as e:
+            logger.warning("Regex inválida en %s.%s (%r): %s", case_id, field_name, raw_pattern, e)
+
+    try:
+        group = int(rule.get("group", 0))
+    except (TypeError, ValueError):
+        group = 0
+
+    return CompiledExtractor(
+        field_name=field_name,
+        type=extractor_type,
+        categories=compiled_categories,
+        patterns=tuple(patterns),
+        group=group,
+        value_type=str(rule.get("value_type", "text")).lower(),
+        keywords=_normalized_keywords(rule.get("keywords", [])),
+    )
+
+
+def compile_case(case_def: Dict[str, Any]) -> CompiledCase:
+    case_id = str(case_def.get("case_id", ""))
+    tree = tuple(
+        MappingProxyType(dict(node)) for node in case_def.get("tree", []) or [] if isinstance(node, dict)
+    )
+    nodes_by_id = {}
+    for node in tree:
+        node_id = node.get("id")
+        if node_id and node_id not in nodes_by_id:
+            nodes_by_id[node_id] = node
+
+    raw_extractors = case_def.get("field_extractors", {})
+    if not isinstance(raw_extractors, dict):
+        raw_extractors = {}
+    extractors = {
+        str(field_name): compile_extractor(case_id, str(field_name), rule)
+        for field_name, rule in raw_extractors.items()
+    }
+
+    return CompiledCase(
+        case_id=case_id,
+        definition=MappingProxyType(case_def),
+        required_fields=tuple(str(f) for f in case_def.get("required_fields", []) or []),
+        tree=tree,
+        nodes_by_id=MappingProxyType(nodes_by_id),
+        extractors=MappingProxyType(extractors),
+    )
+
+
+def compile_knowledge_base(raw_kb: Dict[str, Any], version: str = "", source: Optional[Dict[str, Any]] = None) -> CompiledKnowledgeBase:
+    cases = dict(raw_kb.get("cases", {}) or {})
+    emergency = dict(raw_kb.get("emergency", {}) or {})
+    triage_policy = dict(raw_kb.get("triage_policy", {}) or {})
+    return CompiledKnowledgeBase(
+        cases=MappingProxyType(cases),
+        compiled_cases=MappingProxyType({case_id: compile_case(case_def) for case_id, case_def in cases.items()}),
+        emergency=MappingProxyType(emergency),
+        triage_policy=MappingProxyType(triage_policy),
+        case_matcher=CaseKeywordMatcher(cases),
+        emergency_matcher=EmergencyMatcher(emergency),
+        version=version,
+        source=MappingProxyType(dict(source or {})),
+    )
@@ -1,44 +1,105 @@
+from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
+from services.expert_system.keyword_matcher import KeywordAutomaton
+from services.expert_system.normalization import normalize_text
+
+GLOBAL_SCOPE = "__global__"
+PSYCHOLOGICAL_SCOPE = "__psychological__"
+
+
+@dataclass(frozen=True)
+class EmergencyRule:
+    order: int
+    rule_id: str
+    scope: str
+    psychological: bool
+
+
+class EmergencyMatcher:
+    """
+    Reglas de emergencia compiladas en un único autómata de keywords.
+
+    Cada keyword normalizada lleva asociadas sus reglas (rule_id, ámbito global/caso/psicológico
+    y marca psicológica). Un mensaje se revisa con una sola pasada, independientemente del número
+    de reglas, y el orden de los rule_id coincide con el de las tres listas originales.
+    """
+
+    def __init__(self, emergency_rules: Dict[str, Any]):
+        emergency_rules = emergency_rules or {}
+        self.psychological_case_ids = {
+            str(case).strip()
+            for case in emergency_rules.get("psychological_case_ids", [])
+            if str(case).strip()
+        }
+
+        entries: List[Tuple[str, EmergencyRule]] = []
+
+        def _add(item: Dict[str, Any], scope: str, default_rule_id: str, psychological: bool) -> None:
+            keyword = normalize_text(str(item.get("keyword", "")))
+            if not keyword:
+                return
+            rule = EmergencyRule(
+                order=len(entries),
+                rule_id=str(item.get("rule_id", default_rule_id)),
+                scope=scope,
+                psychological=psychological,
+            )
+            entries.append((keyword, rule))
+
+        for item in emergency_rules.get("global_red_flags", []):
+            _add(item, GLOBAL_SCOPE, "global_emergency_rule", False)
+        for case_id, items in (emergency_rules.get("case_red_flags", {}) or {}).items():
+            for item in items or []:
+                _add(item, str(case_id), f"{case_id}_emergency_rule", bool(item.get("psychological", False)))
+        for item in emergency_rules.get("psychological_crisis_flags", []):
+            _add(item, PSYCHOLOGICAL_SCOPE, "psych_crisis_rule", True)
+
+        self.automaton = KeywordAutomaton(keyword for keyword, _ in entries)
+        self._rules_by_keyword: List[List[EmergencyRule]] = [[] for _ in self.automaton.keywords]
+        for keyword, rule in entries:
+            self._rules_by_keyword[self.automaton.ids[keyword]].append(rule)
+        self.rule_count = len(entries)
+
+    def match(self, normalized_message: str, case_id: Optional[str] = None) -> Tuple[bool, List[str], bool]:
+        is_psychological = bool(case_id and case_id in self.psychological_case_ids)
+        matched: List[EmergencyRule] = []
+        for keyword_id in self.automaton.find(normalized_message):
+            for rule in self._rules_by_keyword[keyword_id]:
+                if rule.scope in (GLOBAL_SCOPE, PSYCHOLOGICAL_SCOPE) or (case_id and rule.scope == case_id):
+                    matched.append(rule)
+
+        # `order` sigue el orden original: globales, las del caso y después las psicológicas
+        matched.sort(key=lambda rule: rule.order)
+        if any(rule.psychological for rule in matched):
+            is_psychological = True
+        rule_ids = list(dict.fromkeys(rule.rule_id for rule in matched))
+        return len(rule_ids) > 0, rule_ids, is_psychological
+
+
+_last_compiled: Tuple[Optional[Dict[str, Any]], Optional[EmergencyMatcher]] = (None, None)
+
+
+def get_emergency_matcher(emergency_rules: Dict[str, Any]) -> EmergencyMatcher:
+    """Matcher para un diccionario de reglas; se reutiliza mientras se pase el mismo objeto."""
+    global _last_compiled
+    compiled_rules, matcher = _last_compiled
+    if compiled_rules is emergency_rules and matcher is not None:
+        return matcher
+    matcher = EmergencyMatcher(emergency_rules)
+    _last_compiled = (emergency_rules, matcher)
+    return matcher
+
 
 def detect_emergency(
     user_message_lower: str,
     emergency_rules: Dict[str, Any],
     case_id: Optional[str] = None,
+    matcher: Optional[EmergencyMatcher] = None,
 ) -> Tuple[bool, List[str], bool]:
-    matched_rules: List[str] = []
-    is_psychological = False
-    psychological_case_ids = {
-        str(case).strip()
-        for case in emergency_rules.get("psychological_case_ids", [])
-        if str(case).strip()
-    }
-
-    global_rules = emergency_rules.get("global_red_flags", [])
-    for item in global_rules:
-        keyword = str(item.get("keyword", "")).lower()
-        if keyword and keyword in user_message_lower:
-            matched_rules.append(str(item.get("rule_id", "global_emergency_rule")))
-
-    if case_id:
-        if case_id in psychological_case_ids:
-            is_psychological = True
-        case_rules = emergency_rules.get("case_red_flags", {}).get(case_id, [])
-        for item in case_rules:
-            keyword = str(item.get("keyword", "")).lower()
-            if keyword and keyword in user_message_lower:
-                matched_rules.append(str(item.get("rule_id", f"{case_id}_emergency_rule")))
-                if bool(item.get("psychological", False)):
-                    is_psychological = True
-
-    psych_rules = emergency_rules.get("psychological_crisis_flags", [])
-    for item in psych_rules:
-        keyword = str(item.get("keyword", "")).lower()
-        if keyword and keyword in user_message_lower:
-            matched_rules.append(str(item.get("rule_id", "psych_crisis_rule")))
-            is_psychological = True
-
-    return len(matched_rules) > 0, list(dict.fromkeys(matched_rules)), is_psychological
+    # Misma normalización que la detección de casos: sin tildes ni signos ("perdida de consciencia")
+    matcher = matcher or get_emergency_matcher(emergency_rules)
+    return matcher.match(normalize_text(user_message_lower), case_id=case_id)
 
 
 def build_emergency_message(emergency_rules: Dict[str, Any], psychological: bool = False) -> str:
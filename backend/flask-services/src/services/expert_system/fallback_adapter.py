@@ -1,6 +1,7 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from services.chatbot.chatbot import Chatbot
+from services.chatbot.turn_text import TurnText
 
 
 class FallbackModelAdapter:
@@ -16,6 +17,7 @@ class FallbackModelAdapter:
         conversation_id: str | None,
         existing_context: Dict[str, Any],
         postgres_context: Dict[str, Any],
+        turn_text: Optional[TurnText] = None,
     ) -> Dict[str, Any]:
         chatbot = Chatbot(
             user_message,
@@ -25,5 +27,6 @@ class FallbackModelAdapter:
             conversation_id=conversation_id,
             existing_context=existing_context,
             postgres_context=postgres_context,
+            turn_text=turn_text,
         )
         return chatbot.initialize_conversation()
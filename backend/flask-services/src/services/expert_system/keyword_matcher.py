@@ -0,0 +1,155 @@
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from services.expert_system.normalization import normalize_text
+
+PARTIAL_OVERLAP_THRESHOLD = 0.6
+
+
+class KeywordAutomaton:
+    """
+    Búsqueda de muchas keywords (ya normalizadas) como subcadena con una sola pasada de regex.
+
+    La regex es una alternancia en lookahead ordenada de mayor a menor longitud, así que en
+    cada posición se obtiene la keyword más larga; las keywords que son prefijo suyo también
+    aparecen en esa posición y se añaden desde un mapa precalculado. El resultado es el mismo
+    que comprobar `keyword in texto` para cada keyword.
+    """
+
+    def __init__(self, keywords):
+        self.keywords: List[str] = list(dict.fromkeys(k for k in keywords if k))
+        self.ids: Dict[str, int] = {keyword: index for index, keyword in enumerate(self.keywords)}
+        self._prefix_ids: Dict[str, Tuple[int, ...]] = {
+            keyword: tuple(other_id for other_id, other in enumerate(self.keywords) if keyword.startswith(other))
+            for keyword in self.keywords
+        }
+        self._pattern: Optional[re.Pattern] = None
+        if self.keywords:
+            alternation = "|".join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+            self._pattern = re.compile(f"(?=({alternation}))")
+
+    def find(self, text: str) -> Set[int]:
+        """Ids de las keywords contenidas en el texto."""
+        found: Set[int] = set()
+        if self._pattern is None or not text:
+            return found
+        seen_matches: Set[str] = set()
+        for match in self._pattern.finditer(text):
+            keyword = match.group(1)
+            if keyword not in seen_matches:
+                seen_matches.add(keyword)
+                found.update(self._prefix_ids[keyword])
+        return found
+
+
+class CaseKeywordMatcher:
+    """
+    Matcher compilado de `intent_keywords` para todos los casos.
+
+    Se construye una vez al cargar la base de conocimiento:
+      - keywords normalizadas (una sola vez, no por mensaje);
+      - un KeywordAutomaton (una única regex) sobre todas las keywords de todos los casos;
+      - un índice token -> keywords para el solapamiento parcial.
+
+    Con ello un mensaje se puntúa contra todos los casos con una pasada de regex y
+    búsquedas en diccionario, con el mismo resultado que la comparación keyword a keyword.
+    """
+
+    def __init__(self, cases: Dict[str, Dict[str, Any]]):
+        self.case_ids: List[str] = list(cases)
+
+        normalized_by_case: Dict[str, List[str]] = {}
+        for case_id, case_def in cases.items():
+            raw_keywords = [str(k) for k in (case_def or {}).get("intent_keywords", []) if str(k).strip()]
+            normalized_by_case[case_id] = [normalize_text(k) for k in raw_keywords]
+
+        self.automaton = KeywordAutomaton(k for keywords in normalized_by_case.values() for k in keywords)
+        self.keywords = self.automaton.keywords
+
+        # Por caso: ids de sus keywords en orden (con repetidas) y el divisor original
+        self._case_keyword_ids: Dict[str, List[int]] = {
+            case_id: [self.automaton.ids[k] for k in keywords if k]
+            for case_id, keywords in normalized_by_case.items()
+        }
+        self._case_keyword_count: Dict[str, int] = {
+            case_id: len(keywords) for case_id, keywords in normalized_by_case.items()
+        }
+
+        self._keyword_cases: List[Set[str]] = [set() for _ in self.keywords]
+        for case_id, ids in self._case_keyword_ids.items():
+            for keyword_id in ids:
+                self._keyword_cases[keyword_id].add(case_id)
+
+        self._keyword_token_count: List[int] = []
+        self._token_index: Dict[str, List[int]] = {}
+        for keyword_id, keyword in enumerate(self.keywords):
+            tokens = set(keyword.split())
+            self._keyword_token_count.append(len(tokens))
+            for token in tokens:
+                self._token_index.setdefault(token, []).append(keyword_id)
+
+    def find_keywords(self, normalized_message: str) -> Set[int]:
+        """Ids de las keywords contenidas como subcadena en el mensaje normalizado."""
+        return self.automaton.find(normalized_message)
+
+    def token_overlaps(self, message_tokens: Set[str]) -> Dict[int, float]:
+        """Fracción de tokens de cada keyword presentes en el mensaje (solo keywords con algún token)."""
+        counts: Dict[int, int] = {}
+        for token in message_tokens:
+            for keyword_id in self._token_index.get(token, ()):
+                counts[keyword_id] = counts.get(keyword_id, 0) + 1
+        return {
+            keyword_id: count / self._keyword_token_count[keyword_id]
+            for keyword_id, count in counts.items()
+        }
+
+    def _score_case(self, case_id: str, found: Set[int], overlaps: Dict[int, float]) -> float:
+        keyword_ids = self._case_keyword_ids.get(case_id, [])
+        if not keyword_ids:
+            return 0.0
+        total_score = 0.0
+        for keyword_id in keyword_ids:
+            if keyword_id in found:
+                total_score += 1.0
+                continue
+            overlap = overlaps.get(keyword_id, 0.0)
+            if overlap >= PARTIAL_OVERLAP_THRESHOLD:
+                total_score += overlap
+        return round(total_score / self._case_keyword_count[case_id], 3)
+
+    def score_cases(self, normalized_message: str) -> Dict[str, float]:
+        """Puntuación de intención de cada caso (en el orden de carga) para un mensaje ya normalizado."""
+        scores = {case_id: 0.0 for case_id in self.case_ids}
+        message_tokens = set(normalized_message.split())
+        if not message_tokens:
+            return scores
+
+        found = self.find_keywords(normalized_message)
+        overlaps = self.token_overlaps(message_tokens)
+        candidate_cases: Set[str] = set()
+        for keyword_id in found:
+            candidate_cases |= self._keyword_cases[keyword_id]
+        for keyword_id, overlap in overlaps.items():
+            if overlap >= PARTIAL_OVERLAP_THRESHOLD:
+                candidate_cases |= self._keyword_cases[keyword_id]
+
+        for case_id in candidate_cases:
+            scores[case_id] = self._score_case(case_id, found, overlaps)
+        return scores
+
+    def score_case(self, normalized_message: str, case_id: str) -> float:
+        return self.score_cases(normalized_message).get(case_id, 0.0)
+
+
+_last_compiled: Tuple[Optional[Dict[str, Any]], Optional[CaseKeywordMatcher]] = (None, None)
+
+
+def get_case_matcher(cases: Dict[str, Dict[str, Any]]) -> CaseKeywordMatcher:
+    """Matcher para un diccionario de casos; se reutiliza mientras se pase el mismo objeto."""
+    global _last_compiled
+    compiled_cases, matcher = _last_compiled
+    if compiled_cases is cases and matcher is not None:
+        return matcher
+    matcher = CaseKeywordMatcher(cases)
+    _last_compiled = (cases, matcher)
+    return matcher
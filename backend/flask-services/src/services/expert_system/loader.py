@@ -1,13 +1,26 @@
+import hashlib
+import logging
 import os
 import json
-from functools import lru_cache
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.expert_system.compiled_kb import CompiledKnowledgeBase, compile_knowledge_base
+from services.expert_system.emergency_guard import EmergencyMatcher
+from services.expert_system.keyword_matcher import CaseKeywordMatcher
 
 try:
     import yaml  # type: ignore
 except Exception:  # pragma: no cover
     yaml = None
 
+logger = logging.getLogger(__name__)
+
+_RULE_EXTENSIONS = (".json", ".yaml", ".yml")
+_HOT_RELOAD_ENABLED = os.getenv("EXPERT_KB_HOT_RELOAD", "true").strip().lower() in {"1", "true", "yes", "on"}
+_RELOAD_INTERVAL_SECONDS = max(0.0, float(os.getenv("EXPERT_KB_RELOAD_INTERVAL_SECONDS", "5")))
+
 
 def _rules_root() -> str:
     return os.path.join(os.path.dirname(__file__), "rules")
@@ -27,15 +40,49 @@ def _load_json(path: str) -> Dict[str, Any]:
     return payload if isinstance(payload, dict) else {}
 
 
-@lru_cache(maxsize=1)
-def load_knowledge_base() -> Dict[str, Any]:
-    rules_root = _rules_root()
+def _rule_files(rules_root: str) -> List[str]:
+    paths = []
+    for subdir in ("cases", "shared"):
+        directory = os.path.join(rules_root, subdir)
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(_RULE_EXTENSIONS):
+                paths.append(os.path.join(directory, filename))
+    return paths
+
+
+def rules_signature(rules_root: Optional[str] = None) -> Tuple[Tuple[str, int, int], ...]:
+    """Huella barata (ruta, mtime, tamaño) de los ficheros de reglas para detectar cambios."""
+    rules_root = rules_root or _rules_root()
+    signature = []
+    for path in _rule_files(rules_root):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        signature.append((os.path.relpath(path, rules_root), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _rules_version(rules_root: str) -> str:
+    digest = hashlib.sha256()
+    for path in _rule_files(rules_root):
+        digest.update(os.path.relpath(path, rules_root).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def read_rules(rules_root: Optional[str] = None) -> Dict[str, Any]:
+    """Lee las definiciones crudas (JSON/YAML) de un directorio de reglas."""
+    rules_root = rules_root or _rules_root()
     cases_root = os.path.join(rules_root, "cases")
     shared_root = os.path.join(rules_root, "shared")
 
     cases: Dict[str, Any] = {}
     for filename in os.listdir(cases_root):
-        if not filename.endswith((".json", ".yaml", ".yml")):
+        if not filename.endswith(_RULE_EXTENSIONS):
             continue
         full_path = os.path.join(cases_root, filename)
         if filename.endswith(".json"):
@@ -57,3 +104,95 @@ def load_knowledge_base() -> Dict[str, Any]:
         "emergency": emergency,
         "triage_policy": triage_policy,
     }
+
+
+def compile_rules(rules_root: Optional[str] = None) -> CompiledKnowledgeBase:
+    rules_root = rules_root or _rules_root()
+    return compile_knowledge_base(
+        read_rules(rules_root),
+        version=_rules_version(rules_root),
+        source={"rules_root": rules_root},
+    )
+
+
+class KnowledgeBaseStore:
+    """
+    Mantiene la base de conocimiento compilada y la recarga en caliente cuando cambian
+    los ficheros de reglas. La sustitución es atómica: cada turno trabaja con la instancia
+    que obtuvo de current(), y si la nueva versión no compila se conserva la anterior.
+    """
+
+    def __init__(
+        self,
+        rules_root: Optional[str] = None,
+        hot_reload: bool = _HOT_RELOAD_ENABLED,
+        reload_interval_seconds: float = _RELOAD_INTERVAL_SECONDS,
+    ):
+        self.rules_root = rules_root or _rules_root()
+        self.hot_reload = hot_reload
+        self.reload_interval_seconds = reload_interval_seconds
+        self._lock = threading.Lock()
+        self._kb: Optional[CompiledKnowledgeBase] = None
+        self._signature: Tuple[Tuple[str, int, int], ...] = ()
+        self._last_check = 0.0
+        self.reload_count = 0
+        self.last_error = ""
+
+    def current(self) -> CompiledKnowledgeBase:
+        kb = self._kb
+        if kb is None:
+            self.reload(force=True)
+            return self._kb
+        if self.hot_reload and time.monotonic() - self._last_check >= self.reload_interval_seconds:
+            self.reload()
+            return self._kb
+        return kb
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompila si las reglas cambiaron (o siempre con force). Devuelve True si hubo cambio."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            signature = rules_signature(self.rules_root)
+            if not force and self._kb is not None and signature == self._signature:
+                return False
+            try:
+                kb = compile_rules(self.rules_root)
+            except Exception as e:
+                self.last_error = str(e)
+                if self._kb is None:
+                    raise
+                logger.error("No se pudo recargar la base de conocimiento; se mantiene la versión %s: %s", self._kb.version, e)
+                # No se reintenta hasta que los ficheros vuelvan a cambiar
+                self._signature = signature
+                return False
+            previous = self._kb.version if self._kb is not None else None
+            self._kb = kb
+            self._signature = signature
+            self.reload_count += 1
+            self.last_error = ""
+        if previous is not None and previous != kb.version:
+            logger.info("Base de conocimiento recargada: %s -> %s", previous, kb.version)
+        return True
+
+
+_default_store = KnowledgeBaseStore()
+
+
+def get_knowledge_base_store() -> KnowledgeBaseStore:
+    return _default_store
+
+
+def get_compiled_knowledge_base() -> CompiledKnowledgeBase:
+    return _default_store.current()
+
+
+def load_knowledge_base() -> Dict[str, Any]:
+    return get_compiled_knowledge_base().as_dict()
+
+
+def load_case_matcher() -> CaseKeywordMatcher:
+    return get_compiled_knowledge_base().case_matcher
+
+
+def load_emergency_matcher() -> EmergencyMatcher:
+    return get_compiled_knowledge_base().emergency_matcher
@@ -0,0 +1,32 @@
+import re
+import unicodedata
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Canonicalize common colloquial forms to improve case detection.
+TEXT_ALIASES = {
+    "me duele la cabeza": "dolor de cabeza",
+    "me duele cabeza": "dolor de cabeza",
+    "dolor cabeza": "dolor de cabeza",
+}
+
+
+def fold_text(text: str) -> str:
+    """Minúsculas y sin tildes (conserva signos y espacios internos)."""
+    lowered = (text or "").strip().lower()
+    return "".join(ch for ch in unicodedata.normalize("NFKD", lowered) if unicodedata.category(ch) != "Mn")
+
+
+def normalize_folded(folded: str) -> str:
+    """Completa normalize_text sobre un texto ya pasado por fold_text."""
+    cleaned = _NON_ALNUM_RE.sub(" ", folded)
+    collapsed = _WHITESPACE_RE.sub(" ", cleaned).strip()
+    for src, target in TEXT_ALIASES.items():
+        collapsed = collapsed.replace(src, target)
+    return collapsed
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sin tildes ni signos, espacios colapsados y alias coloquiales canónicos."""
+    return normalize_folded(fold_text(text))
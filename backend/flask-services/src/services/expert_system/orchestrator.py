@@ -1,56 +1,220 @@
-from typing import Any, Dict, Optional
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from services.expert_system.emergency_guard import build_emergency_message, detect_emergency
-from services.expert_system.loader import load_knowledge_base
+from services.chatbot.turn_text import TurnText
+from services.expert_system.emergency_guard import build_emergency_message
+from services.expert_system.compiled_kb import CompiledKnowledgeBase, compile_knowledge_base
+from services.expert_system.loader import KnowledgeBaseStore, get_knowledge_base_store
 from services.expert_system.models import ExpertDecision, ExpertState
 from services.expert_system.rule_engine import (
     classify_triage_level,
-    detect_best_case,
     extract_case_fields,
-    infer_pain_level,
+    select_best_case,
 )
 from services.expert_system.scoring_engine import detect_case_conflict, evaluate_confidence
 from services.expert_system.tree_engine import build_advice, compute_required_fields_status, select_next_node
 
 
+class _MessageScan:
+    """
+    Trabajo del turno que solo depende del texto (y de la versión de la base de conocimiento):
+    normalización, puntuación de casos, escaneo de emergencias por caso y dolor explícito.
+    En evaluate_many se comparte entre los mensajes repetidos del lote.
+    """
+
+    __slots__ = ("normalized", "case_scores", "explicit_pain", "_emergency")
+
+    def __init__(self, kb: CompiledKnowledgeBase, user_message: str, turn_text: Optional[TurnText] = None):
+        turn = turn_text if turn_text is not None else TurnText(user_message)
+        self.normalized = turn.normalized
+        self.case_scores = kb.case_matcher.score_cases(self.normalized)
+        self.explicit_pain = turn.pain_scale
+        self._emergency: Dict[Optional[str], Tuple[bool, List[str], bool]] = {}
+
+    def emergency(self, kb: CompiledKnowledgeBase, case_id: Optional[str]) -> Tuple[bool, List[str], bool]:
+        if case_id not in self._emergency:
+            self._emergency[case_id] = kb.emergency_matcher.match(self.normalized, case_id=case_id)
+        triggered, rule_ids, is_psych = self._emergency[case_id]
+        return triggered, list(rule_ids), is_psych
+
+    def pain_level(self, previous_value: Any) -> int:
+        if self.explicit_pain is not None:
+            return self.explicit_pain
+        return previous_value if isinstance(previous_value, int) else 0
+
+
+# Estado de cada proceso del pool de evaluate_many: la base se compila una vez por worker
+_worker_orchestrator: Optional["ExpertOrchestrator"] = None
+
+
+def _kb_payload(kb: CompiledKnowledgeBase) -> Dict[str, Any]:
+    # Las vistas MappingProxyType no se pueden serializar; el worker recompila desde las definiciones
+    return {
+        "raw_kb": {
+            "cases": {case_id: dict(case_def) for case_id, case_def in kb.cases.items()},
+            "emergency": dict(kb.emergency),
+            "triage_policy": dict(kb.triage_policy),
+        },
+        "version": kb.version,
+        "source": dict(kb.source),
+    }
+
+
+def _init_worker(payload: Dict[str, Any]) -> None:
+    global _worker_orchestrator
+    _worker_orchestrator = ExpertOrchestrator(knowledge_base=compile_knowledge_base(**payload))
+
+
+def _evaluate_chunk(messages: List[str], states: List[Optional[Dict[str, Any]]]) -> List[ExpertDecision]:
+    return _worker_orchestrator.evaluate_many(messages, states)
+
+
+class ExpertWorkerPool:
+    """
+    Pool de procesos para evaluate_many con una versión fija de la base de conocimiento: se envía
+    y se compila una sola vez por worker al crear el pool, y el pool sirve a todos los lotes que se
+    le pasen (p. ej. las oleadas de scripts.replay_expert_corpus). Se cierra con close() o `with`.
+    """
+
+    def __init__(self, kb: CompiledKnowledgeBase, processes: int):
+        self.kb = kb
+        self.processes = max(1, int(processes))
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes, initializer=_init_worker, initargs=(_kb_payload(kb),)
+        )
+
+    def evaluate(
+        self,
+        messages: List[str],
+        states: List[Optional[Dict[str, Any]]],
+        chunk_size: Optional[int] = None,
+    ) -> List[ExpertDecision]:
+        chunk_size = chunk_size or max(1, math.ceil(len(messages) / (self.processes * 4)))
+        bounds = [(start, min(start + chunk_size, len(messages))) for start in range(0, len(messages), chunk_size)]
+        futures = [self._executor.submit(_evaluate_chunk, messages[start:end], states[start:end]) for start, end in bounds]
+        decisions: List[ExpertDecision] = []
+        for future in futures:
+            decisions.extend(future.result())
+        return decisions
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "ExpertWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
 class ExpertOrchestrator:
-    def __init__(self):
-        kb = load_knowledge_base()
-        self.cases = kb.get("cases", {})
-        self.emergency_rules = kb.get("emergency", {})
-        self.triage_policy = kb.get("triage_policy", {})
+    def __init__(
+        self,
+        knowledge_base: Optional[CompiledKnowledgeBase] = None,
+        store: Optional[KnowledgeBaseStore] = None,
+    ):
+        # Con una base fija no hay recarga en caliente (útil para comparar versiones de reglas)
+        self._pinned_kb = knowledge_base
+        self._store = store or get_knowledge_base_store()
+
+    @property
+    def knowledge_base(self) -> CompiledKnowledgeBase:
+        return self._pinned_kb or self._store.current()
+
+    @property
+    def cases(self):
+        return self.knowledge_base.cases
+
+    @property
+    def emergency_rules(self):
+        return self.knowledge_base.emergency
+
+    @property
+    def triage_policy(self):
+        return self.knowledge_base.triage_policy
 
     def evaluate(
         self,
         *,
         user_message: str,
         prior_expert_state: Optional[Dict[str, Any]] = None,
+        turn_text: Optional[TurnText] = None,
+    ) -> ExpertDecision:
+        # Una sola versión de la base de conocimiento durante todo el turno
+        kb = self.knowledge_base
+        return self._evaluate(kb, user_message, prior_expert_state, _MessageScan(kb, user_message, turn_text))
+
+    def evaluate_many(
+        self,
+        messages: Sequence[str],
+        states: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+        *,
+        processes: int = 1,
+        chunk_size: Optional[int] = None,
+        pool: Optional[ExpertWorkerPool] = None,
+    ) -> List[ExpertDecision]:
+        """
+        Evalúa un lote de mensajes independientes (cada uno con su estado previo) y devuelve
+        las decisiones en el mismo orden. Todo el lote usa la misma versión de la base de
+        conocimiento y el trabajo que solo depende del texto se hace una vez por mensaje distinto.
+        Con `pool` (ver worker_pool) el lote se reparte en bloques entre sus procesos; con
+        processes > 1 y sin pool se crea uno solo para este lote.
+        """
+        messages = list(messages)
+        states = list(states) if states is not None else [None] * len(messages)
+        if len(states) != len(messages):
+            raise ValueError("messages y states deben tener la misma longitud")
+
+        kb = self.knowledge_base
+        if pool is not None:
+            if pool.kb.version != kb.version:
+                raise ValueError("El pool se creó con otra versión de la base de conocimiento")
+            return pool.evaluate(messages, states, chunk_size)
+        if processes > 1 and len(messages) > 1:
+            with ExpertWorkerPool(kb, processes) as temporary_pool:
+                return temporary_pool.evaluate(messages, states, chunk_size)
+
+        scans: Dict[str, _MessageScan] = {}
+        decisions = []
+        for user_message, prior_state in zip(messages, states):
+            scan = scans.get(user_message)
+            if scan is None:
+                scan = scans[user_message] = _MessageScan(kb, user_message)
+            decisions.append(self._evaluate(kb, user_message, prior_state, scan))
+        return decisions
+
+    def worker_pool(self, processes: int) -> ExpertWorkerPool:
+        """Pool reutilizable entre llamadas a evaluate_many, con la versión actual de la base."""
+        return ExpertWorkerPool(self.knowledge_base, processes)
+
+    def _evaluate(
+        self,
+        kb: CompiledKnowledgeBase,
+        user_message: str,
+        prior_expert_state: Optional[Dict[str, Any]],
+        scan: _MessageScan,
     ) -> ExpertDecision:
+        cases = kb.cases
+        emergency_config = kb.emergency
+        triage_policy = kb.triage_policy
+
         prior_state = prior_expert_state or {}
         previous_case_id = prior_state.get("active_case_id")
         previous_fields = prior_state.get("collected_fields", {})
         previous_pain = prior_state.get("pain_scale", 0)
         previous_node_id = prior_state.get("active_node_id")
 
-        case_id, intent_score, second_score = detect_best_case(
-            user_message=user_message,
-            cases=self.cases,
-            active_case_id=previous_case_id,
-        )
+        case_id, intent_score, second_score = select_best_case(scan.case_scores, cases, previous_case_id)
         case_conflict = detect_case_conflict(
             best_score=float(intent_score),
             second_score=float(second_score),
-            conflict_delta=float(self.triage_policy.get("case_conflict_delta", 0.1)),
+            conflict_delta=float(triage_policy.get("case_conflict_delta", 0.1)),
         )
 
-        user_message_lower = (user_message or "").lower()
-        emergency_triggered, emergency_rules, is_psych = detect_emergency(
-            user_message_lower=user_message_lower,
-            emergency_rules=self.emergency_rules,
-            case_id=case_id,
-        )
+        emergency_triggered, emergency_rules, is_psych = scan.emergency(kb, case_id)
         if emergency_triggered:
-            message = build_emergency_message(self.emergency_rules, psychological=is_psych)
+            message = build_emergency_message(emergency_config, psychological=is_psych)
             state = ExpertState(
                 active_case_id=case_id,
                 active_node_id=None,
@@ -70,12 +234,12 @@ class ExpertOrchestrator:
                 rule_ids_applied=emergency_rules,
                 emergency_triggered=True,
                 triage_level="Severo",
-                pain_scale=infer_pain_level(user_message, previous_value=previous_pain),
+                pain_scale=scan.pain_level(previous_pain),
                 symptoms=[],
                 state=state,
             )
 
-        if not case_id or case_id not in self.cases or case_conflict:
+        if not case_id or case_id not in cases or case_conflict:
             fallback_reason = "case_conflict" if case_conflict else "no_case_match"
             state = ExpertState(
                 active_case_id=case_id,
@@ -86,7 +250,7 @@ class ExpertOrchestrator:
                 fallback_reason=fallback_reason,
                 emergency_triggered=False,
                 collected_fields=previous_fields,
-                triage_level=self.triage_policy.get("default_triage", "Leve"),
+                triage_level=triage_policy.get("default_triage", "Leve"),
             )
             return ExpertDecision(
                 action="fallback_ai",
@@ -97,35 +261,34 @@ class ExpertOrchestrator:
                 fallback_reason=fallback_reason,
                 emergency_triggered=False,
                 triage_level=state.triage_level,
-                pain_scale=infer_pain_level(user_message, previous_value=previous_pain),
+                pain_scale=scan.pain_level(previous_pain),
                 symptoms=[],
                 state=state,
             )
 
-        case_def = self.cases[case_id]
-        expected_field = None
-        if previous_node_id:
-            for node in case_def.get("tree", []):
-                if node.get("id") == previous_node_id:
-                    expected_field = node.get("field")
-                    break
+        case_def = cases[case_id]
+        compiled_case = kb.compiled_cases[case_id]
+        previous_node = compiled_case.node(previous_node_id)
+        expected_field = previous_node.get("field") if previous_node else None
         collected_fields = extract_case_fields(
             case_def=case_def,
             user_message=user_message,
             previous_fields=previous_fields,
             expected_field=expected_field,
+            compiled_case=compiled_case,
+            normalized_message=scan.normalized,
         )
-        pain_scale = infer_pain_level(user_message, previous_value=previous_pain)
-        triage_level = classify_triage_level(case_id, pain_scale, user_message, self.triage_policy)
+        pain_scale = scan.pain_level(previous_pain)
+        triage_level = classify_triage_level(case_id, pain_scale, user_message, triage_policy, normalized_message=scan.normalized)
         required_fields_status = compute_required_fields_status(case_def, collected_fields)
 
         confidence, confidence_ok = evaluate_confidence(
             intent_score=float(intent_score),
             required_fields_status=required_fields_status,
-            threshold=float(self.triage_policy.get("confidence_threshold", 0.65)),
+            threshold=float(triage_policy.get("confidence_threshold", 0.65)),
         )
 
-        min_intent_for_tree = float(self.triage_policy.get("min_intent_for_tree", 0.25))
+        min_intent_for_tree = float(triage_policy.get("min_intent_for_tree", 0.25))
         continuing_same_case = bool(previous_case_id and previous_case_id == case_id)
         should_fallback = (not confidence_ok) and (float(intent_score) < min_intent_for_tree) and (not continuing_same_case)
         if should_fallback:
@@ -1,31 +1,14 @@
-import re
-import unicodedata
 from typing import Any, Dict, List, Optional, Tuple
 
 from services.chatbot.duration_utils import extract_duration_text
 from services.chatbot.pain_utils import extract_pain_scale
-
-
-def _normalize_text(text: str) -> str:
-    lowered = (text or "").strip().lower()
-    no_accents = "".join(
-        ch for ch in unicodedata.normalize("NFKD", lowered) if unicodedata.category(ch) != "Mn"
-    )
-    cleaned = re.sub(r"[^a-z0-9\s]", " ", no_accents)
-    collapsed = re.sub(r"\s+", " ", cleaned).strip()
-
-    # Canonicalize common colloquial forms to improve case detection.
-    aliases = {
-        "me duele la cabeza": "dolor de cabeza",
-        "me duele cabeza": "dolor de cabeza",
-        "dolor cabeza": "dolor de cabeza",
-    }
-    for src, target in aliases.items():
-        collapsed = collapsed.replace(src, target)
-    return collapsed
+from services.expert_system.compiled_kb import CompiledCase, CompiledExtractor, compile_case
+from services.expert_system.keyword_matcher import CaseKeywordMatcher, get_case_matcher
+from services.expert_system.normalization import normalize_text as _normalize_text
 
 
 def _intent_score_for_case(user_message_lower: str, case_def: Dict[str, Any]) -> float:
+    # Versión de referencia (keyword a keyword); detect_best_case usa CaseKeywordMatcher.
     keywords = [_normalize_text(str(k)) for k in case_def.get("intent_keywords", []) if str(k).strip()]
     if not keywords:
         return 0.0
@@ -52,15 +35,29 @@ def _intent_score_for_case(user_message_lower: str, case_def: Dict[str, Any]) ->
     return round(total_score / len(keywords), 3)
 
 
-def detect_best_case(user_message: str, cases: Dict[str, Dict[str, Any]], active_case_id: Optional[str] = None) -> Tuple[Optional[str], float, float]:
+def detect_best_case(
+    user_message: str,
+    cases: Dict[str, Dict[str, Any]],
+    active_case_id: Optional[str] = None,
+    matcher: Optional[CaseKeywordMatcher] = None,
+) -> Tuple[Optional[str], float, float]:
+    matcher = matcher or get_case_matcher(cases)
     user_message_lower = _normalize_text(user_message)
     if active_case_id and active_case_id in cases:
-        return active_case_id, _intent_score_for_case(user_message_lower, cases[active_case_id]), 0.0
+        return active_case_id, matcher.score_case(user_message_lower, active_case_id), 0.0
+    return select_best_case(matcher.score_cases(user_message_lower), cases, active_case_id)
 
-    scored = []
-    for case_id, case_def in cases.items():
-        scored.append((case_id, _intent_score_for_case(user_message_lower, case_def)))
 
+def select_best_case(
+    case_scores: Dict[str, float],
+    cases: Dict[str, Dict[str, Any]],
+    active_case_id: Optional[str] = None,
+) -> Tuple[Optional[str], float, float]:
+    """Elige el caso a partir de puntuaciones ya calculadas (CaseKeywordMatcher.score_cases)."""
+    if active_case_id and active_case_id in cases:
+        return active_case_id, case_scores.get(active_case_id, 0.0), 0.0
+
+    scored = list(case_scores.items())
     scored.sort(key=lambda item: item[1], reverse=True)
     if not scored:
         return None, 0.0, 0.0
@@ -97,38 +94,29 @@ def _default_keywords_for_field(field_name: str) -> List[str]:
 def _extract_with_rule(
     *,
     field_name: str,
-    rule: Dict[str, Any],
+    rule: CompiledExtractor,
     user_message: str,
     user_message_lower: str,
 ) -> Any:
-    extractor_type = str(rule.get("type", "")).strip().lower()
+    extractor_type = rule.type
 
     if extractor_type == "pain_scale":
         pain = infer_pain_level(user_message)
         return pain if pain > 0 else None
 
     if extractor_type == "categorical_keywords":
-        categories = rule.get("categories", {})
-        if not isinstance(categories, dict):
-            return None
-        for category, keywords in categories.items():
-            if any(str(k).lower() in user_message_lower for k in (keywords or [])):
-                return str(category)
+        for category, keywords in rule.categories:
+            if any(keyword in user_message_lower for keyword in keywords):
+                return category
         return None
 
     if extractor_type == "regex":
-        patterns = rule.get("patterns", [])
-        for raw_pattern in patterns:
-            try:
-                match = re.search(str(raw_pattern), user_message, re.IGNORECASE)
-            except re.error:
-                continue
+        for pattern in rule.patterns:
+            match = pattern.search(user_message)
             if not match:
                 continue
-            group_index = int(rule.get("group", 0))
-            value = match.group(group_index)
-            value_type = str(rule.get("value_type", "text")).lower()
-            if value_type == "int":
+            value = match.group(rule.group)
+            if rule.value_type == "int":
                 try:
                     return int(value)
                 except (TypeError, ValueError):
@@ -136,9 +124,8 @@ def _extract_with_rule(
             return value.strip() if isinstance(value, str) else value
         return None
 
-    keywords = [str(k).lower() for k in rule.get("keywords", []) if str(k).strip()]
     if extractor_type in {"keyword_text", "text_if_keyword"}:
-        if any(keyword in user_message_lower for keyword in keywords):
+        if any(keyword in user_message_lower for keyword in rule.keywords):
             return user_message.strip()
         return None
 
@@ -170,21 +157,21 @@ def extract_case_fields(
     user_message: str,
     previous_fields: Optional[Dict[str, Any]] = None,
     expected_field: Optional[str] = None,
+    compiled_case: Optional[CompiledCase] = None,
+    normalized_message: Optional[str] = None,
 ) -> Dict[str, Any]:
-    text = _normalize_text(user_message)
+    # Los casos de la base de conocimiento llegan ya compilados; compilar aquí es solo para llamadas sueltas
+    compiled_case = compiled_case or compile_case(case_def)
+    text = normalized_message if normalized_message is not None else _normalize_text(user_message)
     fields = dict(previous_fields or {})
-    required_fields = [str(field) for field in case_def.get("required_fields", [])]
-    extractors = case_def.get("field_extractors", {})
-    if not isinstance(extractors, dict):
-        extractors = {}
+    required_fields = compiled_case.required_fields
 
     for field_name in required_fields:
         if fields.get(field_name) not in (None, "", [], {}):
             continue
-        rule = extractors.get(field_name, {}) if isinstance(extractors.get(field_name, {}), dict) else {}
         value = _extract_with_rule(
             field_name=field_name,
-            rule=rule,
+            rule=compiled_case.extractor_for(field_name),
             user_message=user_message,
             user_message_lower=text,
         )
@@ -192,8 +179,8 @@ def extract_case_fields(
             fields[field_name] = value
 
     if expected_field and expected_field in required_fields and fields.get(expected_field) in (None, "", [], {}):
-        rule = extractors.get(expected_field, {}) if isinstance(extractors.get(expected_field, {}), dict) else {}
-        if str(rule.get("type", "")).strip().lower() == "pain_scale" or expected_field in {"pain_intensity", "pain_scale"}:
+        rule = compiled_case.extractor_for(expected_field)
+        if rule.type == "pain_scale" or expected_field in {"pain_intensity", "pain_scale"}:
             pain_value = infer_pain_level(user_message)
             if pain_value > 0:
                 fields[expected_field] = pain_value
@@ -203,9 +190,15 @@ def extract_case_fields(
     return fields
 
 
-def classify_triage_level(case_id: str, pain_level: int, user_message: str, triage_policy: Dict[str, Any]) -> str:
+def classify_triage_level(
+    case_id: str,
+    pain_level: int,
+    user_message: str,
+    triage_policy: Dict[str, Any],
+    normalized_message: Optional[str] = None,
+) -> str:
     _ = case_id
-    text = _normalize_text(user_message)
+    text = normalized_message if normalized_message is not None else _normalize_text(user_message)
     severe_threshold = int(triage_policy.get("pain_thresholds", {}).get("severe", 8))
     moderate_threshold = int(triage_policy.get("pain_thresholds", {}).get("moderate", 5))
 
@@ -0,0 +1,80 @@
+"""
+Motor de E/S del servicio de chat (CHAT_IO_ENGINE).
+
+Flask-SocketIO corre sobre eventlet, pero boto3, requests, pymongo y redis son bloqueantes. Si no
+se parchea la biblioteca estándar, cada llamada a Bedrock, Comprehend o Django congela el hub y
+con él todos los sockets del proceso. Con el parche, sus sockets ceden el hub mientras esperan.
+
+  - eventlet (por defecto): eventlet.monkey_patch() al arrancar, antes de importar nada más, y
+    Socket.IO en modo eventlet. El cálculo pesado (p. ej. la similitud de embeddings) se
+    ejecuta con run_cpu_bound en un hilo real (eventlet.tpool), fuera del hub.
+  - threading: servidor de hilos de Werkzeug con simple-websocket, sin eventlet.
+
+La comparación de capacidad entre modos está en scripts/benchmark_io_engine.py.
+"""
+
+import logging
+from typing import Any, Callable, TypeVar
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+ENGINES = ("eventlet", "threading")
+_patched = False
+
+
+def selected_engine() -> str:
+    engine = str(Config.CHAT_IO_ENGINE or "eventlet").strip().lower()
+    if engine not in ENGINES:
+        logger.warning("CHAT_IO_ENGINE desconocido (%s); se usa eventlet", engine)
+        return "eventlet"
+    return engine
+
+
+def configure_io_engine() -> str:
+    """
+    Prepara el motor elegido y devuelve el async_mode de Socket.IO. Solo debe llamarse desde el
+    punto de entrada del proceso (app.py), antes de importar Flask y los clientes de E/S.
+    """
+    global _patched
+    engine = selected_engine()
+    if engine == "eventlet" and not _patched:
+        try:
+            import eventlet
+        except ImportError:
+            logger.warning("eventlet no está instalado; se usa el modo threading")
+            return "threading"
+        eventlet.monkey_patch()
+        _patched = True
+        logger.info("E/S cooperativa: eventlet.monkey_patch() aplicado")
+    return engine
+
+
+def socketio_async_mode() -> str:
+    """async_mode para SocketIO: eventlet si está elegido e instalado, si no threading."""
+    if selected_engine() == "eventlet":
+        try:
+            import eventlet  # noqa: F401
+        except ImportError:
+            return "threading"
+        return "eventlet"
+    return "threading"
+
+
+def is_patched() -> bool:
+    return _patched
+
+
+def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Ejecuta `func` en un hilo real del pool de eventlet (tpool) para no bloquear el hub. Sin el
+    parche de eventlet (threading, tests, scripts) se llama directamente.
+    """
+    if not _patched:
+        return func(*args, **kwargs)
+    from eventlet import tpool
+
+    return tpool.execute(func, *args, **kwargs)
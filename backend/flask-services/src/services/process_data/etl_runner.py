@@ -8,8 +8,8 @@ from collections import deque
 from datetime import datetime
 from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
-from models.conversation import ConversationalDatasetManager
 from services.api.send_api import send_data_to_django
+from services.process_data.etl_state_store import get_etl_state_store
 from services.process_data.medical_data import MedicalDataProcessor
 
 logger = logging.getLogger(__name__)
@@ -21,6 +21,12 @@ _ACTIVE_WORKERS: Set[str] = set()
 _INACTIVITY_LOCK = threading.Lock()
 _INACTIVITY_TIMERS: Dict[str, threading.Timer] = {}
 _DEFAULT_INACTIVITY_SECONDS = max(1, int(os.getenv("ETL_INACTIVITY_SECONDS", "900")))
+# Ventana de agrupación de disparos: los que llegan para la misma conversación mientras hay una
+# ejecución pendiente se unen a ella (unión de motivos). Cada disparo alarga la espera hasta la
+# ventana, sin superar el máximo desde el primero. 0 = sin agrupación.
+_COALESCE_WINDOW_SECONDS = max(0.0, float(os.getenv("ETL_COALESCE_WINDOW_SECONDS", "5")))
+_COALESCE_MAX_WAIT_SECONDS = max(0.0, float(os.getenv("ETL_COALESCE_MAX_WAIT_SECONDS", "30")))
+_PENDING_RUNS: Dict[str, Dict[str, Any]] = {}
 
 
 def _utc_now_iso() -> str:
@@ -36,8 +42,7 @@ def _log_etl_event(event_name: str, **payload: Any) -> None:
 
 
 def _update_etl_state(user_id: str, conversation_id: str, etl_state: Dict[str, Any]) -> None:
-    manager = ConversationalDatasetManager()
-    manager.update_conversation_etl_state(user_id, conversation_id, etl_state)
+    get_etl_state_store().transition(user_id, conversation_id, etl_state)
 
 
 def execute_etl_once(
@@ -48,6 +53,15 @@ def execute_etl_once(
 ) -> Dict[str, Any]:
     processor = MedicalDataProcessor(user_id=user_id, conversation_id=conversation_id)
     medical_data = processor.process_medical_data(user_id, conversation_id)
+    if processor.skipped:
+        # Sin mensajes nuevos desde la última ETL correcta: no hay nada que enviar
+        return {
+            "success": True,
+            "skipped": True,
+            "error": "",
+            "medical_data": None,
+            "django_response": None,
+        }
     if not medical_data or "error" in medical_data:
         error_msg = (medical_data or {}).get("error", "No se pudo procesar la conversación.")
         return {
@@ -69,7 +83,25 @@ def execute_etl_once(
         "error": django_response.get("error") if has_error else "",
         "medical_data": medical_data,
         "django_response": django_response,
+        "checkpoint": processor.checkpoint,
+    }
+
+
+def success_etl_state(result: Dict[str, Any], **fields: Any) -> Dict[str, Any]:
+    """Estado ETL tras una ejecución correcta; guarda el punto de control incremental si lo hay."""
+    success_time = _utc_now_iso()
+    if result.get("skipped"):
+        return {**fields, "last_status": "skipped", "last_attempt_at": success_time, "last_error": ""}
+    state = {
+        **fields,
+        "last_status": "success",
+        "last_attempt_at": success_time,
+        "last_success_at": success_time,
+        "last_error": "",
     }
+    if result.get("checkpoint"):
+        state["incremental"] = result["checkpoint"]
+    return state
 
 
 def _execute_task_with_retries(
@@ -80,6 +112,7 @@ def _execute_task_with_retries(
     conversation_id = task["conversation_id"]
     run_id = task["run_id"]
     reasons = list(task.get("reasons") or [])
+    merged_run_ids = list(task.get("merged_run_ids") or [])
     jwt_token = task.get("jwt_token")
     django_api_url = task.get("django_api_url")
 
@@ -112,6 +145,7 @@ def _execute_task_with_retries(
                 "attempts": attempt,
                 "last_attempt_at": now_iso,
                 "last_run_id": run_id,
+                "merged_run_ids": merged_run_ids,
                 "last_reasons": reasons,
                 "last_error": "",
             },
@@ -132,22 +166,19 @@ def _execute_task_with_retries(
             django_api_url=django_api_url,
         )
         if last_result.get("success"):
-            success_time = _utc_now_iso()
             _update_etl_state(
                 user_id,
                 conversation_id,
-                {
-                    "last_status": "success",
-                    "attempts": attempt,
-                    "last_attempt_at": success_time,
-                    "last_success_at": success_time,
-                    "last_run_id": run_id,
-                    "last_reasons": reasons,
-                    "last_error": "",
-                },
+                success_etl_state(
+                    last_result,
+                    attempts=attempt,
+                    last_run_id=run_id,
+                    merged_run_ids=merged_run_ids,
+                    last_reasons=reasons,
+                ),
             )
             _log_etl_event(
-                "etl_success",
+                "etl_skipped" if last_result.get("skipped") else "etl_success",
                 user_id=user_id,
                 conversation_id=conversation_id,
                 run_id=run_id,
@@ -166,6 +197,7 @@ def _execute_task_with_retries(
             "attempts": len(backoff_seconds),
             "last_attempt_at": fail_time,
             "last_run_id": run_id,
+            "merged_run_ids": merged_run_ids,
             "last_reasons": reasons,
             "last_error": last_error,
         },
@@ -199,6 +231,8 @@ def _worker_for_conversation(queue_key: str) -> None:
                 _CONVERSATION_QUEUES.pop(queue_key, None)
 
         try:
+            # Si los mensajes no han cambiado desde la última ETL correcta, el procesador lo detecta
+            # al leer la conversación y la ejecución termina como skipped sin llamar a Django
             _execute_task_with_retries(task)
         except Exception as e:
             user_id = task.get("user_id", "")
@@ -212,6 +246,7 @@ def _worker_for_conversation(queue_key: str) -> None:
                 {
                     "last_status": "failed",
                     "last_run_id": run_id,
+                    "merged_run_ids": list(task.get("merged_run_ids") or []),
                     "last_reasons": reasons,
                     "last_error": error_msg,
                     "last_attempt_at": _utc_now_iso(),
@@ -228,50 +263,43 @@ def _worker_for_conversation(queue_key: str) -> None:
             )
 
 
-def enqueue_etl_run(
-    user_id: str,
-    conversation_id: str,
-    jwt_token: Optional[str],
-    reasons: List[str],
-    run_id: str,
-    django_api_url: Optional[str] = None,
-) -> None:
-    reasons = list(dict.fromkeys(reasons or []))
-    _update_etl_state(
-        user_id,
-        conversation_id,
-        {
-            "last_status": "queued",
-            "attempts": 0,
-            "last_run_id": run_id,
-            "last_reasons": reasons,
-            "last_error": "",
-        },
-    )
-    _log_etl_event(
-        "etl_triggered",
-        user_id=user_id,
-        conversation_id=conversation_id,
-        run_id=run_id,
-        reasons=reasons,
-    )
+def _merge_into(task: Dict[str, Any], reasons: List[str], jwt_token: Optional[str], django_api_url: Optional[str]) -> None:
+    task["reasons"] = list(dict.fromkeys(list(task.get("reasons") or []) + reasons))
+    task["jwt_token"] = jwt_token or task.get("jwt_token")
+    task["django_api_url"] = django_api_url or task.get("django_api_url")
+    task["triggers"] = task.get("triggers", 1) + 1
 
-    queue_key = _conversation_key(user_id, conversation_id)
-    task = {
-        "user_id": user_id,
-        "conversation_id": conversation_id,
-        "jwt_token": jwt_token,
-        "run_id": run_id,
-        "reasons": reasons,
-        "django_api_url": django_api_url,
-    }
+
+def _dispatch_task(task: Dict[str, Any]) -> None:
+    queue_key = _conversation_key(task["user_id"], task["conversation_id"])
     with _REGISTRY_LOCK:
         queue = _CONVERSATION_QUEUES.setdefault(queue_key, deque())
-        queue.append(task)
+        if queue:
+            # Ya hay una ejecución en espera tras la que está en curso: basta con una. El run_id de
+            # la que se une ya se devolvió a quien la disparó, así que queda como alias en merged_run_ids
+            survivor = queue[-1]
+            _merge_into(survivor, task["reasons"], task.get("jwt_token"), task.get("django_api_url"))
+            aliases = list(survivor.get("merged_run_ids") or []) + [task["run_id"]] + list(task.get("merged_run_ids") or [])
+            survivor["merged_run_ids"] = list(dict.fromkeys(aliases))
+            merged_into = dict(survivor)
+        else:
+            queue.append(task)
+            merged_into = None
         should_start_worker = queue_key not in _ACTIVE_WORKERS
         if should_start_worker:
             _ACTIVE_WORKERS.add(queue_key)
 
+    if merged_into is not None:
+        _log_etl_event(
+            "etl_coalesced",
+            user_id=task["user_id"],
+            conversation_id=task["conversation_id"],
+            run_id=merged_into["run_id"],
+            trigger_run_id=task["run_id"],
+            merged_run_ids=merged_into["merged_run_ids"],
+            reasons=merged_into["reasons"],
+        )
+
     if should_start_worker:
         worker_name = f"etl-worker-{abs(hash(queue_key)) % 100000}"
         threading.Thread(
@@ -282,6 +310,121 @@ def enqueue_etl_run(
         ).start()
 
 
+def _start_flush_timer(queue_key: str, delay: float) -> None:
+    timer = threading.Timer(max(0.0, delay), _flush_pending_run, args=(queue_key,))
+    timer.daemon = True
+    timer.start()
+
+
+def _flush_pending_run(queue_key: str) -> None:
+    with _REGISTRY_LOCK:
+        task = _PENDING_RUNS.get(queue_key)
+        if task is None:
+            return
+        remaining = task["deadline"] - time.monotonic()
+        if remaining <= 0:
+            _PENDING_RUNS.pop(queue_key, None)
+    if remaining > 0:
+        _start_flush_timer(queue_key, remaining)
+        return
+    _log_etl_event(
+        "etl_dispatched",
+        user_id=task["user_id"],
+        conversation_id=task["conversation_id"],
+        run_id=task["run_id"],
+        reasons=task["reasons"],
+        triggers=task.get("triggers", 1),
+    )
+    _dispatch_task(task)
+
+
+def enqueue_etl_run(
+    user_id: str,
+    conversation_id: str,
+    jwt_token: Optional[str],
+    reasons: List[str],
+    run_id: str,
+    django_api_url: Optional[str] = None,
+    coalesce_window_seconds: Optional[float] = None,
+) -> str:
+    """
+    Encola una ETL para la conversación y devuelve el run_id efectivo: si ya había una pendiente
+    dentro de la ventana de agrupación, el disparo se une a ella y se devuelve el run_id de esa.
+    Si al vencer la ventana ya hay otra en cola, se une a esa y su run_id pasa a merged_run_ids
+    en el estado de la ETL.
+    """
+    reasons = list(dict.fromkeys(reasons or []))
+    window = _COALESCE_WINDOW_SECONDS if coalesce_window_seconds is None else max(0.0, float(coalesce_window_seconds))
+    queue_key = _conversation_key(user_id, conversation_id)
+    now = time.monotonic()
+
+    with _REGISTRY_LOCK:
+        pending = _PENDING_RUNS.get(queue_key)
+        if pending is not None:
+            _merge_into(pending, reasons, jwt_token, django_api_url)
+            pending["deadline"] = min(now + window, pending["first_trigger"] + _COALESCE_MAX_WAIT_SECONDS)
+            coalesced_into = pending["run_id"]
+            merged_reasons = list(pending["reasons"])
+        else:
+            coalesced_into = None
+            task = {
+                "user_id": user_id,
+                "conversation_id": conversation_id,
+                "jwt_token": jwt_token,
+                "run_id": run_id,
+                "reasons": reasons,
+                "django_api_url": django_api_url,
+                "triggers": 1,
+                "first_trigger": now,
+                "deadline": now + window,
+            }
+            if window > 0:
+                _PENDING_RUNS[queue_key] = task
+
+    if coalesced_into is not None:
+        _log_etl_event(
+            "etl_coalesced",
+            user_id=user_id,
+            conversation_id=conversation_id,
+            run_id=coalesced_into,
+            trigger_run_id=run_id,
+            reasons=merged_reasons,
+        )
+        return coalesced_into
+
+    try:
+        _update_etl_state(
+            user_id,
+            conversation_id,
+            {
+                "last_status": "queued",
+                "attempts": 0,
+                "last_run_id": run_id,
+                "merged_run_ids": [],
+                "last_reasons": reasons,
+                "last_error": "",
+            },
+        )
+    except Exception:
+        # Como antes: si no se puede registrar, no queda nada encolado
+        with _REGISTRY_LOCK:
+            if _PENDING_RUNS.get(queue_key) is task:
+                _PENDING_RUNS.pop(queue_key, None)
+        raise
+    _log_etl_event(
+        "etl_triggered",
+        user_id=user_id,
+        conversation_id=conversation_id,
+        run_id=run_id,
+        reasons=reasons,
+    )
+    if window > 0:
+        _start_flush_timer(queue_key, window)
+    else:
+        _dispatch_task(task)
+    return run_id
+
+
 def clear_inactivity_timer(user_id: str, conversation_id: str) -> None:
     key = _conversation_key(user_id, conversation_id)
     with _INACTIVITY_LOCK:
@@ -0,0 +1,289 @@
+"""
+Estado de la ETL por conversación como máquina de estados compacta.
+
+Cada transición (queued, running, success, failed, skipped) se escribe de una sola vez en un hash
+de Redis, `etl:state:{user_id}:{conversation_id}`, con HSET y EXPIRE en una transacción. A Mongo
+solo llegan puntos de control:
+  - en los estados finales (success, failed, skipped);
+  - cuando la transición pendiente más antigua supera ETL_STATE_CHECKPOINT_SECONDS.
+
+Las transiciones intermedias consecutivas (queued y running) se acumulan y se guardan juntas en
+el siguiente punto de control. Así una ejecución hace una sola escritura en Mongo en lugar de
+tres o cuatro. Si Redis no responde, la transición va directa a Mongo, como antes.
+
+Quien lea o muestre el estado (el turno de chat, que lo vuelve a guardar, y los endpoints de
+conversaciones) superpone el hash de Redis al de Mongo con merge_etl_state / with_live_etl_state;
+si no, los estados queued y running no se verían nunca.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from data.connect import get_redis_client
+from models.conversation import get_conversational_dataset_manager
+
+logger = logging.getLogger(__name__)
+
+_CHECKPOINT_SECONDS = max(0.0, float(os.getenv("ETL_STATE_CHECKPOINT_SECONDS", "60")))
+_STATE_TTL_SECONDS = max(1, int(os.getenv("ETL_STATE_TTL_SECONDS", str(60 * 60 * 24 * 7))))
+_MAX_TRACKED_CONVERSATIONS = 10000
+
+TERMINAL_STATUSES = frozenset({"success", "failed", "skipped"})
+# Orden dentro de una misma ejecución (mismo run_id): no se vuelve atrás ni se sale de un estado final
+_STATUS_RANK = {"queued": 0, "running": 1, "success": 2, "failed": 2, "skipped": 2}
+# Campos que viven en el hash de Redis; el resto (p. ej. el punto de control incremental) solo en Mongo
+COMPACT_FIELDS = (
+    "last_status",
+    "attempts",
+    "last_attempt_at",
+    "last_success_at",
+    "last_run_id",
+    "merged_run_ids",
+    "last_reasons",
+    "last_error",
+)
+
+
+def merge_etl_state(persisted: Optional[Dict[str, Any]], live: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Estado de Mongo con los campos compactos de Redis encima, salvo que Mongo sea más reciente:
+    misma ejecución en un estado más avanzado, u otra con last_attempt_at posterior (p. ej. si
+    falló la escritura en Redis). Un queued sin last_attempt_at es siempre el más reciente.
+    """
+    persisted = dict(persisted) if isinstance(persisted, dict) else {}
+    live = {field: live[field] for field in COMPACT_FIELDS if field in live} if isinstance(live, dict) else {}
+    if not live:
+        return persisted
+    if live.get("last_run_id") == persisted.get("last_run_id"):
+        stale = _STATUS_RANK.get(live.get("last_status"), -1) < _STATUS_RANK.get(persisted.get("last_status"), -1)
+    else:
+        live_at = str(live.get("last_attempt_at") or "")
+        stale = bool(live_at) and str(persisted.get("last_attempt_at") or "") > live_at
+    return persisted if stale else {**persisted, **live}
+
+
+class EtlStateStore:
+    KEY_STATE = "etl:state:{user_id}:{conversation_id}"
+
+    def __init__(
+        self,
+        redis_client=None,
+        manager_factory: Optional[Callable[[], Any]] = None,
+        checkpoint_seconds: Optional[float] = None,
+        ttl_seconds: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._redis_client = redis_client
+        self._manager_factory = manager_factory or get_conversational_dataset_manager
+        self.checkpoint_seconds = _CHECKPOINT_SECONDS if checkpoint_seconds is None else float(checkpoint_seconds)
+        self.ttl_seconds = _STATE_TTL_SECONDS if ttl_seconds is None else int(ttl_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Último estado conocido y transiciones aún no guardadas en Mongo (con el instante de la primera)
+        self._current: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self.transitions = 0
+        self.rejected = 0
+        self.redis_writes = 0
+        self.redis_errors = 0
+        self.mongo_checkpoints = 0
+
+    def _redis(self):
+        return self._redis_client if self._redis_client is not None else get_redis_client()
+
+    def _key(self, user_id: str, conversation_id: str) -> str:
+        return self.KEY_STATE.format(user_id=user_id, conversation_id=conversation_id)
+
+    @staticmethod
+    def _allowed(current: Optional[Dict[str, Any]], state: Dict[str, Any]) -> bool:
+        if not current or current.get("last_run_id") != state.get("last_run_id"):
+            return True
+        before = _STATUS_RANK.get(current.get("last_status"), -1)
+        after = _STATUS_RANK.get(state.get("last_status"), -1)
+        if before == 2:
+            return False
+        return after > before or (after == before == 1)
+
+    def _write_redis(self, user_id: str, conversation_id: str, state: Dict[str, Any]) -> bool:
+        mapping = {
+            field: json.dumps(state[field], ensure_ascii=False, default=str)
+            for field in COMPACT_FIELDS
+            if field in state
+        }
+        if not mapping:
+            return True
+        key = self._key(user_id, conversation_id)
+        try:
+            pipe = self._redis().pipeline(transaction=True)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Estado ETL no disponible en Redis (%s): %s", conversation_id, str(e))
+            with self._lock:
+                self.redis_errors += 1
+            return False
+        with self._lock:
+            self.redis_writes += 1
+        return True
+
+    def _checkpoint(self, user_id: str, conversation_id: str, state: Dict[str, Any]) -> None:
+        self._manager_factory().update_conversation_etl_state(user_id, conversation_id, state)
+        with self._lock:
+            self.mongo_checkpoints += 1
+
+    def transition(self, user_id: str, conversation_id: str, state: Dict[str, Any]) -> bool:
+        """
+        Aplica una transición (dict con last_status y el resto de campos de etl_state). Devuelve
+        False si se rechaza por volver atrás dentro de la misma ejecución.
+        """
+        state = dict(state or {})
+        key = (user_id, conversation_id)
+        with self._lock:
+            if not self._allowed(self._current.get(key), state):
+                self.rejected += 1
+                logger.warning(
+                    "Transición ETL descartada para %s: %s -> %s (run_id=%s)",
+                    conversation_id,
+                    self._current[key].get("last_status"),
+                    state.get("last_status"),
+                    state.get("last_run_id"),
+                )
+                return False
+            self.transitions += 1
+            self._current[key] = {
+                "last_run_id": state.get("last_run_id", self._current.get(key, {}).get("last_run_id")),
+                "last_status": state.get("last_status"),
+            }
+            self._current.move_to_end(key)
+            if len(self._current) > _MAX_TRACKED_CONVERSATIONS:
+                self._current.popitem(last=False)
+            since, pending = self._pending.get(key, (self._clock(), {}))
+            merged = {**pending, **state}
+            due = state.get("last_status") in TERMINAL_STATUSES or self._clock() - since >= self.checkpoint_seconds
+            if due:
+                self._pending.pop(key, None)
+            else:
+                self._pending[key] = (since, merged)
+
+        if not self._write_redis(user_id, conversation_id, state):
+            # Sin Redis, Mongo es la única copia: se escribe ya todo lo acumulado
+            with self._lock:
+                self._pending.pop(key, None)
+            due = True
+        if due:
+            self._checkpoint(user_id, conversation_id, merged)
+        return True
+
+    @staticmethod
+    def _decode(raw) -> Dict[str, Any]:
+        state = {}
+        for field, value in (raw or {}).items():
+            field = field.decode("utf-8") if isinstance(field, bytes) else field
+            try:
+                state[field] = json.loads(value)
+            except (TypeError, ValueError):
+                continue
+        return state
+
+    def get(self, user_id: str, conversation_id: str) -> Dict[str, Any]:
+        """Estado compacto actual desde Redis ({} si no hay o Redis no responde)."""
+        try:
+            raw = self._redis().hgetall(self._key(user_id, conversation_id))
+        except Exception as e:
+            logger.warning("Estado ETL no disponible en Redis (%s): %s", conversation_id, str(e))
+            return {}
+        return self._decode(raw)
+
+    def get_many(self, keys: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """get() de varias conversaciones (user_id, conversation_id) en una sola ida y vuelta."""
+        if not keys:
+            return []
+        try:
+            pipe = self._redis().pipeline(transaction=False)
+            for user_id, conversation_id in keys:
+                pipe.hgetall(self._key(user_id, conversation_id))
+            raws = pipe.execute()
+        except Exception as e:
+            logger.warning("Estado ETL no disponible en Redis: %s", str(e))
+            return [{} for _ in keys]
+        return [self._decode(raw) for raw in raws]
+
+    def current(self, user_id: str, conversation_id: str, persisted: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Estado vigente: `persisted` (el de Mongo) con el de Redis superpuesto."""
+        return merge_etl_state(persisted, self.get(user_id, conversation_id))
+
+    def flush(self) -> int:
+        """Guarda en Mongo todas las transiciones pendientes (p. ej. al parar el proceso)."""
+        with self._lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+        for (user_id, conversation_id), (_, state) in pending:
+            try:
+                self._checkpoint(user_id, conversation_id, state)
+            except Exception as e:
+                logger.error("No se pudo guardar el estado ETL de %s: %s", conversation_id, str(e))
+        return len(pending)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "transitions": self.transitions,
+                "rejected": self.rejected,
+                "redis_writes": self.redis_writes,
+                "redis_errors": self.redis_errors,
+                "mongo_checkpoints": self.mongo_checkpoints,
+                "pending_conversations": len(self._pending),
+            }
+
+
+def _persisted_etl_state(conversation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    medical_context = conversation.get("medical_context")
+    hybrid_state = medical_context.get("hybrid_state") if isinstance(medical_context, dict) else None
+    return hybrid_state.get("etl") if isinstance(hybrid_state, dict) else None
+
+
+def with_live_etl_state(conversations: List[Any], store: Optional[EtlStateStore] = None) -> List[Any]:
+    """
+    Copias de las conversaciones (documentos de Mongo) con medical_context.hybrid_state.etl al día
+    según Redis. Los documentos sin user_id/_id o sin estado en ninguno de los dos quedan igual.
+    """
+    store = store or get_etl_state_store()
+    indexed = [
+        (index, conversation)
+        for index, conversation in enumerate(conversations)
+        if isinstance(conversation, dict) and conversation.get("user_id") and conversation.get("_id")
+    ]
+    live_states = store.get_many([(str(c["user_id"]), str(c["_id"])) for _, c in indexed])
+    result = list(conversations)
+    for (index, conversation), live in zip(indexed, live_states):
+        persisted = _persisted_etl_state(conversation)
+        if not live and persisted is None:
+            continue
+        medical_context = conversation.get("medical_context")
+        medical_context = dict(medical_context) if isinstance(medical_context, dict) else {}
+        hybrid_state = medical_context.get("hybrid_state")
+        hybrid_state = dict(hybrid_state) if isinstance(hybrid_state, dict) else {}
+        hybrid_state["etl"] = merge_etl_state(persisted, live)
+        medical_context["hybrid_state"] = hybrid_state
+        result[index] = {**conversation, "medical_context": medical_context}
+    return result
+
+
+_shared_store: Optional[EtlStateStore] = None
+
+
+def get_etl_state_store() -> EtlStateStore:
+    """Almacén compartido por las ETL del proceso."""
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = EtlStateStore()
+        # Las transiciones intermedias pendientes se guardan en Mongo al salir
+        atexit.register(_shared_store.flush)
+    return _shared_store
@@ -1,22 +1,42 @@
 from datetime import datetime
+import hashlib
+import json
 import logging
 
-from models.conversation import ConversationalDatasetManager
-from services.chatbot.comprehend_medical import detect_entities
+from models.conversation import get_conversational_dataset_manager
+from services.chatbot.entity_chunking import get_chunked_entity_extractor, merge_chunk_entities
 from services.chatbot.bedrock_claude import call_claude
 from services.api.send_api import send_data_to_django
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_FALLBACK = "No se pudo generar el resumen del contexto médico."
+# Versión del formato de etl_state["incremental"]. La 2 guarda por separado las menciones negadas
+# y afirmadas del mismo término; los puntos de control anteriores se descartan (ETL completa)
+CHECKPOINT_VERSION = 2
+
+
+def messages_digest(messages):
+    """Hash de rol y contenido de los mensajes: identifica la entrada ya procesada por la ETL."""
+    payload = [[message.get("role", ""), message.get("content", "")] for message in messages]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
 
 class MedicalDataProcessor:
-    def __init__(self, user_id=None, conversation_id=None, config=None):
+    def __init__(self, user_id=None, conversation_id=None, config=None, dataset_manager=None, entity_extractor=None):
         self.user_id = user_id
         self.conversation_id = conversation_id
         self.config = config or {}
-        self.dataset_manager = ConversationalDatasetManager()
+        self.dataset_manager = dataset_manager or get_conversational_dataset_manager()
+        self.entity_extractor = entity_extractor
+        # Resultado de la última llamada: sin cambios desde la última ETL correcta y punto de control
+        # a guardar en etl_state["incremental"] si el envío termina bien
+        self.skipped = False
+        self.checkpoint = None
 
     def process_medical_data(self, user_id, conversation_id):
+        self.skipped = False
+        self.checkpoint = None
         try:
             conversation = self.dataset_manager.get_conversation(user_id, conversation_id)
             if not conversation:
@@ -28,9 +48,38 @@ class MedicalDataProcessor:
                 logger.error("No hay mensajes en la conversación: %s para usuario %s", conversation_id, user_id)
                 return {"error": "No hay mensajes en la conversación."}
 
+            previous = self.previous_checkpoint(conversation, messages)
+            if previous and previous["watermark"] == len(messages):
+                logger.info("ETL sin mensajes nuevos para conversación %s; se omite", conversation_id)
+                self.skipped = True
+                return {"skipped": True}
+
+            # Incremental: solo se resumen y analizan los mensajes posteriores a la marca de agua
+            watermark = previous["watermark"] if previous else 0
+            new_messages = messages[watermark:]
             consolidated_text = self.consolidate_conversation(messages)
-            medical_context = self.generate_medical_context_summary(messages, consolidated_text)
-            enhanced_entities = detect_entities(consolidated_text)
+            if previous:
+                medical_context = self.update_medical_context_summary(previous["summary"], new_messages)
+            else:
+                medical_context = self.generate_medical_context_summary(messages, consolidated_text)
+
+            previous_texts = self.user_message_texts(messages[:watermark])
+            new_texts = self.user_message_texts(new_messages)
+            new_entities = self.detect_entities(" ".join(new_texts), segments=new_texts)
+            # Offsets relativos al texto de todos los mensajes del usuario unidos por espacios
+            shift = len(" ".join(previous_texts)) + 1 if previous_texts else 0
+            enhanced_entities = merge_chunk_entities(
+                [(0, previous["entities"] if previous else []), (shift, new_entities)]
+            )
+            self.checkpoint = {
+                "version": CHECKPOINT_VERSION,
+                "watermark": len(messages),
+                "messages_digest": messages_digest(messages),
+                "summary": medical_context if medical_context != SUMMARY_FALLBACK else None,
+                "entities": enhanced_entities,
+                "updated_at": datetime.now().isoformat(),
+            }
+
             structured_data = self.extract_structured_data(conversation, messages, enhanced_entities)
             structured_data["medical_context"] = medical_context
             structured_data["processed_at"] = datetime.now().isoformat()
@@ -40,12 +89,46 @@ class MedicalDataProcessor:
             logger.error("Error procesando datos médicos de conversación %s: %s", conversation_id, str(e))
             return {"error": f"Error procesando datos médicos: {str(e)}"}
 
+    @staticmethod
+    def previous_checkpoint(conversation, messages):
+        """
+        Punto de control de la última ETL correcta si sigue siendo válido: los mensajes hasta la
+        marca de agua no han cambiado y hay resumen guardado. Si no, None (ETL completa).
+        """
+        medical_context = conversation.get("medical_context")
+        hybrid_state = medical_context.get("hybrid_state") if isinstance(medical_context, dict) else None
+        etl_state = hybrid_state.get("etl") if isinstance(hybrid_state, dict) else None
+        if not isinstance(etl_state, dict) or not etl_state.get("last_success_at"):
+            return None
+        checkpoint = etl_state.get("incremental")
+        if not isinstance(checkpoint, dict) or checkpoint.get("version") != CHECKPOINT_VERSION:
+            return None
+        watermark = checkpoint.get("watermark")
+        if not isinstance(watermark, int) or not 0 < watermark <= len(messages):
+            return None
+        if not isinstance(checkpoint.get("summary"), str) or not isinstance(checkpoint.get("entities"), list):
+            return None
+        if checkpoint.get("messages_digest") != messages_digest(messages[:watermark]):
+            return None
+        return checkpoint
+
+    def detect_entities(self, text, segments=None):
+        # Por defecto, por trozos: un trozo por mensaje, en paralelo y cacheado (ver entity_chunking)
+        extractor = self.entity_extractor or get_chunked_entity_extractor()
+        try:
+            if segments is not None and hasattr(extractor, "extract_segments"):
+                return extractor.extract_segments(segments)
+            return extractor.extract(text) if text else []
+        except Exception as e:
+            # Se propaga: la ejecución falla (y la reintenta etl_runner) sin avanzar el punto de control
+            logger.error("Error detectando entidades médicas (%s): %s", extractor.name, str(e))
+            raise
+
+    def user_message_texts(self, messages):
+        return [message.get("content", "") for message in messages if message.get("role", "").lower() == "user"]
+
     def consolidate_conversation(self, messages):
-        consolidated = []
-        for message in messages:
-            if message.get("role", "").lower() == "user":
-                consolidated.append(message.get("content", ""))
-        return " ".join(consolidated).strip()
+        return " ".join(self.user_message_texts(messages)).strip()
 
     def generate_medical_context_summary(self, messages, consolidated_text):
         prompt = f"""
@@ -63,11 +146,33 @@ Conversación:
 Texto consolidado:
 {consolidated_text}
 """
+        return self._summarize(prompt)
+
+    def update_medical_context_summary(self, previous_summary, new_messages):
+        prompt = f"""
+Eres un asistente médico especializado en extraer información médica relevante de conversaciones.
+Actualiza el resumen clínico previo con la información de los mensajes nuevos de la conversación.
+Mantén el mismo formato, conciso, objetivo y sin diagnósticos, con:
+- Síntomas principales
+- Duración/evolución
+- Factores agravantes/alivio
+- Antecedentes médicos mencionados
+- Medicación o alergias mencionadas
+
+Resumen previo:
+{previous_summary}
+
+Mensajes nuevos:
+{new_messages}
+"""
+        return self._summarize(prompt)
+
+    def _summarize(self, prompt):
         try:
             return call_claude(prompt, max_tokens=400, temperature=0.1).strip()
         except Exception as e:
             logger.error("Error generando resumen de contexto médico: %s", str(e))
-            return "No se pudo generar el resumen del contexto médico."
+            return SUMMARY_FALLBACK
 
     def extract_structured_data(self, conversation, messages, enhanced_entities):
         return {
@@ -83,7 +188,7 @@ Texto consolidado:
     def extract_allergies(self, messages, entities):
         allergies = []
         for entity in entities:
-            if entity.get("Type") == "MEDICATION" and entity.get("Traits", []):
+            if self._is_medication(entity) and entity.get("Traits", []):
                 for trait in entity.get("Traits", []):
                     if trait.get("Name") == "NEGATION":
                         continue
@@ -98,10 +203,15 @@ Texto consolidado:
                     allergies = ["Paciente menciona alergias, verificar detalles."]
         return "; ".join(allergies) if allergies else ""
 
+    @staticmethod
+    def _is_medication(entity):
+        # Comprehend Medical (y el extractor local) marcan la medicación en Category; Type es GENERIC_NAME/BRAND_NAME
+        return "MEDICATION" in (entity.get("Category"), entity.get("Type"))
+
     def extract_medications(self, entities):
         medications = []
         for entity in entities:
-            if entity.get("Type") == "MEDICATION" and not any(
+            if self._is_medication(entity) and not any(
                 trait.get("Name") == "NEGATION" for trait in entity.get("Traits", [])
             ):
                 medication = entity.get("Text")
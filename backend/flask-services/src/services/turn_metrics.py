@@ -0,0 +1,171 @@
+"""
+Latencia por etapa de cada turno de chat.
+
+`turn_timer()` abre la medición de un turno (en un ContextVar, una por greenlet o hilo). `span(etapa)`
+mide un bloque dentro de ese turno. Fuera de un turno, por ejemplo en la ETL, `span` no hace nada.
+Al cerrar el turno:
+  - cada etapa y el total se observan en histogramas que se exponen en /metrics con el formato
+    de texto de Prometheus (chat_stage_duration_seconds{stage=...} y chat_turn_duration_seconds);
+  - el desglose queda en `timings_ms` para adjuntarlo al registro del turno;
+  - si el turno supera CHAT_SLOW_TURN_SECONDS, se registra una muestra (CHAT_SLOW_TURN_SAMPLE_RATE)
+    con todos los spans en orden (`chat_slow_turn`).
+
+Etapas: django_context, mongo_read, expert_evaluate, llm_candidate, entities, embeddings, claude,
+persistence y postprocess. Se pueden anidar, por ejemplo claude dentro de llm_candidate.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Histograma acumulado por etiqueta, con el formato de texto de Prometheus."""
+
+    def __init__(self, name: str, help_text: str, label: Optional[str] = None, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # etiqueta -> (conteos por bucket sin acumular, suma, total)
+        self._series: Dict[str, Tuple[List[int], float, int]] = {}
+
+    def observe(self, seconds: float, label_value: str = "") -> None:
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts, total_sum, count = self._series.get(label_value) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[index] += 1
+            self._series[label_value] = (counts, total_sum + seconds, count + 1)
+
+    def count(self, label_value: str = "") -> int:
+        with self._lock:
+            series = self._series.get(label_value)
+            return series[2] if series else 0
+
+    def _labels(self, label_value: str, le: Optional[str] = None) -> str:
+        parts = []
+        if self.label:
+            parts.append(f'{self.label}="{label_value}"')
+        if le is not None:
+            parts.append(f'le="{le}"')
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, (list(counts), total_sum, count)) for key, (counts, total_sum, count) in self._series.items())
+        for label_value, (counts, total_sum, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{self._labels(label_value, format(bound, 'g'))} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._labels(label_value, '+Inf')} {count}")
+            lines.append(f"{self.name}_sum{self._labels(label_value)} {total_sum:.6f}")
+            lines.append(f"{self.name}_count{self._labels(label_value)} {count}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+STAGE_SECONDS = Histogram("chat_stage_duration_seconds", "Duración de cada etapa del turno de chat.", label="stage")
+TURN_SECONDS = Histogram("chat_turn_duration_seconds", "Duración total del turno de chat.")
+
+
+class TurnTimer:
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self.total_seconds: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        # (etapa, inicio relativo, duración) en orden de cierre
+        self.spans: List[Tuple[str, float, float]] = []
+
+    def record(self, stage: str, started: float, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.spans.append((stage, started - self.started, seconds))
+
+    def timings_ms(self) -> Dict[str, float]:
+        timings = {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()}
+        total = self.total_seconds if self.total_seconds is not None else self._clock() - self.started
+        timings["total"] = round(total * 1000, 1)
+        return timings
+
+
+_current_turn: ContextVar[Optional[TurnTimer]] = ContextVar("chat_turn_timer", default=None)
+
+
+def current_turn() -> Optional[TurnTimer]:
+    return _current_turn.get()
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Mide el bloque como `stage` del turno en curso (no hace nada fuera de un turno)."""
+    timer = _current_turn.get()
+    if timer is None:
+        yield
+        return
+    started = timer._clock()
+    try:
+        yield
+    finally:
+        seconds = timer._clock() - started
+        timer.record(stage, started, seconds)
+        STAGE_SECONDS.observe(seconds, stage)
+
+
+def _dump_slow_turn(timer: TurnTimer, context: Dict[str, object]) -> None:
+    threshold = Config.CHAT_SLOW_TURN_SECONDS
+    if threshold <= 0 or timer.total_seconds < threshold:
+        return
+    if random.random() >= Config.CHAT_SLOW_TURN_SAMPLE_RATE:
+        return
+    logger.warning(
+        "chat_slow_turn %s",
+        json.dumps(
+            {
+                **context,
+                "timings_ms": timer.timings_ms(),
+                "spans": [
+                    {"stage": stage, "start_ms": round(start * 1000, 1), "duration_ms": round(seconds * 1000, 1)}
+                    for stage, start, seconds in timer.spans
+                ],
+            },
+            ensure_ascii=False,
+            default=str,
+        ),
+    )
+
+
+@contextmanager
+def turn_timer(**context) -> Iterator[TurnTimer]:
+    """Mide un turno completo. `context` (p. ej. conversation_id) acompaña al volcado de turnos lentos."""
+    timer = TurnTimer()
+    token = _current_turn.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_turn.reset(token)
+        timer.total_seconds = timer._clock() - timer.started
+        TURN_SECONDS.observe(timer.total_seconds)
+        _dump_slow_turn(timer, context)
+
+
+def render_metrics() -> str:
+    lines = STAGE_SECONDS.render() + TURN_SECONDS.render()
+    return "\n".join(lines) + "\n"
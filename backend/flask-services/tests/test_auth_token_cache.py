@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+import jwt
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from config.config import Config  # noqa: E402
+from services.auth import auth  # noqa: E402
+from services.auth.auth import TokenVerificationCache, get_user_id_from_token  # noqa: E402
+
+SECRET = "clave-de-pruebas"
+
+
+def _make_token(user_id="42", exp_offset=3600):
+    payload = {"user_id": user_id}
+    if exp_offset is not None:
+        payload["exp"] = int(time.time()) + exp_offset
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+class TokenVerificationCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.secret_patch = patch.object(Config, "JWT_SECRET", SECRET)
+        self.algorithm_patch = patch.object(Config, "JWT_ALGORITHM", "HS256")
+        self.secret_patch.start()
+        self.algorithm_patch.start()
+        auth.token_cache.clear()
+
+    def tearDown(self):
+        self.secret_patch.stop()
+        self.algorithm_patch.stop()
+        auth.token_cache.clear()
+
+    def test_second_lookup_skips_decode(self):
+        token = _make_token()
+        self.assertEqual(get_user_id_from_token(token), "42")
+        with patch.object(auth.jwt, "decode") as mock_decode:
+            self.assertEqual(get_user_id_from_token(token), "42")
+        mock_decode.assert_not_called()
+
+        stats = auth.get_token_cache_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_invalid_tokens_are_not_cached(self):
+        token = jwt.encode({"user_id": "42"}, "otra-clave", algorithm="HS256")
+        self.assertIsNone(get_user_id_from_token(token))
+        self.assertIsNone(get_user_id_from_token(token))
+        self.assertEqual(auth.get_token_cache_stats()["size"], 0)
+
+    def test_entry_expires_with_exp_claim(self):
+        cache = TokenVerificationCache(max_size=10, ttl_seconds=300)
+        now = time.time()
+        cache.put("token", "42", exp=now + 5, now=now)
+        self.assertEqual(cache.get("token", now=now + 4), "42")
+        self.assertIsNone(cache.get("token", now=now + 6))
+        self.assertEqual(cache.stats()["expired"], 1)
+
+    def test_ttl_bounds_tokens_without_exp(self):
+        cache = TokenVerificationCache(max_size=10, ttl_seconds=60)
+        now = time.time()
+        cache.put("token", "42", exp=None, now=now)
+        self.assertIsNone(cache.get("token", now=now + 61))
+
+    def test_lru_eviction_is_bounded(self):
+        cache = TokenVerificationCache(max_size=2, ttl_seconds=60)
+        cache.put("a", "1", exp=None)
+        cache.put("b", "2", exp=None)
+        cache.get("a")
+        cache.put("c", "3", exp=None)
+
+        self.assertEqual(cache.get("a"), "1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
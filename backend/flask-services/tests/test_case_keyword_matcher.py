@@ -0,0 +1,82 @@
+import os
+import sys
+import unittest
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.expert_system.keyword_matcher import CaseKeywordMatcher  # noqa: E402
+from services.expert_system.loader import load_knowledge_base  # noqa: E402
+from services.expert_system.rule_engine import (  # noqa: E402
+    _intent_score_for_case,
+    _normalize_text,
+    detect_best_case,
+)
+
+MESSAGES = [
+    "Tengo dolor de cabeza y migraña desde ayer.",
+    "Me duele la cabeza muchísimo",
+    "cabeza dolor fuerte",
+    "Siento ansiedad y palpitaciones, no puedo dormir",
+    "Anoche bebí mucho alcohol y hoy tiemblo",
+    "Necesito ayuda con un tema no médico.",
+    "dolor",
+    "",
+    "   ",
+    "¿¿??",
+    "Tengo un dolor en la cabeza y estoy muy ansioso por el trabajo",
+    "tomo cerveza y licor todos los días, creo que tengo un problema con la bebida",
+]
+
+SYNTHETIC_CASES = {
+    "prefixes": {"intent_keywords": ["dolor", "dolor de cabeza", "dolor de", "Dolor", "¿?"]},
+    "overlap": {"intent_keywords": ["cabeza fuerte dolor", "pecho dolor", "mareo intenso constante"]},
+    "empty": {"intent_keywords": []},
+    "nested": {"intent_keywords": ["abeza", "cabeza", "za"]},
+}
+
+
+class CaseKeywordMatcherTests(unittest.TestCase):
+    def _assert_parity(self, cases):
+        matcher = CaseKeywordMatcher(cases)
+        for message in MESSAGES:
+            normalized = _normalize_text(message)
+            scores = matcher.score_cases(normalized)
+            for case_id, case_def in cases.items():
+                with self.subTest(case_id=case_id, message=message):
+                    self.assertEqual(scores[case_id], _intent_score_for_case(normalized, case_def))
+
+    def test_parity_with_reference_on_knowledge_base(self):
+        self._assert_parity(load_knowledge_base()["cases"])
+
+    def test_parity_with_prefix_and_overlapping_keywords(self):
+        self._assert_parity(SYNTHETIC_CASES)
+
+    def test_detect_best_case_matches_reference_ranking(self):
+        cases = load_knowledge_base()["cases"]
+        for message in MESSAGES:
+            normalized = _normalize_text(message)
+            reference = sorted(
+                ((case_id, _intent_score_for_case(normalized, case_def)) for case_id, case_def in cases.items()),
+                key=lambda item: item[1],
+                reverse=True,
+            )
+            expected_id = reference[0][0] if reference[0][1] > 0 else None
+            case_id, best, second = detect_best_case(message, cases)
+            with self.subTest(message=message):
+                self.assertEqual(case_id, expected_id)
+                self.assertEqual(second, reference[1][1])
+
+    def test_active_case_uses_compiled_score(self):
+        cases = load_knowledge_base()["cases"]
+        case_id, score, second = detect_best_case("me duele la cabeza", cases, active_case_id="headache_case")
+        self.assertEqual(case_id, "headache_case")
+        self.assertGreater(score, 0.0)
+        self.assertEqual(second, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import unittest
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.expert_system.emergency_guard import EmergencyMatcher, detect_emergency  # noqa: E402
+from services.expert_system.loader import load_knowledge_base  # noqa: E402
+from services.expert_system.normalization import normalize_text  # noqa: E402
+
+
+def _reference_detect(text, emergency_rules, case_id=None):
+    # Implementación anterior (tres bucles) sobre keywords normalizadas
+    matched, is_psych = [], False
+    psych_cases = {str(c).strip() for c in emergency_rules.get("psychological_case_ids", []) if str(c).strip()}
+    for item in emergency_rules.get("global_red_flags", []):
+        keyword = normalize_text(str(item.get("keyword", "")))
+        if keyword and keyword in text:
+            matched.append(str(item.get("rule_id", "global_emergency_rule")))
+    if case_id:
+        if case_id in psych_cases:
+            is_psych = True
+        for item in emergency_rules.get("case_red_flags", {}).get(case_id, []):
+            keyword = normalize_text(str(item.get("keyword", "")))
+            if keyword and keyword in text:
+                matched.append(str(item.get("rule_id", f"{case_id}_emergency_rule")))
+                if bool(item.get("psychological", False)):
+                    is_psych = True
+    for item in emergency_rules.get("psychological_crisis_flags", []):
+        keyword = normalize_text(str(item.get("keyword", "")))
+        if keyword and keyword in text:
+            matched.append(str(item.get("rule_id", "psych_crisis_rule")))
+            is_psych = True
+    return len(matched) > 0, list(dict.fromkeys(matched)), is_psych
+
+
+MESSAGES = [
+    "Tengo dolor de pecho y dificultad para respirar",
+    "tuve una convulsión anoche después de dejar de beber",
+    "Es el peor dolor de cabeza de mi vida, con rigidez de cuello",
+    "No quiero vivir y me quiero hacer daño.",
+    "escucho voces y siento agitación extrema",
+    "Me duele un poco la rodilla",
+    "",
+]
+
+
+class EmergencyMatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.rules = load_knowledge_base()["emergency"]
+        self.matcher = EmergencyMatcher(self.rules)
+
+    def test_parity_with_three_loop_reference(self):
+        case_ids = [None, "headache_case", "anxiety_case", "alcohol_case", "unknown_case"]
+        for message in MESSAGES:
+            for case_id in case_ids:
+                with self.subTest(message=message, case_id=case_id):
+                    self.assertEqual(
+                        self.matcher.match(normalize_text(message), case_id=case_id),
+                        _reference_detect(normalize_text(message), self.rules, case_id=case_id),
+                    )
+
+    def test_matching_ignores_accents(self):
+        triggered, rule_ids, _ = detect_emergency("perdida de consciencia y convulsion", self.rules)
+        self.assertTrue(triggered)
+        self.assertEqual(rule_ids, ["global_loss_of_consciousness", "global_seizure"])
+
+    def test_shared_keyword_reports_global_and_case_rules(self):
+        _, rule_ids, _ = self.matcher.match(normalize_text("Convulsión"), case_id="alcohol_case")
+        self.assertEqual(rule_ids, ["global_seizure", "alcohol_withdrawal_seizure"])
+
+    def test_psychological_flags(self):
+        triggered, _, is_psych = self.matcher.match(normalize_text("no quiero vivir"))
+        self.assertTrue(triggered and is_psych)
+
+        triggered, _, is_psych = self.matcher.match(normalize_text("hola"), case_id="anxiety_case")
+        self.assertFalse(triggered)
+        self.assertTrue(is_psych)
+
+        custom = EmergencyMatcher({"case_red_flags": {"c": [{"rule_id": "r", "keyword": "x y", "psychological": True}]}})
+        self.assertEqual(custom.match("a x y b", case_id="c"), (True, ["r"], True))
+        self.assertEqual(custom.match("a x y b", case_id="otro"), (False, [], False))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.chatbot.entity_chunking import (  # noqa: E402
+    ChunkedEntityExtractor,
+    merge_chunk_entities,
+    plan_chunks,
+    split_sentences,
+)
+from services.chatbot.entity_detection_service import EntityDetectionService  # noqa: E402
+from services.chatbot.entity_extractors import LocalMedicalNerExtractor  # noqa: E402
+from services.process_data.medical_data import MedicalDataProcessor  # noqa: E402
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def _counting_service(redis_client=None):
+    detector = MagicMock(side_effect=LocalMedicalNerExtractor().extract)
+    service = EntityDetectionService(
+        detector=detector, redis_client=redis_client or _FakeRedis(), ttl_seconds=60, backend="local"
+    )
+    return service, detector
+
+
+class ChunkPlanningTests(unittest.TestCase):
+    def test_sentences_cover_the_text(self):
+        text = "Me duele la cabeza. ¿Es grave?\nLlevo 3 días!  Gracias"
+        spans = split_sentences(text)
+        self.assertEqual("".join(text[start:end] for start, end in spans), text)
+        self.assertEqual(text[spans[0][0]:spans[0][1]], "Me duele la cabeza. ")
+
+    def test_chunks_respect_limit_and_sentence_boundaries(self):
+        text = " ".join(f"Frase número {i} con fiebre." for i in range(200))
+        chunks = plan_chunks(text, 300)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(text[start:end] for start, end in chunks), text)
+        for start, end in chunks:
+            self.assertLessEqual(end - start, 300)
+            self.assertTrue(text[start:end].startswith("Frase"))
+
+    def test_sentence_longer_than_limit_is_cut_at_spaces(self):
+        text = "dolor " * 100
+        chunks = plan_chunks(text, 50)
+        self.assertEqual("".join(text[start:end] for start, end in chunks), text)
+        self.assertTrue(all(end - start <= 50 and text[start:end].startswith("dolor") for start, end in chunks))
+
+    def test_merge_remaps_offsets_and_dedupes(self):
+        entity = {"Text": "Fiebre", "Category": "MEDICAL_CONDITION", "Type": "DX_NAME", "Score": 0.7,
+                  "BeginOffset": 2, "EndOffset": 8}
+        merged = merge_chunk_entities([(10, [entity]), (40, [dict(entity, Text="fiebre", Score=0.9)])])
+        self.assertEqual(len(merged), 1)
+        self.assertEqual((merged[0]["BeginOffset"], merged[0]["EndOffset"], merged[0]["Score"]), (12, 18, 0.9))
+
+    def test_negated_then_affirmed_mentions_are_both_kept(self):
+        service, _ = _counting_service()
+        extractor = ChunkedEntityExtractor(service=service, max_workers=1)
+
+        entities = extractor.extract_segments(["No tengo fiebre", "Ahora sí tengo fiebre"])
+
+        traits = [[t["Name"] for t in e["Traits"]] for e in entities if e["Text"] == "fiebre"]
+        self.assertEqual(traits, [["NEGATION"], []])
+        self.assertEqual(MedicalDataProcessor(dataset_manager=MagicMock()).extract_medical_history([], entities), "fiebre")
+
+
+class ChunkedExtractorTests(unittest.TestCase):
+    def test_long_transcript_offsets_point_into_original_text(self):
+        service, detector = _counting_service()
+        extractor = ChunkedEntityExtractor(service=service, max_chars=200, max_workers=4)
+        text = " ".join(["Hoy sigo igual, sin cambios."] * 40 + ["Ahora tengo fiebre alta y tomé paracetamol."])
+
+        entities = extractor.extract(text)
+
+        self.assertGreater(detector.call_count, 1)
+        self.assertEqual({e["Text"] for e in entities}, {"fiebre alta", "paracetamol"})
+        for entity in entities:
+            self.assertEqual(text[entity["BeginOffset"]:entity["EndOffset"]], entity["Text"])
+
+    def test_segments_rerun_only_analyzes_new_messages(self):
+        redis = _FakeRedis()
+        service, detector = _counting_service(redis)
+        extractor = ChunkedEntityExtractor(service=service, max_chars=500, max_workers=2)
+        messages = ["Me duele la cabeza", "Tengo mareos", "Desde ayer"]
+        extractor.extract_segments(messages)
+        self.assertEqual(detector.call_count, 3)
+
+        entities = extractor.extract_segments(messages + ["Y ahora fiebre"])
+        self.assertEqual(detector.call_count, 4)
+        detector.assert_called_with("Y ahora fiebre")
+        joined = " ".join(messages + ["Y ahora fiebre"])
+        for entity in entities:
+            self.assertEqual(joined[entity["BeginOffset"]:entity["EndOffset"]], entity["Text"])
+
+    def test_etl_uses_chunked_extraction_per_user_message(self):
+        service, detector = _counting_service()
+        dataset_manager = MagicMock()
+        dataset_manager.get_conversation.return_value = {
+            "messages": [
+                {"role": "user", "content": "Tengo migraña"},
+                {"role": "assistant", "content": "¿Desde cuándo?"},
+                {"role": "user", "content": "Desde ayer, tomé ibuprofeno"},
+            ],
+        }
+        processor = MedicalDataProcessor(
+            dataset_manager=dataset_manager, entity_extractor=ChunkedEntityExtractor(service=service, max_workers=1)
+        )
+        with patch("services.process_data.medical_data.call_claude", return_value="Resumen"):
+            result = processor.process_medical_data("u1", "c1")
+
+        self.assertEqual((result["medical_history"], result["medications"]), ("migraña", "ibuprofeno"))
+        self.assertEqual([call.args[0] for call in detector.call_args_list], ["Tengo migraña", "Desde ayer, tomé ibuprofeno"])
+
+
+if __name__ == "__main__":
+    unittest.main()
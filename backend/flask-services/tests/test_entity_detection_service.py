@@ -0,0 +1,122 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.chatbot import entity_detection_service  # noqa: E402
+from services.chatbot.chatbot import Chatbot  # noqa: E402
+from services.chatbot.context_manager import init_context  # noqa: E402
+from services.chatbot.entity_detection_service import EntityDetectionService  # noqa: E402
+
+ENTITIES = [
+    {"Text": "dolor de cabeza", "Category": "MEDICAL_CONDITION", "Type": "DX_NAME", "Score": 0.97},
+    {"Text": "35 años", "Category": "PROTECTED_HEALTH_INFORMATION", "Type": "AGE", "Score": 0.91},
+]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8") if isinstance(value, str) else value
+        self.ttls[key] = ex
+
+
+class _DownRedis:
+    def get(self, key):
+        raise ConnectionError("redis caído")
+
+    def set(self, key, value, ex=None):
+        raise ConnectionError("redis caído")
+
+
+class EntityDetectionServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.detector = MagicMock(return_value=ENTITIES)
+        self.redis = _FakeRedis()
+        self.service = EntityDetectionService(detector=self.detector, redis_client=self.redis, ttl_seconds=60)
+
+    def test_turn_memo_avoids_second_call(self):
+        memo = {}
+        first = self.service.detect("Me duele la cabeza", memo=memo)
+        second = self.service.detect("Me duele la cabeza", memo=memo)
+        self.assertEqual(first, ENTITIES)
+        self.assertIs(second, first)
+        self.detector.assert_called_once_with("Me duele la cabeza")
+        stats = self.service.stats()
+        self.assertEqual((stats["api_calls"], stats["memo_hits"], stats["max_calls_per_text"]), (1, 1, 1))
+
+    def test_redis_cache_is_shared_between_processes(self):
+        self.service.detect("Me duele la cabeza")
+        other_process = EntityDetectionService(detector=self.detector, redis_client=self.redis, ttl_seconds=60)
+        self.assertEqual(other_process.detect("Me duele la cabeza"), ENTITIES)
+        self.detector.assert_called_once()
+        self.assertEqual(other_process.stats()["cache_hits"], 1)
+        self.assertEqual(list(self.redis.ttls.values()), [60])
+
+    def test_one_call_per_unique_text(self):
+        texts = ["hola, me duele", "tengo fiebre", "hola, me duele", "tengo fiebre", "tos seca"]
+        for text in texts:
+            self.service.detect(text)
+        self.assertEqual(self.detector.call_count, 3)
+        for text in set(texts):
+            self.assertEqual(self.service.calls_for(text), 1)
+
+    def test_failures_are_not_cached(self):
+        self.detector.side_effect = [RuntimeError("throttled"), ENTITIES]
+        self.assertEqual(self.service.detect("tengo fiebre"), [])
+        self.assertEqual(self.redis.data, {})
+        self.assertEqual(self.service.detect("tengo fiebre"), ENTITIES)
+        self.assertEqual(self.service.stats()["errors"], 1)
+
+    def test_redis_down_falls_back_to_api(self):
+        service = EntityDetectionService(detector=self.detector, redis_client=_DownRedis(), ttl_seconds=60)
+        self.assertEqual(service.detect("tengo fiebre"), ENTITIES)
+        self.detector.assert_called_once()
+
+    def test_blank_text_is_not_sent(self):
+        self.assertEqual(self.service.detect("   "), [])
+        self.detector.assert_not_called()
+
+
+class ChatbotTurnEntityTests(unittest.TestCase):
+    def setUp(self):
+        self.detector = MagicMock(return_value=ENTITIES)
+        self.service = EntityDetectionService(detector=self.detector, redis_client=_FakeRedis(), ttl_seconds=60)
+        self.service_patch = patch.object(entity_detection_service, "_shared_service", self.service)
+        self.service_patch.start()
+
+    def tearDown(self):
+        self.service_patch.stop()
+
+    def test_llm_turn_calls_comprehend_once(self):
+        message = "Tengo 35 años y me duele mucho la cabeza desde ayer"
+        with patch("services.chatbot.chatbot.get_conversation_context_service", return_value=MagicMock()), \
+                patch("services.chatbot.chatbot.call_claude", return_value="Entiendo, cuéntame más."):
+            result = Chatbot(message, {}).initialize_conversation()
+
+        self.assertNotIn("error", result)
+        self.assertEqual(result["entities"], ENTITIES)
+        self.assertEqual(result["context"]["age"], "35 años")
+        self.assertEqual(self.service.calls_for(message), 1)
+        self.assertEqual(self.service.stats()["api_calls"], 1)
+
+    def test_init_context_uses_given_entities(self):
+        result = init_context("me duele la cabeza", entities=ENTITIES)
+        self.assertEqual(result["entities"], ENTITIES)
+        self.detector.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
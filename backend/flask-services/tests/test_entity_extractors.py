@@ -0,0 +1,154 @@
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.chatbot import entity_extractors  # noqa: E402
+from services.chatbot.entity_detection_service import EntityDetectionService  # noqa: E402
+from services.chatbot.entity_extractors import (  # noqa: E402
+    ComprehendMedicalExtractor,
+    EntityExtractor,
+    HybridEntityExtractor,
+    LocalMedicalNerExtractor,
+    build_entity_extractor,
+)
+from services.process_data.medical_data import MedicalDataProcessor  # noqa: E402
+
+
+def _kb(version, keyword):
+    return SimpleNamespace(
+        version=version,
+        emergency={"global_red_flags": [{"rule_id": "rf", "keyword": keyword}], "case_red_flags": {}},
+        triage_policy={"severe_markers": [], "moderate_markers": []},
+    )
+
+
+class LocalMedicalNerTests(unittest.TestCase):
+    def setUp(self):
+        self.extractor = LocalMedicalNerExtractor()
+
+    def test_entities_have_comprehend_shape_and_original_offsets(self):
+        text = "Tengo 35 años, Dolor de pecho y tomé ibuprofeno"
+        entities = self.extractor.extract(text)
+
+        by_type = {entity["Type"]: entity for entity in entities}
+        self.assertEqual(by_type["AGE"]["Text"], "35 años")
+        self.assertEqual(by_type["DX_NAME"]["Text"], "Dolor de pecho")
+        self.assertEqual(by_type["GENERIC_NAME"]["Category"], "MEDICATION")
+        for entity in entities:
+            self.assertTrue({"Text", "Category", "Type", "Score"} <= set(entity))
+            self.assertEqual(text[entity["BeginOffset"]:entity["EndOffset"]], entity["Text"])
+
+    def test_longest_term_wins_and_accents_are_folded(self):
+        texts = [entity["Text"] for entity in self.extractor.extract("NÁUSEAS y dificultad  para respirar")]
+        self.assertEqual(texts, ["NÁUSEAS", "dificultad  para respirar"])
+
+    def test_duration_is_not_an_age(self):
+        entities = self.extractor.extract("me duele la espalda desde hace 3 años")
+        self.assertNotIn("AGE", [entity["Type"] for entity in entities])
+
+    def test_negated_findings_carry_negation_trait(self):
+        entities = self.extractor.extract("No tengo dolor en el pecho, pero sí fiebre. Nunca tomé ibuprofeno")
+        negated = {e["Text"]: [t["Name"] for t in e["Traits"]] for e in entities}
+        self.assertEqual(negated, {"dolor en el pecho": ["NEGATION"], "fiebre": [], "ibuprofeno": ["NEGATION"]})
+
+    def test_negation_cue_must_be_close(self):
+        entities = self.extractor.extract("No sé bien desde cuándo, llevo días con fiebre")
+        self.assertEqual(entities[0]["Traits"], [])
+
+    def test_batch_matches_single_calls(self):
+        texts = ["hola", "tengo fiebre alta", "me duele la cabeza"]
+        self.assertEqual(self.extractor.extract_batch(texts), [self.extractor.extract(t) for t in texts])
+        self.assertEqual(self.extractor.extract("hola"), [])
+
+    def test_vocabulary_follows_knowledge_base_version(self):
+        current = {"kb": _kb("v1", "sangre en la orina")}
+        extractor = LocalMedicalNerExtractor(kb_provider=lambda: current["kb"])
+        self.assertEqual(len(extractor.extract("tengo sangre en la orina")), 1)
+
+        current["kb"] = _kb("v2", "labios morados")
+        self.assertEqual(extractor.extract("tengo sangre en la orina"), [])
+        self.assertEqual(extractor.extract("tiene los labios morados")[0]["Text"], "labios morados")
+
+
+class ExtractorRoutingTests(unittest.TestCase):
+    def test_hybrid_only_calls_remote_without_local_conditions(self):
+        remote = MagicMock(spec=ComprehendMedicalExtractor)
+        remote.extract.return_value = [{"Text": "x", "Category": "MEDICAL_CONDITION", "Type": "DX_NAME", "Score": 0.9}]
+        hybrid = HybridEntityExtractor(local=LocalMedicalNerExtractor(), remote=remote)
+
+        self.assertEqual(hybrid.extract("tengo fiebre")[0]["Text"], "fiebre")
+        remote.extract.assert_not_called()
+        self.assertEqual(hybrid.extract("algo raro me pasa")[0]["Text"], "x")
+        remote.extract.assert_called_once_with("algo raro me pasa")
+
+    def test_build_from_name(self):
+        self.assertIsInstance(build_entity_extractor("local"), LocalMedicalNerExtractor)
+        self.assertIsInstance(build_entity_extractor("desconocido"), ComprehendMedicalExtractor)
+
+    def test_extractor_without_extract_cannot_be_built(self):
+        class Incomplete(EntityExtractor):
+            name = "incompleto"
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_cache_key_is_per_backend(self):
+        with patch.object(entity_extractors, "_shared_extractor", LocalMedicalNerExtractor()):
+            service = EntityDetectionService(redis_client=MagicMock(), ttl_seconds=0)
+        self.assertEqual(service.backend, "local")
+        self.assertEqual(service.detect("tengo fiebre")[0]["Text"], "fiebre")
+
+
+class OfflineEtlTests(unittest.TestCase):
+    def test_process_medical_data_runs_with_local_extractor(self):
+        dataset_manager = MagicMock()
+        dataset_manager.get_conversation.return_value = {
+            "triaje_level": "Leve",
+            "pain_scale": 4,
+            "messages": [
+                {"role": "user", "content": "Tengo migraña desde ayer"},
+                {"role": "assistant", "content": "¿Has tomado algo?"},
+                {"role": "user", "content": "Sí, paracetamol"},
+            ],
+        }
+        processor = MedicalDataProcessor(dataset_manager=dataset_manager, entity_extractor=LocalMedicalNerExtractor())
+        with patch("services.process_data.medical_data.call_claude", return_value="Resumen"):
+            result = processor.process_medical_data("u1", "c1")
+
+        self.assertNotIn("error", result)
+        self.assertEqual(result["medical_history"], "migraña")
+        self.assertEqual(result["medications"], "paracetamol")
+
+    def test_negated_condition_is_not_sent_as_history(self):
+        dataset_manager = MagicMock()
+        dataset_manager.get_conversation.return_value = {
+            "messages": [
+                {"role": "user", "content": "Me duele la cabeza"},
+                {"role": "user", "content": "No tengo dolor en el pecho"},
+            ],
+        }
+        processor = MedicalDataProcessor(dataset_manager=dataset_manager, entity_extractor=LocalMedicalNerExtractor())
+        with patch("services.process_data.medical_data.call_claude", return_value="Resumen"):
+            result = processor.process_medical_data("u1", "c1")
+
+        self.assertEqual(result["medical_history"], "duele la cabeza")
+
+    def test_extractor_failure_is_propagated_to_the_etl(self):
+        failing = MagicMock(spec=ComprehendMedicalExtractor)
+        failing.name = "comprehend"
+        failing.extract.side_effect = RuntimeError("sin red")
+        processor = MedicalDataProcessor(dataset_manager=MagicMock(), entity_extractor=failing)
+        with self.assertRaises(RuntimeError):
+            processor.detect_entities("tengo fiebre")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.process_data import etl_runner  # noqa: E402
+from services.process_data.medical_data import CHECKPOINT_VERSION, messages_digest  # noqa: E402
+
+CLOSE_REASONS = [
+    "triage_recommendation",
+    "expert_advice_close",
+    "websocket_room_closed",
+    "websocket_disconnect",
+    "inactivity_timeout",
+]
+
+
+def _wait_idle(timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with etl_runner._REGISTRY_LOCK:
+            if not etl_runner._PENDING_RUNS and not etl_runner._ACTIVE_WORKERS:
+                return
+        time.sleep(0.01)
+    raise AssertionError("la ETL no terminó a tiempo")
+
+
+class ETLCoalescingTests(unittest.TestCase):
+    def setUp(self):
+        self.executed = []
+        patches = [
+            patch.object(etl_runner, "_update_etl_state"),
+            patch.object(etl_runner, "_execute_task_with_retries", side_effect=lambda task: self.executed.append(dict(task))),
+        ]
+        self.update_state = patches[0].start()
+        for started in patches[1:]:
+            started.start()
+        for started in patches:
+            self.addCleanup(started.stop)
+
+    def _trigger(self, reason, window=0.1, token=None):
+        return etl_runner.enqueue_etl_run(
+            user_id="u1",
+            conversation_id="c1",
+            jwt_token=token,
+            reasons=[reason],
+            run_id=f"run-{reason}",
+            coalesce_window_seconds=window,
+        )
+
+    def test_burst_of_close_triggers_runs_once_with_all_reasons(self):
+        run_ids = {self._trigger(reason, token="tok" if reason == "websocket_room_closed" else None) for reason in CLOSE_REASONS}
+        _wait_idle()
+
+        self.assertEqual(run_ids, {"run-triage_recommendation"})
+        self.assertEqual(len(self.executed), 1)
+        self.assertEqual(self.executed[0]["reasons"], CLOSE_REASONS)
+        self.assertEqual(self.executed[0]["triggers"], 5)
+        self.assertEqual(self.executed[0]["jwt_token"], "tok")
+        queued = [call for call in self.update_state.call_args_list if call.args[2].get("last_status") == "queued"]
+        self.assertEqual(len(queued), 1)
+
+    def test_zero_window_dispatches_immediately(self):
+        self._trigger("manual", window=0)
+        _wait_idle()
+        self.assertEqual([task["reasons"] for task in self.executed], [["manual"]])
+
+    def test_max_wait_bounds_the_debounce(self):
+        with patch.object(etl_runner, "_COALESCE_MAX_WAIT_SECONDS", 0.15):
+            started = time.monotonic()
+            self._trigger("a", window=0.1)
+            while time.monotonic() - started < 0.3 and not self.executed:
+                self._trigger("b", window=0.1)
+                time.sleep(0.02)
+            _wait_idle()
+        self.assertEqual(len(self.executed), 1)
+        self.assertLess(time.monotonic() - started, 0.6)
+
+    def test_triggers_during_a_run_collapse_into_one_follow_up(self):
+        release = threading.Event()
+
+        def slow_run(task):
+            self.executed.append(dict(task))
+            release.wait(1.0)
+
+        with patch.object(etl_runner, "_execute_task_with_retries", side_effect=slow_run):
+            self._trigger("first", window=0)
+            while not self.executed:
+                time.sleep(0.005)
+            for reason in ("second", "third", "fourth"):
+                self._trigger(reason, window=0)
+            release.set()
+            _wait_idle()
+
+        self.assertEqual([task["reasons"] for task in self.executed], [["first"], ["second", "third", "fourth"]])
+        self.assertEqual(self.executed[1]["merged_run_ids"], ["run-third", "run-fourth"])
+
+    def test_flushed_run_merged_into_queued_follow_up_keeps_its_run_id(self):
+        release = threading.Event()
+
+        def slow_run(task):
+            self.executed.append(dict(task))
+            release.wait(1.0)
+
+        with patch.object(etl_runner, "_execute_task_with_retries", side_effect=slow_run), \
+                self.assertLogs(etl_runner.logger.name, level="INFO") as logs:
+            self._trigger("first", window=0)
+            while not self.executed:
+                time.sleep(0.005)
+            self._trigger("second", window=0)
+            returned = self._trigger("debounced", window=0.05)
+            deadline = time.monotonic() + 1.0
+            while "u1:c1" in etl_runner._PENDING_RUNS and time.monotonic() < deadline:
+                time.sleep(0.005)
+            release.set()
+            _wait_idle()
+
+        self.assertEqual(returned, "run-debounced")
+        follow_up = self.executed[1]
+        self.assertEqual((follow_up["run_id"], follow_up["merged_run_ids"]), ("run-second", ["run-debounced"]))
+        coalesced = [line for line in logs.output if "etl_coalesced" in line]
+        self.assertEqual(len(coalesced), 1)
+        self.assertIn('"trigger_run_id": "run-debounced"', coalesced[0])
+
+    def test_failed_queue_write_leaves_nothing_pending(self):
+        self.update_state.side_effect = RuntimeError("mongo caído")
+        with self.assertRaises(RuntimeError):
+            self._trigger("first")
+        self.assertNotIn("u1:c1", etl_runner._PENDING_RUNS)
+
+
+class ETLInputHashTests(unittest.TestCase):
+    def _conversation(self, messages, processed):
+        return {
+            "messages": messages,
+            "medical_context": {
+                "hybrid_state": {
+                    "etl": {
+                        "last_success_at": "2026-01-01T00:00:00",
+                        "incremental": {
+                            "version": CHECKPOINT_VERSION,
+                            "watermark": len(processed),
+                            "messages_digest": messages_digest(processed),
+                            "summary": "Resumen",
+                            "entities": [],
+                        },
+                    }
+                }
+            },
+        }
+
+    @patch.object(etl_runner, "send_data_to_django")
+    @patch.object(etl_runner, "_update_etl_state")
+    def test_run_with_same_input_as_last_success_is_skipped(self, update_state, send):
+        messages = [{"role": "user", "content": "tengo fiebre"}]
+        manager = MagicMock()
+        manager.get_conversation.return_value = self._conversation(messages, messages)
+        task = {"user_id": "u1", "conversation_id": "c1", "run_id": "r1", "reasons": ["websocket_disconnect"]}
+        with patch("services.process_data.medical_data.get_conversational_dataset_manager", return_value=manager):
+            result = etl_runner._execute_task_with_retries(task, backoff_seconds=(0,))
+
+        self.assertTrue(result["skipped"])
+        send.assert_not_called()
+        manager.get_conversation.assert_called_once()
+        self.assertEqual(update_state.call_args.args[2]["last_status"], "skipped")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,207 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from routes.utils import serialize_conversation_docs  # noqa: E402
+from services.chatbot.application import chat_turn_service  # noqa: E402
+from services.process_data import etl_runner  # noqa: E402
+from services.process_data.etl_state_store import EtlStateStore, merge_etl_state, with_live_etl_state  # noqa: E402
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def hset(self, key, mapping):
+        self.ops.append(("hset", key, mapping))
+
+    def expire(self, key, seconds):
+        self.ops.append(("expire", key, seconds))
+
+    def hgetall(self, key):
+        self.ops.append(("hgetall", key, None))
+
+    def execute(self):
+        if self.redis.down:
+            raise ConnectionError("redis caído")
+        results = []
+        for op, key, value in self.ops:
+            if op == "hset":
+                self.redis.hashes.setdefault(key, {}).update(value)
+            elif op == "expire":
+                self.redis.ttls[key] = value
+            else:
+                results.append(self.redis.hgetall(key))
+        self.redis.transactions += 1
+        return results
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+        self.transactions = 0
+        self.down = False
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    def hgetall(self, key):
+        return {k.encode("utf-8"): v.encode("utf-8") for k, v in self.hashes.get(key, {}).items()}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _state(status, run_id="r1", **extra):
+    return {"last_status": status, "last_run_id": run_id, "last_reasons": ["manual_endpoint"], **extra}
+
+
+class EtlStateStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        self.manager = MagicMock()
+        self.clock = _Clock()
+        self.store = EtlStateStore(
+            redis_client=self.redis,
+            manager_factory=lambda: self.manager,
+            checkpoint_seconds=60,
+            ttl_seconds=600,
+            clock=self.clock,
+        )
+
+    def test_run_writes_mongo_once_with_batched_transitions(self):
+        self.store.transition("u1", "c1", _state("queued", attempts=0))
+        self.store.transition("u1", "c1", _state("running", attempts=1))
+        self.manager.update_conversation_etl_state.assert_not_called()
+        self.assertEqual(self.store.get("u1", "c1")["last_status"], "running")
+
+        self.store.transition("u1", "c1", _state("success", attempts=1, incremental={"watermark": 3}))
+        self.manager.update_conversation_etl_state.assert_called_once()
+        checkpoint = self.manager.update_conversation_etl_state.call_args.args[2]
+        self.assertEqual((checkpoint["last_status"], checkpoint["attempts"]), ("success", 1))
+        self.assertEqual(checkpoint["incremental"], {"watermark": 3})
+        self.assertNotIn("incremental", self.store.get("u1", "c1"))
+        self.assertEqual(self.redis.transactions, 3)
+        self.assertEqual(self.redis.ttls["etl:state:u1:c1"], 600)
+
+    def test_long_running_state_is_checkpointed_periodically(self):
+        self.store.transition("u1", "c1", _state("queued"))
+        self.clock.now = 61
+        self.store.transition("u1", "c1", _state("running", attempts=2))
+        self.manager.update_conversation_etl_state.assert_called_once()
+        self.assertEqual(self.store.stats()["pending_conversations"], 0)
+
+    def test_same_run_cannot_go_back(self):
+        self.store.transition("u1", "c1", _state("running"))
+        self.assertTrue(self.store.transition("u1", "c1", _state("running", attempts=2)))
+        self.store.transition("u1", "c1", _state("failed"))
+        self.assertFalse(self.store.transition("u1", "c1", _state("running", attempts=3)))
+        self.assertTrue(self.store.transition("u1", "c1", _state("queued", run_id="r2")))
+        self.assertEqual(self.store.stats()["rejected"], 1)
+
+    def test_redis_down_writes_straight_to_mongo(self):
+        self.redis.down = True
+        self.store.transition("u1", "c1", _state("queued"))
+        self.manager.update_conversation_etl_state.assert_called_once()
+        self.assertEqual(self.store.get("u1", "c1"), {})
+
+    def test_flush_persists_pending_transitions(self):
+        self.store.transition("u1", "c1", _state("queued"))
+        self.store.transition("u2", "c2", _state("running"))
+        self.assertEqual(self.store.flush(), 2)
+        self.assertEqual(self.manager.update_conversation_etl_state.call_count, 2)
+
+
+def _conversation(conversation_id, etl_state=None):
+    conversation = {"_id": conversation_id, "user_id": "u1", "messages": []}
+    if etl_state is not None:
+        conversation["medical_context"] = {"hybrid_state": {"etl": etl_state, "controller_mode": "llm_primary"}}
+    return conversation
+
+
+class LiveEtlStateReadersTests(unittest.TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        self.store = EtlStateStore(redis_client=self.redis, manager_factory=MagicMock, checkpoint_seconds=60)
+        finished = "2026-01-01T10:00:00"
+        self.persisted = _state("success", last_attempt_at=finished, last_success_at=finished, incremental={"watermark": 3})
+
+    def test_queued_and_running_states_reach_readers(self):
+        self.store.transition("u1", "c1", _state("success", last_attempt_at="2026-01-01T10:00:00"))
+        self.store.transition("u1", "c1", _state("queued", run_id="r2", attempts=0))
+        conversations = [_conversation("c1", self.persisted), _conversation("c2")]
+
+        with patch("routes.utils.with_live_etl_state", side_effect=lambda convs: with_live_etl_state(convs, self.store)):
+            serialized = serialize_conversation_docs(conversations)
+
+        etl = serialized[0]["medical_context"]["hybrid_state"]["etl"]
+        self.assertEqual((etl["last_status"], etl["last_run_id"]), ("queued", "r2"))
+        self.assertEqual(etl["incremental"], {"watermark": 3})
+        self.assertEqual(serialized[0]["medical_context"]["hybrid_state"]["controller_mode"], "llm_primary")
+        self.assertNotIn("medical_context", serialized[1])
+        self.assertEqual(conversations[0]["medical_context"]["hybrid_state"]["etl"]["last_status"], "success")
+
+    def test_newer_mongo_state_is_not_overwritten_by_stale_redis(self):
+        same_run_behind = {"last_status": "running", "last_run_id": "r1", "attempts": 1}
+        self.assertEqual(merge_etl_state(self.persisted, same_run_behind)["last_status"], "success")
+        older_run = {"last_status": "failed", "last_run_id": "r0", "last_attempt_at": "2026-01-01T09:00:00"}
+        self.assertEqual(merge_etl_state(self.persisted, older_run)["last_run_id"], "r1")
+        first_queued = {"last_status": "queued", "last_run_id": "r2", "attempts": 0}
+        self.assertEqual(merge_etl_state(self.persisted, first_queued)["last_status"], "queued")
+        self.assertEqual(merge_etl_state(None, {}), {})
+
+    def test_redis_down_keeps_mongo_state(self):
+        self.redis.down = True
+        conversation = _conversation("c1", self.persisted)
+        self.assertEqual(with_live_etl_state([conversation], self.store), [conversation])
+
+    def test_chat_turn_persists_live_etl_state(self):
+        self.store.transition("u1", "c1", _state("running", run_id="r2", attempts=1, last_attempt_at="2026-01-02T08:00:00"))
+        with patch.object(chat_turn_service, "get_etl_state_store", return_value=self.store), \
+                patch.object(chat_turn_service.conversational_dataset_manager, "get_conversation",
+                             return_value=_conversation("c1", self.persisted)), \
+                patch.object(chat_turn_service.fallback_model_adapter, "respond", side_effect=RuntimeError("sin red")), \
+                patch.object(chat_turn_service, "persist_turn_data", return_value="c1") as persist, \
+                patch.object(chat_turn_service, "handle_turn_postprocess", return_value={}):
+            _, status = chat_turn_service.process_message_logic("u1", "Me duele la cabeza", {}, "c1")
+
+        self.assertEqual(status, 200)
+        etl = persist.call_args.kwargs["hybrid_state"]["etl"]
+        self.assertEqual((etl["last_status"], etl["last_run_id"], etl["incremental"]), ("running", "r2", {"watermark": 3}))
+
+
+class RunnerStateWritesTests(unittest.TestCase):
+    @patch("services.process_data.etl_runner.time.sleep", return_value=None)
+    def test_retried_run_checkpoints_mongo_once(self, _sleep):
+        manager = MagicMock()
+        store = EtlStateStore(redis_client=_FakeRedis(), manager_factory=lambda: manager, checkpoint_seconds=60)
+        results = [
+            {"success": False, "error": "timeout"},
+            {"success": True, "error": "", "checkpoint": {"watermark": 2}},
+        ]
+        task = {"user_id": "u1", "conversation_id": "c1", "run_id": "r1", "reasons": ["emergency"]}
+        with patch.object(etl_runner, "get_etl_state_store", return_value=store), \
+                patch.object(etl_runner, "execute_etl_once", side_effect=results):
+            etl_runner._execute_task_with_retries(task, backoff_seconds=(0, 1))
+
+        manager.update_conversation_etl_state.assert_called_once()
+        final = manager.update_conversation_etl_state.call_args.args[2]
+        self.assertEqual((final["last_status"], final["attempts"], final["incremental"]), ("success", 2, {"watermark": 2}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from dataclasses import asdict, replace
+from unittest.mock import patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from scripts.replay_expert_corpus import diff_decisions, load_corpus, replay  # noqa: E402
+from services.expert_system.loader import _rules_root, compile_rules  # noqa: E402
+from services.expert_system import orchestrator as orchestrator_module  # noqa: E402
+from services.expert_system.orchestrator import ExpertOrchestrator  # noqa: E402
+
+
+MESSAGES = [
+    "Tengo dolor de cabeza y migraña desde ayer.",
+    "No quiero vivir y me quiero hacer daño.",
+    "Necesito ayuda con un tema no médico.",
+    "Tengo dolor de cabeza y migraña desde ayer.",
+    "Fue de repente, el dolor es 8 de 10.",
+    "Me siento muy ansioso, con palpitaciones y no duermo bien",
+    "Anoche bebí mucho y hoy tengo temblor en las manos",
+    "",
+]
+STATES = [
+    None,
+    None,
+    None,
+    {"active_case_id": "headache_case", "active_node_id": "headache_q1", "collected_fields": {}, "pain_scale": 3},
+    {"active_case_id": "headache_case", "active_node_id": "headache_q1", "collected_fields": {}, "pain_scale": 3},
+    None,
+    {"active_case_id": "alcohol_case", "collected_fields": {}, "pain_scale": 0},
+    None,
+]
+
+
+class EvaluateManyTests(unittest.TestCase):
+    def setUp(self):
+        self.orchestrator = ExpertOrchestrator(knowledge_base=compile_rules())
+
+    def _expected(self):
+        return [
+            asdict(self.orchestrator.evaluate(user_message=message, prior_expert_state=state))
+            for message, state in zip(MESSAGES, STATES)
+        ]
+
+    def test_batch_matches_single_evaluation(self):
+        decisions = self.orchestrator.evaluate_many(MESSAGES, STATES)
+        self.assertEqual([asdict(d) for d in decisions], self._expected())
+
+    def test_repeated_messages_do_not_share_mutable_state(self):
+        first, second = self.orchestrator.evaluate_many(["No quiero vivir"] * 2)
+        first.rule_ids_applied.append("otra")
+        self.assertNotIn("otra", second.rule_ids_applied)
+
+    def test_process_pool_keeps_order_and_results(self):
+        decisions = self.orchestrator.evaluate_many(MESSAGES, STATES, processes=2, chunk_size=3)
+        self.assertEqual([asdict(d) for d in decisions], self._expected())
+
+    def test_worker_pool_is_reused_across_batches(self):
+        expected = self._expected()
+        with self.orchestrator.worker_pool(2) as pool:
+            first = self.orchestrator.evaluate_many(MESSAGES[:4], STATES[:4], pool=pool)
+            second = self.orchestrator.evaluate_many(MESSAGES[4:], STATES[4:], pool=pool, chunk_size=1)
+        self.assertEqual([asdict(d) for d in first + second], expected)
+
+    def test_worker_pool_must_match_knowledge_base(self):
+        other = ExpertOrchestrator(knowledge_base=replace(compile_rules(), version="otra"))
+        with self.orchestrator.worker_pool(2) as pool:
+            with self.assertRaises(ValueError):
+                other.evaluate_many(MESSAGES, STATES, pool=pool)
+
+    def test_states_length_must_match(self):
+        with self.assertRaises(ValueError):
+            self.orchestrator.evaluate_many(MESSAGES, STATES[:2])
+
+
+class ReplayCorpusTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.corpus_path = os.path.join(self.tmpdir, "corpus.jsonl")
+        lines = [
+            {"id": "a1", "conversation_id": "a", "message": "Tengo dolor de cabeza desde ayer."},
+            {"id": "b1", "conversation_id": "b", "message": "Me duele la rodilla al subir escaleras"},
+            {"id": "a2", "conversation_id": "a", "message": "Fue de repente."},
+            {"request_id": "x", "title": "sin conversación", "body": "Tengo jaqueca"},
+        ]
+        with open(self.corpus_path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_replay_chains_conversation_state(self):
+        turns = load_corpus(self.corpus_path)
+        self.assertEqual([t["id"] for t in turns], ["a1", "b1", "a2", "x"])
+
+        summaries, _ = replay(ExpertOrchestrator(knowledge_base=compile_rules()), turns)
+        orchestrator = ExpertOrchestrator(knowledge_base=compile_rules())
+        first = orchestrator.evaluate(user_message="Tengo dolor de cabeza desde ayer.")
+        self.assertEqual(summaries[0]["active_node_id"], first.state.active_node_id)
+        self.assertEqual(summaries[2]["case_id"], "headache_case")
+        self.assertNotEqual(summaries[2]["active_node_id"], first.state.active_node_id)
+
+    def test_replay_uses_one_pool_for_all_waves(self):
+        turns = load_corpus(self.corpus_path)
+        sequential, _ = replay(ExpertOrchestrator(knowledge_base=compile_rules()), turns)
+        with patch.object(orchestrator_module, "ProcessPoolExecutor", wraps=orchestrator_module.ProcessPoolExecutor) as pools:
+            pooled, _ = replay(ExpertOrchestrator(knowledge_base=compile_rules()), turns, processes=2)
+        self.assertEqual(pools.call_count, 1)
+        self.assertEqual(pooled, sequential)
+
+    def test_diff_between_rule_versions(self):
+        candidate_root = os.path.join(self.tmpdir, "rules")
+        shutil.copytree(_rules_root(), candidate_root)
+        with open(os.path.join(candidate_root, "cases", "knee.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "case_id": "knee_case",
+                    "intent_keywords": ["rodilla"],
+                    "required_fields": ["duration"],
+                    "tree": [{"id": "knee_q1", "field": "duration", "question": "¿Desde cuándo?"}],
+                },
+                f,
+            )
+
+        turns = load_corpus(self.corpus_path)
+        baseline, _ = replay(ExpertOrchestrator(knowledge_base=compile_rules()), turns)
+        candidate, _ = replay(ExpertOrchestrator(knowledge_base=compile_rules(candidate_root)), turns)
+        diffs = diff_decisions(turns, baseline, candidate)
+        self.assertEqual([d["id"] for d in diffs], ["b1"])
+        self.assertEqual(diffs[0]["changed"]["case_id"], (None, "knee_case"))
+
+
+if __name__ == "__main__":
+    unittest.main()
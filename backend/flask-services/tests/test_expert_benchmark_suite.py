@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+import unittest
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from scripts.benchmark_expert_system import (  # noqa: E402
+    BASELINE_PATH,
+    DEFAULT_LENGTHS,
+    DEFAULT_SCALES,
+    RULE_DEPENDENT,
+    build_messages,
+    compare,
+    merge_reports,
+    run_suite,
+    scale_knowledge_base,
+)
+from services.expert_system.compiled_kb import compile_knowledge_base  # noqa: E402
+from services.expert_system.loader import read_rules  # noqa: E402
+
+BENCHMARKS = {
+    "detect_best_case",
+    "extract_case_fields",
+    "classify_triage_level",
+    "detect_emergency",
+    "extract_pain_scale",
+    "extract_duration_text",
+}
+
+
+class ExpertBenchmarkSuiteTests(unittest.TestCase):
+    def test_messages_have_requested_length(self):
+        for length in (8, 128):
+            self.assertTrue(all(len(m.split()) == length for m in build_messages(length)))
+
+    def test_scaled_knowledge_base_multiplies_rules(self):
+        raw_kb = read_rules()
+        base = compile_knowledge_base(scale_knowledge_base(raw_kb, 1))
+        scaled = compile_knowledge_base(scale_knowledge_base(raw_kb, 3))
+        self.assertEqual(len(scaled.cases), 3 * len(base.cases))
+        self.assertEqual(scaled.emergency_matcher.rule_count, 3 * base.emergency_matcher.rule_count)
+
+    def test_quick_run_covers_every_benchmark(self):
+        report = run_suite(scales=(1, 2), lengths=(8,), rounds=1)
+        self.assertEqual(set(report["results"]), BENCHMARKS)
+        for name, points in report["results"].items():
+            expected = {"x1/w8", "x2/w8"} if name in RULE_DEPENDENT else {"x1/w8"}
+            self.assertEqual(set(points), expected)
+        self.assertGreater(report["calibration_us"], 0)
+
+    def test_compare_normalizes_by_calibration(self):
+        baseline = {"calibration_us": 10.0, "results": {"detect_emergency": {"x1/w8": 20.0, "x1/w32": 50.0}}}
+        # Máquina el doble de lenta: mismos tiempos relativos, sin regresión
+        slower_machine = {"calibration_us": 20.0, "results": {"detect_emergency": {"x1/w8": 40.0, "x1/w32": 100.0}}}
+        self.assertEqual(compare(slower_machine, baseline, tolerance=0.3), [])
+
+        regressed = {"calibration_us": 10.0, "results": {"detect_emergency": {"x1/w8": 20.0, "x1/w32": 80.0}}}
+        regressions = compare(regressed, baseline, tolerance=0.3)
+        self.assertEqual([(r["benchmark"], r["point"]) for r in regressions], [("detect_emergency", "x1/w32")])
+
+    def test_merge_keeps_best_time(self):
+        first = {"calibration_us": 10.0, "results": {"a": {"x1/w8": 30.0, "x1/w32": 50.0}}}
+        rerun = {"calibration_us": 12.0, "results": {"a": {"x1/w8": 20.0}}}
+        merged = merge_reports(first, rerun)
+        self.assertEqual(merged["results"]["a"], {"x1/w8": 20.0, "x1/w32": 50.0})
+        self.assertEqual(merged["calibration_us"], 10.0)
+
+    def test_stored_baseline_covers_default_suite(self):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        self.assertEqual(set(baseline["results"]), BENCHMARKS)
+        for name in RULE_DEPENDENT:
+            expected = {f"x{scale}/w{length}" for scale in DEFAULT_SCALES for length in DEFAULT_LENGTHS}
+            self.assertEqual(set(baseline["results"][name]), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.chatbot.entity_chunking import ChunkedEntityExtractor  # noqa: E402
+from services.chatbot.entity_detection_service import EntityDetectionService  # noqa: E402
+from services.chatbot.entity_extractors import LocalMedicalNerExtractor  # noqa: E402
+from services.process_data import etl_runner  # noqa: E402
+from services.process_data.medical_data import MedicalDataProcessor  # noqa: E402
+
+THROTTLED = ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, "DetectEntitiesV2")
+
+MESSAGES = [
+    {"role": "user", "content": "Tengo migraña desde ayer"},
+    {"role": "assistant", "content": "¿Has tomado algo?"},
+    {"role": "user", "content": "Sí, paracetamol"},
+]
+
+
+def _conversation(messages, etl_state=None):
+    conversation = {"triaje_level": "Leve", "pain_scale": 4, "messages": messages}
+    if etl_state is not None:
+        conversation["medical_context"] = {"hybrid_state": {"etl": etl_state}}
+    return conversation
+
+
+def _throttled_on(word):
+    """Detector local que falla como Comprehend Medical limitado en los textos que contienen `word`."""
+    local = LocalMedicalNerExtractor()
+
+    def detect(text):
+        if word in text:
+            raise THROTTLED
+        return local.extract(text)
+
+    return detect
+
+
+class IncrementalProcessorTests(unittest.TestCase):
+    def setUp(self):
+        self.dataset_manager = MagicMock()
+        self.detector = MagicMock(wraps=LocalMedicalNerExtractor().extract)
+        service = EntityDetectionService(detector=self.detector, redis_client=MagicMock(), ttl_seconds=0, backend="local")
+        self.extractor = MagicMock(wraps=ChunkedEntityExtractor(service=service, max_workers=1))
+        self.extractor.name = "chunked"
+        self.claude = patch("services.process_data.medical_data.call_claude", return_value="Resumen")
+        self.call_claude = self.claude.start()
+
+    def tearDown(self):
+        self.claude.stop()
+
+    def _run(self, conversation):
+        self.dataset_manager.get_conversation.return_value = conversation
+        processor = MedicalDataProcessor(dataset_manager=self.dataset_manager, entity_extractor=self.extractor)
+        return processor, processor.process_medical_data("u1", "c1")
+
+    def _first_checkpoint(self):
+        processor, _ = self._run(_conversation(MESSAGES))
+        self.call_claude.reset_mock()
+        self.extractor.reset_mock()
+        return {"last_status": "success", "last_success_at": "2026-01-01T00:00:00", "incremental": processor.checkpoint}
+
+    def test_first_run_processes_everything_and_sets_watermark(self):
+        processor, result = self._run(_conversation(MESSAGES))
+        self.assertEqual(result["medications"], "paracetamol")
+        self.assertEqual(processor.checkpoint["watermark"], 3)
+        self.assertEqual(processor.checkpoint["summary"], "Resumen")
+        self.assertFalse(processor.skipped)
+
+    def test_unchanged_conversation_is_skipped(self):
+        etl_state = self._first_checkpoint()
+        processor, result = self._run(_conversation(list(MESSAGES), etl_state))
+        self.assertTrue(processor.skipped)
+        self.assertEqual(result, {"skipped": True})
+        self.call_claude.assert_not_called()
+        self.extractor.extract_segments.assert_not_called()
+
+    def test_only_new_messages_are_summarized_and_analyzed(self):
+        etl_state = self._first_checkpoint()
+        new_message = {"role": "user", "content": "Ahora también tengo fiebre"}
+        processor, result = self._run(_conversation(MESSAGES + [new_message], etl_state))
+
+        self.extractor.extract_segments.assert_called_once_with(["Ahora también tengo fiebre"])
+        prompt = self.call_claude.call_args.args[0]
+        self.assertIn("Resumen previo", prompt)
+        self.assertIn("fiebre", prompt)
+        self.assertNotIn("migraña", prompt)
+        self.assertEqual(result["medical_history"], "migraña; fiebre")
+        self.assertEqual(processor.checkpoint["watermark"], 4)
+        joined = " ".join(m["content"] for m in MESSAGES + [new_message] if m["role"] == "user")
+        for entity in processor.checkpoint["entities"]:
+            self.assertEqual(joined[entity["BeginOffset"]:entity["EndOffset"]], entity["Text"])
+
+    def test_edited_history_triggers_full_run(self):
+        etl_state = self._first_checkpoint()
+        edited = [dict(MESSAGES[0], content="Tengo fiebre desde ayer")] + MESSAGES[1:]
+        processor, result = self._run(_conversation(edited, etl_state))
+        self.assertFalse(processor.skipped)
+        self.assertNotIn("Resumen previo", self.call_claude.call_args.args[0])
+        self.assertEqual(result["medical_history"], "fiebre")
+
+    def test_denied_condition_confirmed_later_reaches_history(self):
+        denied = [{"role": "user", "content": "No tengo fiebre"}]
+        processor, result = self._run(_conversation(denied))
+        self.assertEqual(result["medical_history"], "")
+        etl_state = {"last_success_at": "2026-01-01T00:00:00", "incremental": processor.checkpoint}
+
+        confirmed = denied + [{"role": "user", "content": "Ahora sí tengo fiebre"}]
+        processor, result = self._run(_conversation(confirmed, etl_state))
+
+        self.assertEqual(result["medical_history"], "fiebre")
+        traits = [[t["Name"] for t in e["Traits"]] for e in processor.checkpoint["entities"] if e["Text"] == "fiebre"]
+        self.assertEqual(traits, [["NEGATION"], []])
+
+    def test_checkpoint_from_older_format_triggers_full_run(self):
+        etl_state = self._first_checkpoint()
+        etl_state["incremental"] = {k: v for k, v in etl_state["incremental"].items() if k != "version"}
+        self.assertIsNone(MedicalDataProcessor.previous_checkpoint(_conversation(MESSAGES, etl_state), MESSAGES))
+
+    def test_failed_summary_is_not_checkpointed(self):
+        self.call_claude.side_effect = RuntimeError("bedrock caído")
+        processor, _ = self._run(_conversation(MESSAGES))
+        self.assertIsNone(processor.checkpoint["summary"])
+        etl_state = {"last_success_at": "2026-01-01T00:00:00", "incremental": processor.checkpoint}
+        self.assertIsNone(processor.previous_checkpoint(_conversation(MESSAGES, etl_state), MESSAGES))
+
+    def test_failed_entity_detection_fails_the_run_without_checkpoint(self):
+        etl_state = self._first_checkpoint()
+        self.detector.side_effect = _throttled_on("fiebre")
+        conversation = _conversation(MESSAGES + [{"role": "user", "content": "Ahora tengo fiebre"}], etl_state)
+        processor, result = self._run(conversation)
+
+        self.assertIn("ThrottlingException", result["error"])
+        self.assertIsNone(processor.checkpoint)
+        # La ejecución siguiente vuelve a analizar el mensaje nuevo
+        self.assertEqual(processor.previous_checkpoint(conversation, conversation["messages"])["watermark"], 3)
+
+
+class IncrementalRunnerTests(unittest.TestCase):
+    @patch("services.process_data.etl_runner._update_etl_state")
+    @patch("services.process_data.etl_runner.send_data_to_django", return_value={"status": "ok"})
+    @patch("services.process_data.etl_runner.MedicalDataProcessor")
+    def test_throttled_entity_detection_is_retried(self, processor_cls, send, update_state):
+        dataset_manager = MagicMock()
+        dataset_manager.get_conversation.return_value = _conversation(MESSAGES)
+
+        def processor_for(detector):
+            service = EntityDetectionService(detector=detector, redis_client=MagicMock(), ttl_seconds=0, backend="local")
+            extractor = ChunkedEntityExtractor(service=service, max_workers=2)
+            return MedicalDataProcessor(dataset_manager=dataset_manager, entity_extractor=extractor)
+
+        processor_cls.side_effect = [
+            processor_for(_throttled_on("paracetamol")),
+            processor_for(LocalMedicalNerExtractor().extract),
+        ]
+        task = {"user_id": "u1", "conversation_id": "c1", "run_id": "r1", "reasons": ["inactivity"]}
+        with patch("services.process_data.medical_data.call_claude", return_value="Resumen"):
+            result = etl_runner._execute_task_with_retries(task, backoff_seconds=(0, 0))
+
+        self.assertTrue(result["success"])
+        send.assert_called_once()
+        final_state = update_state.call_args.args[2]
+        self.assertEqual(final_state["attempts"], 2)
+        self.assertEqual({e["Text"] for e in final_state["incremental"]["entities"]}, {"migraña", "paracetamol"})
+
+    @patch("services.process_data.etl_runner.send_data_to_django")
+    @patch("services.process_data.etl_runner.MedicalDataProcessor")
+    def test_skipped_run_does_not_call_django(self, processor_cls, send):
+        processor_cls.return_value.skipped = True
+        result = etl_runner.execute_etl_once("u1", "c1")
+        self.assertTrue(result["success"] and result["skipped"])
+        send.assert_not_called()
+
+    def test_success_state_stores_checkpoint(self):
+        state = etl_runner.success_etl_state({"success": True, "checkpoint": {"watermark": 3}}, attempts=1)
+        self.assertEqual((state["last_status"], state["incremental"]), ("success", {"watermark": 3}))
+        self.assertIn("last_success_at", state)
+
+        skipped = etl_runner.success_etl_state({"success": True, "skipped": True}, attempts=1)
+        self.assertEqual(skipped["last_status"], "skipped")
+        self.assertNotIn("last_success_at", skipped)
+
+
+if __name__ == "__main__":
+    unittest.main()
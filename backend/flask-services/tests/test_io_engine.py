@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from config.config import Config  # noqa: E402
+from services import io_engine  # noqa: E402
+from services.chatbot.conversation_context_service import ConversationContextService  # noqa: E402
+
+
+class IoEngineSelectionTests(unittest.TestCase):
+    def test_socketio_mode_follows_engine(self):
+        with patch.object(Config, "CHAT_IO_ENGINE", "threading"):
+            self.assertEqual(io_engine.socketio_async_mode(), "threading")
+        with patch.object(Config, "CHAT_IO_ENGINE", "eventlet"):
+            self.assertEqual(io_engine.socketio_async_mode(), "eventlet")
+
+    def test_unknown_engine_falls_back_to_eventlet(self):
+        with patch.object(Config, "CHAT_IO_ENGINE", "asyncio"):
+            self.assertEqual(io_engine.selected_engine(), "eventlet")
+
+    def test_threading_engine_does_not_patch(self):
+        with patch.object(Config, "CHAT_IO_ENGINE", "threading"):
+            self.assertEqual(io_engine.configure_io_engine(), "threading")
+        self.assertFalse(io_engine.is_patched())
+
+    def test_cpu_bound_runs_inline_without_patch(self):
+        self.assertEqual(io_engine.run_cpu_bound(sum, [1, 2, 3]), 6)
+
+
+class SimilarityScoringTests(unittest.TestCase):
+    def test_matrix_scores_match_pairwise_cosine(self):
+        rng = np.random.default_rng(7)
+        query = rng.normal(size=16).tolist()
+        docs = [{"embedding": rng.normal(size=16).tolist()} for _ in range(20)]
+        docs.append({"embedding": [1.0, 2.0]})
+        docs.append({"embedding": []})
+        docs.append({"embedding": [0.0] * 16})
+
+        scores = ConversationContextService._similarities(query, docs)
+
+        expected = [
+            ConversationContextService._cosine(query, d["embedding"]) if len(d["embedding"]) == 16 else 0.0
+            for d in docs
+        ]
+        self.assertEqual(len(scores), len(docs))
+        for got, want in zip(scores, expected):
+            self.assertAlmostEqual(got, want, places=5)
+
+    def test_empty_query_scores_zero(self):
+        self.assertEqual(ConversationContextService._similarities([], [{"embedding": [1.0]}]), [0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
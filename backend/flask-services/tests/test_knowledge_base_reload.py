@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from types import MappingProxyType
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.expert_system.compiled_kb import compile_case  # noqa: E402
+from services.expert_system.loader import KnowledgeBaseStore, _rules_root  # noqa: E402
+from services.expert_system.orchestrator import ExpertOrchestrator  # noqa: E402
+from services.expert_system.rule_engine import extract_case_fields  # noqa: E402
+
+
+class CompiledKnowledgeBaseTests(unittest.TestCase):
+    def test_compiled_case_precomputes_extractors_and_nodes(self):
+        compiled = compile_case(
+            {
+                "case_id": "demo",
+                "required_fields": ["onset", "episodes"],
+                "tree": [{"id": "q1", "field": "onset"}, {"id": "q2", "field": "episodes"}],
+                "field_extractors": {
+                    "onset": {"type": "categorical_keywords", "categories": {"sudden": ["Súbito", "de repente"]}},
+                    "episodes": {"type": "regex", "patterns": [r"(\d+) veces", "(inválida"], "group": 1, "value_type": "int"},
+                },
+            }
+        )
+        self.assertEqual(compiled.node("q2")["field"], "episodes")
+        self.assertIsNone(compiled.node("q9"))
+        self.assertEqual(compiled.extractors["onset"].categories, (("sudden", ("subito", "de repente")),))
+        self.assertEqual(len(compiled.extractors["episodes"].patterns), 1)
+
+        fields = extract_case_fields(
+            case_def={},
+            user_message="Empezó súbito, ya van 3 veces",
+            compiled_case=compiled,
+        )
+        self.assertEqual(fields, {"onset": "sudden", "episodes": 3})
+
+    def test_runtime_model_is_read_only(self):
+        kb = KnowledgeBaseStore(hot_reload=False).current()
+        self.assertIsInstance(kb.cases, MappingProxyType)
+        with self.assertRaises(TypeError):
+            kb.cases["nuevo"] = {}
+        with self.assertRaises(AttributeError):
+            kb.version = "otra"
+
+
+class KnowledgeBaseHotReloadTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.rules_root = os.path.join(self.tmpdir, "rules")
+        shutil.copytree(_rules_root(), self.rules_root)
+        self.store = KnowledgeBaseStore(rules_root=self.rules_root, hot_reload=True, reload_interval_seconds=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _write_case(self, payload):
+        path = os.path.join(self.rules_root, "cases", "knee.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload if isinstance(payload, str) else json.dumps(payload))
+        # Garantiza un mtime distinto aunque el sistema de ficheros tenga poca resolución
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_new_case_file_is_picked_up_without_restart(self):
+        orchestrator = ExpertOrchestrator(store=self.store)
+        first = orchestrator.evaluate(user_message="Me duele la rodilla al subir escaleras")
+        self.assertEqual(first.action, "fallback_ai")
+        version = self.store.current().version
+
+        self._write_case(
+            {
+                "case_id": "knee_case",
+                "intent_keywords": ["rodilla", "dolor de rodilla"],
+                "required_fields": ["duration"],
+                "tree": [{"id": "knee_q1", "field": "duration", "question": "¿Desde cuándo?"}],
+                "advice": {"Leve": "Reposo relativo."},
+            }
+        )
+
+        second = orchestrator.evaluate(user_message="Me duele la rodilla al subir escaleras")
+        self.assertEqual(second.case_id, "knee_case")
+        self.assertNotEqual(self.store.current().version, version)
+
+    def test_broken_rules_keep_previous_version(self):
+        kb_before = self.store.current()
+        self._write_case("{ esto no es json")
+
+        self.assertFalse(self.store.reload())
+        self.assertIs(self.store.current(), kb_before)
+        self.assertTrue(self.store.last_error)
+
+    def test_pinned_knowledge_base_ignores_reloads(self):
+        pinned = self.store.current()
+        orchestrator = ExpertOrchestrator(knowledge_base=pinned, store=self.store)
+        self._write_case({"case_id": "knee_case", "intent_keywords": ["rodilla"]})
+        self.assertIs(orchestrator.knowledge_base, pinned)
+        self.assertNotIn("knee_case", orchestrator.cases)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from flask import Flask, jsonify, request  # noqa: E402
+from flask_socketio import SocketIO, emit  # noqa: E402
+
+from config.config import Config  # noqa: E402
+from scripts.load_stubs import StubServer, parse_latency, stub_environment  # noqa: E402
+from scripts.load_generator import DEFAULT_CORPUS, load_corpus, run_load  # noqa: E402
+
+NO_LATENCY = {name: "0" for name in ("bedrock", "embeddings", "comprehend", "django")}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _reply(payload):
+    if payload.get("message") == "fallo":
+        return None
+    return {"conversation_id": payload.get("conversation_id") or f"conv-{payload['user_id']}", "ai_response": "ok"}
+
+
+class _FakeChatServer:
+    """Servicio mínimo con la misma interfaz que /chat/message y el evento chat_message."""
+
+    def __init__(self):
+        self.app = Flask(__name__)
+        self.socketio = SocketIO(self.app, async_mode="threading")
+        self.port = _free_port()
+        self.seen_conversations = []
+
+        @self.app.route("/chat/message", methods=["POST"])
+        def message():
+            payload = request.get_json()
+            self.seen_conversations.append(payload.get("conversation_id"))
+            reply = _reply(payload)
+            return (jsonify(reply), 200) if reply else (jsonify({"error": "x"}), 500)
+
+        @self.app.route("/health/live")
+        def live():
+            return jsonify({"status": "ok"})
+
+        @self.socketio.on("chat_message")
+        def chat_message(data):
+            reply = _reply(data)
+            emit("chat_response" if reply else "error", reply or {"error": "x"})
+
+    def start(self):
+        thread = threading.Thread(
+            target=self.socketio.run,
+            args=(self.app,),
+            kwargs={"host": "127.0.0.1", "port": self.port, "allow_unsafe_werkzeug": True, "log_output": False},
+            daemon=True,
+        )
+        thread.start()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with socket.socket() as sock:
+                if sock.connect_ex(("127.0.0.1", self.port)) == 0:
+                    return self
+            time.sleep(0.05)
+        raise RuntimeError("el servidor de prueba no arrancó")
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+
+class LatencySpecTests(unittest.TestCase):
+    def test_fixed_uniform_and_lognormal(self):
+        self.assertEqual(parse_latency("250")(), 0.25)
+        self.assertTrue(all(0.05 <= parse_latency("uniform:50-80")() <= 0.08 for _ in range(50)))
+        self.assertTrue(all(parse_latency("lognormal:100,0.5")() > 0 for _ in range(50)))
+        with self.assertRaises(ValueError):
+            parse_latency("gamma:1,2")
+
+
+class StubServerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = StubServer(latencies=NO_LATENCY).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.stub.stop()
+
+    def test_real_clients_reach_the_stand_ins(self):
+        from services.api.send_api import get_patient_global_context
+        from services.chatbot.bedrock_claude import call_claude
+        from services.chatbot.comprehend_medical import fetch_entities
+
+        with patch.dict(os.environ, stub_environment(self.stub.url)), \
+                patch.object(Config, "AWS_REGION", "eu-west-1"), \
+                patch.object(Config, "BEDROCK_CLAUDE_MODEL_ID", "stub.claude"), \
+                patch.object(Config, "BEDROCK_CLAUDE_INFERENCE_PROFILE_ID", None):
+            reply = call_claude("Me duele la cabeza")
+            entities = fetch_entities("Tengo fiebre y tomo ibuprofeno")
+            context = get_patient_global_context(jwt_token="token")
+
+        self.assertIn("síntomas", reply)
+        self.assertEqual({e["Category"] for e in entities}, {"MEDICAL_CONDITION", "MEDICATION"})
+        self.assertEqual(context["profile"]["id"], "stub")
+        stats = self.stub.stats()
+        self.assertEqual((stats["bedrock"], stats["comprehend"], stats["django"]), (1, 1, 2))
+
+
+class LoadGeneratorTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = _FakeChatServer().start()
+
+    def setUp(self):
+        self.server.seen_conversations.clear()
+        self.corpus = [
+            {"id": "a", "context": {}, "messages": ["hola", "me duele", "un 5"]},
+            {"id": "b", "context": {}, "messages": ["tengo fiebre", "desde ayer"]},
+        ]
+
+    def test_default_corpus_loads(self):
+        self.assertGreater(len(load_corpus(DEFAULT_CORPUS)), 1)
+
+    def test_http_patients_replay_conversations(self):
+        report = run_load(self.server.url, self.corpus, patients=6, transport="http")
+
+        self.assertEqual(report["turns"], 3 * 3 + 3 * 2)
+        self.assertEqual(report["conversations_completed"], 6)
+        self.assertEqual(report["errors"], {})
+        self.assertGreater(report["turns_per_s"], 0)
+        self.assertLessEqual(report["p50_ms"], report["p95_ms"])
+        self.assertLessEqual(report["p95_ms"], report["p99_ms"])
+        # Solo el primer turno de cada paciente va sin conversation_id
+        self.assertEqual(self.server.seen_conversations.count(None), 6)
+
+    def test_socketio_patients_replay_conversations(self):
+        report = run_load(self.server.url, self.corpus, patients=4, transport="socketio", timeout=10)
+
+        self.assertEqual(report["errors"], {})
+        self.assertEqual(report["turns"], 2 * 3 + 2 * 2)
+
+    def test_failed_turns_are_counted(self):
+        corpus = [{"id": "x", "context": {}, "messages": ["hola", "fallo", "no llega"]}]
+        report = run_load(self.server.url, corpus, patients=2, transport="http")
+
+        self.assertEqual(report["turns"], 2)
+        self.assertEqual(report["errors"], {"http_500": 2})
+        self.assertEqual(report["conversations_completed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
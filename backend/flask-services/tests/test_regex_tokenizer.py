@@ -0,0 +1,106 @@
+import os
+import random
+import sys
+import unittest
+from unittest.mock import patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.chatbot import input_validate  # noqa: E402
+from services.chatbot.tokenizer import regex_tokenize  # noqa: E402
+
+try:
+    from scripts.benchmark_tokenizer import nltk_reference_tokenizer  # noqa: E402
+
+    nltk_tokenize = nltk_reference_tokenizer()
+except ImportError:  # NLTK es opcional
+    nltk_tokenize = None
+
+# Mensajes de pacientes (sin abreviaturas inglesas: el modelo punkt entrenado las trata aparte)
+MESSAGES = [
+    "Hola",
+    "¡Hola!",
+    "hola, buenas",
+    "Buenos días, ¿qué tal?",
+    "Me duele la cabeza desde ayer.",
+    "Tengo náuseas, vómitos y el dolor es 8 de 10. Empezó anoche.",
+    "El dolor es 7. no se me quita",
+    "Llevo 3. 5 días así",
+    "Tomé 1,5 pastillas... y nada",
+    "Me siento mal.. muy mal!!",
+    "¿Es grave? ¿Debo ir a urgencias?",
+    "a. b. c. d",
+    "Eso es todo, gracias.",
+    "no sé.?",
+    "dolor 8.? sí",
+    "fiebre de 38,5, tos y mocos.",
+    "la del sábado.\nY hoy peor.",
+    "x",
+    "",
+    "   ",
+]
+ALPHABET = list("abcdeñáéíóú019 .,?!¿¡×_\n")
+WORDS = ["hola", "me", "duele", "la", "cabeza", "y", "a", "8", "3,5", "2.5", "que", "¿que", "¡hola", "año", "_"]
+SEPARATORS = [" ", " ", ". ", ".", ", ", ",", "? ", "?", "!", ".. ", "...", "\n", " .", ".?", "?."]
+
+
+def _fuzz_messages(count, seed=7):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        if rnd.random() < 0.5:
+            yield "".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(0, 20)))
+        else:
+            yield "".join(rnd.choice(WORDS) + rnd.choice(SEPARATORS) for _ in range(rnd.randint(1, 8)))
+
+
+class RegexTokenizerTests(unittest.TestCase):
+    def test_known_tokens(self):
+        cases = {
+            "¡hola!": ["¡hola", "!"],
+            "me duele. desde ayer": ["me", "duele", ".", "desde", "ayer"],
+            "el dolor es 8. no se quita": ["el", "dolor", "es", "8.", "no", "se", "quita"],
+            "3,5 y 2.5": ["3,5", "y", "2.5"],
+            "hola.. que": ["hola", "..", "que"],
+            "que,tal": ["que", ",", "tal"],
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(regex_tokenize(text), expected)
+
+    def test_default_mode_does_not_call_nltk(self):
+        with patch.object(input_validate, "word_tokenize", side_effect=AssertionError("nltk")):
+            self.assertEqual(input_validate.tokenize("hola, que tal"), ["hola", ",", "que", "tal"])
+
+
+@unittest.skipIf(nltk_tokenize is None, "NLTK no instalado")
+class NltkParityTests(unittest.TestCase):
+    def test_tokens_match_nltk(self):
+        for message in MESSAGES:
+            text = input_validate.normalize_text(message)
+            with self.subTest(message=message):
+                self.assertEqual(regex_tokenize(text), nltk_tokenize(text))
+
+    def test_tokens_match_nltk_on_fuzzed_input(self):
+        for text in _fuzz_messages(3000):
+            self.assertEqual(regex_tokenize(text), nltk_tokenize(text), msg=repr(text))
+
+    def test_validation_decisions_match_nltk(self):
+        messages = MESSAGES + list(_fuzz_messages(500, seed=11))
+        regex_results = [
+            (input_validate.validate_input(m), input_validate.analyze_message(m), input_validate.is_greeting_message(m))
+            for m in messages
+        ]
+        with patch.object(input_validate, "tokenize", nltk_tokenize):
+            nltk_results = [
+                (input_validate.validate_input(m), input_validate.analyze_message(m), input_validate.is_greeting_message(m))
+                for m in messages
+            ]
+        self.assertEqual(regex_results, nltk_results)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from data import schema  # noqa: E402
+from models import conversation  # noqa: E402
+from services.chatbot import conversation_context_service  # noqa: E402
+from services.process_data.medical_data import MedicalDataProcessor  # noqa: E402
+
+
+class _FakeDb(dict):
+    def __missing__(self, name):
+        collection = MagicMock(name=name)
+        collection.create_index.side_effect = lambda keys, **options: "_".join(k for k, _ in keys)
+        self[name] = collection
+        return collection
+
+
+class SchemaBootstrapTests(unittest.TestCase):
+    def test_ensure_indexes_creates_every_declared_index(self):
+        db = _FakeDb()
+        created = schema.ensure_indexes(db)
+
+        self.assertEqual(set(created), set(schema.MONGO_INDEXES))
+        for name, indexes in schema.MONGO_INDEXES.items():
+            self.assertEqual(db[name].create_index.call_count, len(indexes))
+        db["conversations"].create_index.assert_any_call([("purge_after", 1)], expireAfterSeconds=0)
+
+    def test_bootstrap_runs_once_per_process(self):
+        db = _FakeDb()
+        with patch.object(schema, "_bootstrapped", False):
+            self.assertTrue(schema.bootstrap_schema(db))
+            self.assertFalse(schema.bootstrap_schema(db))
+        self.assertEqual(db["conversations"].create_index.call_count, 2)
+
+    def test_services_do_not_create_indexes(self):
+        db = _FakeDb()
+        with patch.object(conversation, "mongo_db", db), \
+                patch.object(conversation_context_service, "mongo_db", db):
+            conversation.ConversationalDatasetManager()
+            conversation_context_service.ConversationContextService()
+
+        for collection in db.values():
+            collection.create_index.assert_not_called()
+
+    def test_shared_instances_are_reused(self):
+        manager = conversation.get_conversational_dataset_manager()
+        self.assertIs(conversation.get_conversational_dataset_manager(), manager)
+        self.assertIs(MedicalDataProcessor().dataset_manager, manager)
+        self.assertIs(
+            conversation_context_service.get_conversation_context_service(),
+            conversation_context_service.get_conversation_context_service(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
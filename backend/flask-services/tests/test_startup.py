@@ -0,0 +1,65 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from data import connect  # noqa: E402
+from services.chatbot import input_validate  # noqa: E402
+
+
+class LazyConnectionTests(unittest.TestCase):
+    def test_clients_are_created_on_first_access(self):
+        with patch.dict(connect._clients, {}, clear=True):
+            self.assertNotIn("redis_client", connect._clients)
+            client = connect.redis_client
+            self.assertIs(connect._clients["redis_client"], client)
+            self.assertIs(connect.redis_client, client)
+
+    def test_mongo_db_builds_client_without_deadlock(self):
+        with patch.dict(connect._clients, {}, clear=True):
+            db = connect.mongo_db
+            self.assertIn("mongo_client", connect._clients)
+            self.assertIs(connect.mongo_db, db)
+
+    def test_unknown_attribute_raises(self):
+        with self.assertRaises(AttributeError):
+            connect.no_existe  # noqa: B018
+
+    def test_readiness_reports_unavailable_services(self):
+        class _DownRedis:
+            def ping(self):
+                raise ConnectionError("redis caído")
+
+        with patch.dict(connect._clients, {"redis_client": _DownRedis(), "context_redis_client": _DownRedis()}), \
+                patch.object(connect, "_ping_mongo", return_value=None):
+            ready, checks = connect.check_readiness()
+
+        self.assertFalse(ready)
+        self.assertTrue(checks["mongo"]["ok"])
+        self.assertFalse(checks["redis"]["ok"])
+        self.assertIn("redis caído", checks["redis"]["error"])
+
+
+class OfflineNltkTests(unittest.TestCase):
+    @unittest.skipIf(input_validate.nltk is None, "NLTK no instalado")
+    def test_verify_does_not_download(self):
+        with patch.object(input_validate.nltk, "download") as mock_download:
+            missing = input_validate.verify_nltk_resources()
+        mock_download.assert_not_called()
+        self.assertTrue(set(missing) <= set(input_validate.NLTK_RESOURCES))
+
+    def test_validation_works_without_punkt(self):
+        with patch.object(input_validate, "word_tokenize", side_effect=LookupError("punkt")), \
+                patch.object(input_validate, "_punkt_available", None):
+            self.assertEqual(input_validate.validate_input("Me duele la cabeza desde ayer"), (True, ""))
+            self.assertTrue(input_validate.is_greeting_message("Hola"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import unittest
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.chatbot import duration_utils, pain_utils  # noqa: E402
+from services.chatbot.duration_utils import extract_duration_text  # noqa: E402
+from services.chatbot.pain_utils import extract_pain_scale, extract_pain_scales  # noqa: E402
+from services.expert_system.orchestrator import ExpertOrchestrator  # noqa: E402
+
+
+class PainAndDurationExtractionTests(unittest.TestCase):
+    def test_pain_values(self):
+        cases = {
+            "8": [8],
+            "es un 4": [4],
+            "El dolor es 8 de 10 y en reposo 3": [8, 3],
+            "Tengo un dolor insoportable": [9],
+            "Me duele un poco, es leve": [2],
+            "Tengo 3 hijos": [],
+            "": [],
+        }
+        for message, expected in cases.items():
+            with self.subTest(message=message):
+                self.assertEqual(extract_pain_scales(message), expected)
+        self.assertEqual(extract_pain_scale("El dolor es 8 de 10 y en reposo 3"), 8)
+        self.assertIsNone(extract_pain_scale(None))
+
+    def test_duration_clues(self):
+        for message in ("desde ayer", "Hace 2 semanas", "48h", "varios días", "esta mañana", "3 años"):
+            with self.subTest(message=message):
+                self.assertEqual(extract_duration_text(f"  {message} "), message)
+        for message in ("me duele la cabeza", "", "   ", "tengo 3 hijos"):
+            with self.subTest(message=message):
+                self.assertIsNone(extract_duration_text(message))
+
+    def test_cached_result_is_not_shared_mutable_state(self):
+        first = extract_pain_scales("dolor 7")
+        first.append(1)
+        self.assertEqual(extract_pain_scales("dolor 7"), [7])
+
+
+class PerTurnMemoizationTests(unittest.TestCase):
+    def setUp(self):
+        pain_utils._parse_pain_scales.cache_clear()
+        duration_utils._has_duration_clue.cache_clear()
+
+    def test_message_is_parsed_once_per_turn(self):
+        message = "Tengo dolor de cabeza desde hace tres días, intensidad 7."
+        decision = ExpertOrchestrator().evaluate(user_message=message)
+        # Resto del turno: contexto, política de dolor y chatbot vuelven a consultar el mismo texto
+        self.assertEqual(extract_pain_scale(message), decision.pain_scale)
+        self.assertEqual(extract_duration_text(message), message)
+        extract_pain_scale(message)
+
+        pain_info = pain_utils._parse_pain_scales.cache_info()
+        self.assertEqual(pain_info.misses, 1)
+        self.assertGreaterEqual(pain_info.hits, 2)
+        self.assertLessEqual(duration_utils._has_duration_clue.cache_info().misses, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
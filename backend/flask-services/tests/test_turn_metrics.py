@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from config.config import Config  # noqa: E402
+from services import turn_metrics  # noqa: E402
+from services.chatbot.application import chat_turn_service  # noqa: E402
+from services.turn_metrics import Histogram, render_metrics, span, turn_timer  # noqa: E402
+
+
+class HistogramTests(unittest.TestCase):
+    def test_render_uses_cumulative_buckets(self):
+        histogram = Histogram("demo_seconds", "Demo.", label="stage", buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(seconds, "claude")
+
+        lines = histogram.render()
+
+        self.assertIn('demo_seconds_bucket{stage="claude",le="0.1"} 1', lines)
+        self.assertIn('demo_seconds_bucket{stage="claude",le="1"} 3', lines)
+        self.assertIn('demo_seconds_bucket{stage="claude",le="+Inf"} 4', lines)
+        self.assertIn('demo_seconds_count{stage="claude"} 4', lines)
+        self.assertIn('demo_seconds_sum{stage="claude"} 4.250000', lines)
+
+
+class TurnTimerTests(unittest.TestCase):
+    def setUp(self):
+        turn_metrics.STAGE_SECONDS.reset()
+        turn_metrics.TURN_SECONDS.reset()
+
+    def test_span_outside_a_turn_records_nothing(self):
+        with span("claude"):
+            pass
+        self.assertEqual(turn_metrics.STAGE_SECONDS.count("claude"), 0)
+
+    def test_nested_and_repeated_spans_accumulate(self):
+        with turn_timer() as timer:
+            with span("llm_candidate"):
+                with span("entities"):
+                    pass
+                with span("entities"):
+                    pass
+
+        self.assertEqual([stage for stage, _, _ in timer.spans], ["entities", "entities", "llm_candidate"])
+        self.assertEqual(set(timer.timings_ms()), {"llm_candidate", "entities", "total"})
+        self.assertEqual(turn_metrics.STAGE_SECONDS.count("entities"), 2)
+        self.assertEqual(turn_metrics.TURN_SECONDS.count(), 1)
+        self.assertIn('chat_stage_duration_seconds_count{stage="llm_candidate"} 1', render_metrics())
+
+    def test_slow_turn_is_dumped_with_spans(self):
+        with patch.object(Config, "CHAT_SLOW_TURN_SECONDS", 0.000001), \
+                patch.object(Config, "CHAT_SLOW_TURN_SAMPLE_RATE", 1.0), \
+                self.assertLogs("services.turn_metrics", level="WARNING") as logs:
+            with turn_timer(conversation_id="c1"):
+                with span("claude"):
+                    pass
+
+        payload = json.loads(logs.output[0].split("chat_slow_turn ", 1)[1])
+        self.assertEqual(payload["conversation_id"], "c1")
+        self.assertEqual(payload["spans"][0]["stage"], "claude")
+
+    def test_fast_or_unsampled_turns_are_not_dumped(self):
+        with patch.object(Config, "CHAT_SLOW_TURN_SECONDS", 0.000001), \
+                patch.object(Config, "CHAT_SLOW_TURN_SAMPLE_RATE", 0.0), \
+                patch.object(turn_metrics.logger, "warning") as warning:
+            with turn_timer():
+                pass
+        warning.assert_not_called()
+
+
+class ChatTurnInstrumentationTests(unittest.TestCase):
+    def test_turn_log_carries_stage_timings(self):
+        with patch.object(chat_turn_service.fallback_model_adapter, "respond", side_effect=RuntimeError("sin red")), \
+                patch.object(chat_turn_service, "persist_turn_data", return_value="c1"), \
+                patch.object(chat_turn_service, "handle_turn_postprocess", return_value={}), \
+                self.assertLogs(chat_turn_service.logger.name, level="INFO") as logs:
+            payload, status = chat_turn_service.process_message_logic("u1", "Me duele la cabeza", {}, None)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["conversation_id"], "c1")
+        record = next(line for line in logs.output if "chat_hybrid_turn " in line)
+        timings = json.loads(record.split("chat_hybrid_turn ", 1)[1])["timings_ms"]
+        self.assertTrue({"expert_evaluate", "llm_candidate", "persistence", "postprocess", "total"} <= set(timings))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import unittest
+from dataclasses import asdict
+from unittest.mock import patch
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from services.chatbot import input_validate  # noqa: E402
+from services.chatbot.application.finalization_service import _normalize_user_text, detect_finalization  # noqa: E402
+from services.chatbot.duration_utils import _normalize_text as duration_normalize  # noqa: E402
+from services.chatbot.pain_utils import extract_pain_scale  # noqa: E402
+from services.chatbot.turn_text import TurnText, as_turn_text  # noqa: E402
+from services.expert_system.normalization import normalize_text  # noqa: E402
+from services.expert_system.orchestrator import ExpertOrchestrator  # noqa: E402
+
+MESSAGES = [
+    "  Hola ",
+    "¡Me duele la cabeza desde AYER!  ",
+    "Tengo náuseas, vómitos y el dolor es 8/10.",
+    "Eso es todo, gracias. Terminé.",
+    "Quiero saber qué tengo: ¿es una enfermedad?",
+    "aaaaaaa ayuda",
+    "<script>alert(1)</script>",
+    "",
+]
+
+
+class TurnTextFormsTests(unittest.TestCase):
+    def test_forms_match_previous_normalizers(self):
+        for message in MESSAGES:
+            with self.subTest(message=message):
+                turn = TurnText(message)
+                self.assertEqual(turn.lower, message.strip().lower())
+                self.assertEqual(turn.folded, input_validate.normalize_text(message.strip()))
+                self.assertEqual(turn.compact, duration_normalize(message))
+                self.assertEqual(turn.plain, _normalize_user_text(message))
+                self.assertEqual(turn.normalized, normalize_text(message))
+                self.assertEqual(list(turn.tokens), input_validate.tokenize(input_validate.normalize_text(message)))
+                self.assertEqual(turn.pain_scale, extract_pain_scale(message))
+
+    def test_content_tokens_drop_stopwords(self):
+        turn = TurnText("Me duele la cabeza")
+        self.assertIn("cabeza", turn.content_tokens)
+        self.assertNotIn("la", turn.content_tokens)
+
+    def test_as_turn_text_reuses_instance(self):
+        turn = TurnText("hola")
+        self.assertIs(as_turn_text(turn), turn)
+        self.assertEqual(as_turn_text(None).text, "")
+
+
+class TurnTextPipelineTests(unittest.TestCase):
+    def test_validation_accepts_turn_text(self):
+        for message in MESSAGES:
+            with self.subTest(message=message):
+                self.assertEqual(input_validate.validate_input(TurnText(message)), input_validate.validate_input(message))
+                self.assertEqual(input_validate.analyze_message(TurnText(message)), input_validate.analyze_message(message))
+
+    def test_message_is_tokenized_once_per_turn(self):
+        turn = TurnText("Me duele mucho la cabeza desde ayer por la tarde")
+        with patch.object(input_validate, "tokenize", wraps=input_validate.tokenize) as tokenize:
+            input_validate.analyze_message(turn)
+            input_validate.generate_response(turn)
+            input_validate.is_greeting_message(turn)
+        self.assertEqual(tokenize.call_count, 1)
+
+    def test_expert_decision_is_unchanged_with_turn_text(self):
+        orchestrator = ExpertOrchestrator()
+        for message in MESSAGES:
+            with self.subTest(message=message):
+                expected = orchestrator.evaluate(user_message=message)
+                shared = orchestrator.evaluate(user_message=message, turn_text=TurnText(message))
+                self.assertEqual(asdict(shared), asdict(expected))
+
+    def test_finalization_uses_shared_plain_form(self):
+        message = "Eso es todo, gracias."
+        kwargs = dict(
+            bot_response="De acuerdo.",
+            conversation_state={},
+            triage_level="Leve",
+            controller_mode="llm_primary",
+        )
+        self.assertEqual(
+            detect_finalization(user_message=message, turn_text=TurnText(message), **kwargs),
+            (True, ["explicit_close_phrase"]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import sys
+import threading
+import unittest
+from multiprocessing.managers import BaseManager
+
+
+CURRENT_DIR = os.path.dirname(__file__)
+SRC_DIR = os.path.abspath(os.path.join(CURRENT_DIR, "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from routes.ws_sessions import SidMap, release_disconnected_sid  # noqa: E402
+
+
+class _SharedRedis:
+    """Redis mínimo (SET NX/EX, GET, GETDEL atómicos) que vive en un proceso aparte."""
+
+    def __init__(self):
+        self._data = {}
+        self._ttls = {}
+        self._lock = threading.Lock()
+        self.down = False
+
+    def set(self, key, value, nx=False, ex=None):
+        if self.down:
+            raise ConnectionError("redis caído")
+        with self._lock:
+            if nx and key in self._data:
+                return None
+            self._data[key] = str(value).encode("utf-8")
+            self._ttls[key] = ex
+            return True
+
+    def get(self, key):
+        if self.down:
+            raise ConnectionError("redis caído")
+        with self._lock:
+            return self._data.get(key)
+
+    def getdel(self, key):
+        if self.down:
+            raise ConnectionError("redis caído")
+        with self._lock:
+            self._ttls.pop(key, None)
+            return self._data.pop(key, None)
+
+    def ttl_of(self, key):
+        return self._ttls.get(key)
+
+
+class _RedisManager(BaseManager):
+    pass
+
+
+_RedisManager.register("SharedRedis", _SharedRedis)
+
+
+def _disconnect_worker(redis_proxy, sid, barrier, results):
+    users = SidMap("user", redis_client=redis_proxy)
+    conversations = SidMap("conversation", redis_client=redis_proxy)
+    barrier.wait()
+    released = release_disconnected_sid(sid, users, conversations, redis_client=redis_proxy)
+    results.put((sid, released))
+
+
+def _bind(redis_client, sid, user_id, conversation_id):
+    SidMap("user", redis_client=redis_client)[sid] = user_id
+    SidMap("conversation", redis_client=redis_client)[sid] = conversation_id
+
+
+def _run_disconnect_workers(redis_client, sids):
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(len(sids))
+    results = ctx.Queue()
+    workers = [ctx.Process(target=_disconnect_worker, args=(redis_client, sid, barrier, results)) for sid in sids]
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get(timeout=10) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=10)
+    return [released for _, released in outcomes if released]
+
+
+class SidMapTests(unittest.TestCase):
+    def setUp(self):
+        self.redis = _SharedRedis()
+        self.users = SidMap("user", ttl_seconds=120, redis_client=self.redis)
+
+    def test_values_live_in_redis_with_ttl(self):
+        self.users["s1"] = "u1"
+        self.assertEqual(SidMap("user", redis_client=self.redis).get("s1"), "u1")
+        self.assertEqual(self.redis.ttl_of("ws:sid:user:s1"), 120)
+
+    def test_pop_returns_value_once(self):
+        self.users["s1"] = "u1"
+        self.assertEqual(self.users.pop("s1"), "u1")
+        self.assertIsNone(self.users.pop("s1"))
+        self.assertEqual(self.users.get("s1", "none"), "none")
+
+    def test_falls_back_to_process_memory_without_redis(self):
+        self.redis.down = True
+        self.users["s1"] = "u1"
+        self.assertEqual(self.users.get("s1"), "u1")
+        self.assertEqual(self.users.pop("s1"), "u1")
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "requiere fork")
+class MultiWorkerDisconnectTests(unittest.TestCase):
+    def test_disconnect_etl_fires_once_across_workers(self):
+        with _RedisManager() as manager:
+            redis_proxy = manager.SharedRedis()
+            # El usuario abrió la conversación en tres procesos y el SID s1 recibe además un
+            # disconnect duplicado
+            for sid in ("s1", "s2", "s3"):
+                _bind(redis_proxy, sid, "u1", "c1")
+            released = _run_disconnect_workers(redis_proxy, ["s1", "s1", "s2", "s3"])
+
+        self.assertEqual(released, [("u1", "c1")])
+
+    def test_each_conversation_gets_its_own_run(self):
+        with _RedisManager() as manager:
+            redis_proxy = manager.SharedRedis()
+            _bind(redis_proxy, "s1", "u1", "c1")
+            _bind(redis_proxy, "s2", "u2", "c2")
+            released = _run_disconnect_workers(redis_proxy, ["s1", "s2"])
+
+        self.assertEqual(sorted(released), [("u1", "c1"), ("u2", "c2")])
+
+
+@unittest.skipUnless(os.getenv("REDIS_TEST_URL"), "REDIS_TEST_URL no definido")
+class RealRedisDisconnectTests(unittest.TestCase):
+    def test_disconnect_etl_fires_once_with_real_redis(self):
+        import redis
+
+        client = redis.Redis.from_url(os.environ["REDIS_TEST_URL"])
+        client.delete("ws:etl_claim:u-test:c-test")
+        for sid in ("rs1", "rs2", "rs3"):
+            _bind(client, sid, "u-test", "c-test")
+        released = _run_disconnect_workers(client, ["rs1", "rs1", "rs2", "rs3"])
+        client.delete("ws:etl_claim:u-test:c-test")
+
+        self.assertEqual(released, [("u-test", "c-test")])
+
+
+if __name__ == "__main__":
+    unittest.main()